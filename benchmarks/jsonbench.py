@@ -0,0 +1,89 @@
+"""
+Benchmark of the json decoders on a tenant zip.
+
+python benchmarks/jsonbench.py <tenant zip> [--REPEAT <n>]
+"""
+
+import json
+import os
+import sys
+import time
+from zipfile import ZipFile
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+import jsonbackend  # noqa: E402
+
+
+def getJsonFileName(inputZip):
+    """
+    Get the tenant json file of a zip, like CommonDataFunction.readJsonFile.
+    :param inputZip: ZipFile
+    :return: json file name
+    """
+    jsonFilesList = [x for x in inputZip.namelist() if x.lower().endswith(".json")]
+    if "_legacy.json" in jsonFilesList:
+        return "_legacy.json"
+    return jsonFilesList[0]
+
+
+def timeRuns(function, repeat):
+    """
+    Time a function.
+    :param function: function without arguments
+    :param repeat: number of runs
+    :return: tuple of the best and the mean time in seconds
+    """
+    runTimes = []
+    for _ in range(repeat):
+        startTime = time.perf_counter()
+        function()
+        runTimes.append(time.perf_counter() - startTime)
+    return min(runTimes), sum(runTimes) / repeat
+
+
+def main(argv):
+    """
+    Decode the tenant json with the stream decoder used before and with every available decoder of jsonbackend.
+    :param argv: arguments
+    :return: null
+    """
+    if len(argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    repeat = int(argv[argv.index("--REPEAT") + 1]) if "--REPEAT" in argv else 5
+    inputZip = ZipFile(argv[1])
+    jsonFileName = getJsonFileName(inputZip)
+    print(
+        f"{jsonFileName}: {inputZip.getinfo(jsonFileName).file_size / 1024 / 1024:.1f} MB, "
+        f"{repeat} runs, default decoder {jsonbackend.defaultDecoder}"
+    )
+
+    def streamLoad():
+        with inputZip.open(jsonFileName) as dataFile:
+            return json.load(dataFile)
+
+    benchmarks = {"json stream": streamLoad}
+    for decoderName in jsonbackend.decoders:
+        benchmarks[decoderName + " bytes"] = (
+            lambda decoderName=decoderName: jsonbackend.loadZipMember(
+                inputZip, jsonFileName, decoderName
+            )
+        )
+    expectedData = streamLoad()
+    print(f"{'decoder':<16}{'best s':>10}{'mean s':>10}  same data")
+    for benchmarkName, function in benchmarks.items():
+        bestTime, meanTime = timeRuns(function, repeat)
+        print(
+            f"{benchmarkName:<16}{bestTime:>10.3f}{meanTime:>10.3f}  {function() == expectedData}"
+        )
+
+    tenantData = expectedData
+    bestTime, meanTime = timeRuns(lambda: jsonbackend.dumps(tenantData), repeat)
+    print(f"{'json dumps':<16}{bestTime:>10.3f}{meanTime:>10.3f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,366 @@
+"""
+Performance regression gate: compares a stagebench run with a stored baseline run, stage by stage.
+
+python benchmarks/regressiongate.py <baseline json> <run json> [--TIME_THRESHOLD <ratio>]
+    [--MEMORY_THRESHOLD <ratio>] [--SCALING_LIMIT <exponent>] [--BUDGETS <budgets json>] [--OUT <report csv>]
+
+A stage regresses when its median time grows by more than TIME_THRESHOLD (default 0.2, i.e. 20%) and by more than
+minSeconds, or its memory growth (its peak memory over the memory in use when it started, so the memory held by the
+earlier stages does not count) grows by more than MEMORY_THRESHOLD (default 0.2) and by more than minMemoryMB. Memory
+is only compared when both runs measured it the same way (MemoryMeasure of the run reports). Stages
+of the run missing from the baseline are reported as new, so their cost is seen before they ship. With two or more
+sizes, the time of every stage is fitted against the json size (time ~ n^exponent) and stages growing faster than
+n^SCALING_LIMIT (default 1.5) are reported as superlinear. The budgets json overrides the thresholds of single
+stages, by stage or method name, e.g. {"webLayout": {"TimeThreshold": 0.5, "MemoryThreshold": 0.3}}.
+
+The exit code is 1 when a stage regressed, is new or is superlinear, so the gate can stop a release pipeline.
+"""
+
+import csv
+import json
+import math
+import sys
+
+
+class RegressionGate:
+    reportColumns = [
+        "Size",
+        "Stage",
+        "Parent",
+        "Method",
+        "Check",
+        "Baseline",
+        "Current",
+        "Change",
+        "Status",
+    ]
+    # Changes below these are noise of the machine, whatever the ratio.
+    minSeconds = 0.05
+    minMemoryMB = 20
+    failingStatuses = ("Regression", "New", "Superlinear")
+
+    def __init__(
+        self,
+        baseline,
+        current,
+        timeThreshold=0.2,
+        memoryThreshold=0.2,
+        scalingLimit=1.5,
+        budgets=None,
+    ):
+        """
+        RegressionGate Constructor.
+        :param baseline: stagebench results dict of the baseline
+        :param current: stagebench results dict of the run to check
+        :param timeThreshold: allowed relative growth of the median time of a stage
+        :param memoryThreshold: allowed relative growth of the peak memory of a stage
+        :param scalingLimit: highest allowed exponent of the time of a stage against the json size
+        :param budgets: dict of stage or method name to a dict with TimeThreshold and/or MemoryThreshold for that stage
+        """
+        self.baseline = baseline
+        self.current = current
+        self.timeThreshold = timeThreshold
+        self.memoryThreshold = memoryThreshold
+        self.scalingLimit = scalingLimit
+        self.budgets = budgets or {}
+        self.findings = []
+        self.scalingCurves = []
+
+    def run(self):
+        """
+        Compare every stage of every size of the run with the baseline and fit the scaling curves of the run.
+        :return: True if no stage regressed, is new or is superlinear
+        """
+        for size, sizeResult in self.current["Sizes"].items():
+            baselineSize = self.baseline["Sizes"].get(size)
+            if baselineSize is None:
+                continue
+            if baselineSize["Parameters"] != sizeResult["Parameters"]:
+                print(
+                    f"Warning: the {size} tenant of the baseline has other parameters, the stages are not comparable"
+                )
+            baselineStages = {
+                (x["Stage"], x["Parent"]): x for x in baselineSize["Stages"]
+            }
+            currentStages = {(x["Stage"], x["Parent"]): x for x in sizeResult["Stages"]}
+            memoryMeasure = sizeResult.get("MemoryMeasure")
+            compareMemory = (
+                memoryMeasure is not None
+                and baselineSize.get("MemoryMeasure") == memoryMeasure
+            )
+            if not compareMemory:
+                print(
+                    f"Warning: the memory of the {size} stages is not compared, measured as "
+                    f"{baselineSize.get('MemoryMeasure')} in the baseline and {memoryMeasure} in the run"
+                )
+            for stageKey, stageResult in currentStages.items():
+                baselineStage = baselineStages.get(stageKey)
+                if baselineStage is None:
+                    self.addFinding(
+                        size,
+                        stageResult,
+                        "Time",
+                        None,
+                        stageResult["MedianSeconds"],
+                        "New",
+                    )
+                    continue
+                self.compareStage(size, baselineStage, stageResult, compareMemory)
+            for stageKey, baselineStage in baselineStages.items():
+                if stageKey not in currentStages:
+                    self.addFinding(
+                        size,
+                        baselineStage,
+                        "Time",
+                        baselineStage["MedianSeconds"],
+                        None,
+                        "Removed",
+                    )
+        self.fitScalingCurves()
+        return not any(x["Status"] in self.failingStatuses for x in self.findings)
+
+    def compareStage(self, size, baselineStage, stageResult, compareMemory=True):
+        """
+        Check the time and memory growth of one stage against its baseline.
+        :param size: tenant size
+        :param baselineStage: stage result of the baseline
+        :param stageResult: stage result of the run
+        :param compareMemory: False if the memory of the two runs was not measured the same way
+        :return: null
+        """
+        budget = self.budgets.get(stageResult["Stage"]) or self.budgets.get(
+            stageResult["Method"], {}
+        )
+        for check, column, threshold, minChange in (
+            (
+                "Time",
+                "MedianSeconds",
+                budget.get("TimeThreshold", self.timeThreshold),
+                self.minSeconds,
+            ),
+            (
+                "Memory",
+                "MemoryGrowthMB",
+                budget.get("MemoryThreshold", self.memoryThreshold),
+                self.minMemoryMB,
+            ),
+        ):
+            if check == "Memory" and not compareMemory:
+                continue
+            baselineValue = baselineStage.get(column)
+            currentValue = stageResult.get(column)
+            if baselineValue is None or currentValue is None:
+                continue
+            change = currentValue - baselineValue
+            if abs(change) <= minChange or abs(change) <= baselineValue * threshold:
+                continue
+            self.addFinding(
+                size,
+                stageResult,
+                check,
+                baselineValue,
+                currentValue,
+                "Regression" if change > 0 else "Improvement",
+            )
+
+    def fitScalingCurves(self):
+        """
+        Fit time ~ n^exponent for every stage over the sizes of the run, n being the json size in MB, and report
+        the stages growing faster than scalingLimit. The exponent of the baseline is kept for the report.
+        :return: null
+        """
+        baselineExponents = {
+            stageKey: self.getExponent(points)
+            for stageKey, points in self.getStageTimes(self.baseline).items()
+        }
+        sizes = sorted(self.current["Sizes"].items(), key=lambda x: x[1]["JsonMB"])
+        if len(sizes) < 2:
+            return
+        largestSize = sizes[-1][0]
+        for stageKey, points in self.getStageTimes(self.current).items():
+            exponent = self.getExponent(points)
+            baselineExponent = baselineExponents.get(stageKey)
+            curve = {
+                "Stage": stageKey[0],
+                "Parent": stageKey[1],
+                "Exponent": round(exponent, 2),
+                "BaselineExponent": (
+                    round(baselineExponent, 2) if baselineExponent is not None else None
+                ),
+                "Points": points,
+            }
+            self.scalingCurves.append(curve)
+            if exponent > self.scalingLimit:
+                stageResult = next(
+                    x
+                    for x in self.current["Sizes"][largestSize]["Stages"]
+                    if (x["Stage"], x["Parent"]) == stageKey
+                )
+                self.addFinding(
+                    largestSize,
+                    stageResult,
+                    "Scaling",
+                    self.scalingLimit,
+                    curve["Exponent"],
+                    "Superlinear",
+                )
+
+    def getStageTimes(self, results):
+        """
+        Get the (n, time) points of every stage of a stagebench result, ordered by n. Stages below minSeconds on the
+        largest size and times at the noise level are left out, they tell nothing about the growth.
+        :param results: stagebench results dict
+        :return: dict of (stage, parent) to the list of (json MB, median seconds) tuples, with at least two points
+        """
+        stageTimes = {}
+        for sizeResult in sorted(results["Sizes"].values(), key=lambda x: x["JsonMB"]):
+            for stageResult in sizeResult["Stages"]:
+                stageTimes.setdefault(
+                    (stageResult["Stage"], stageResult["Parent"]), []
+                ).append((sizeResult["JsonMB"], stageResult["MedianSeconds"]))
+        scalingPoints = {}
+        for stageKey, points in stageTimes.items():
+            points = [x for x in points if x[1] >= self.minSeconds / 10]
+            if len(points) >= 2 and points[-1][1] >= self.minSeconds:
+                scalingPoints[stageKey] = points
+        return scalingPoints
+
+    @staticmethod
+    def getExponent(points):
+        """
+        Least squares slope of log(time) against log(n).
+        :param points: list of (n, time) tuples
+        :return: exponent
+        """
+        logPoints = [(math.log(n), math.log(t)) for n, t in points]
+        meanX = sum(x for x, _ in logPoints) / len(logPoints)
+        meanY = sum(y for _, y in logPoints) / len(logPoints)
+        varianceX = sum((x - meanX) ** 2 for x, _ in logPoints)
+        if varianceX == 0:
+            return 0.0
+        return sum((x - meanX) * (y - meanY) for x, y in logPoints) / varianceX
+
+    def addFinding(self, size, stageResult, check, baselineValue, currentValue, status):
+        """
+        Add one finding of the gate.
+        :param size: tenant size
+        :param stageResult: stage result the finding is about
+        :param check: "Time", "Memory" or "Scaling"
+        :param baselineValue: baseline value, or the scaling limit
+        :param currentValue: value of the run, or the fitted exponent
+        :param status: "Regression", "Improvement", "New", "Removed" or "Superlinear"
+        :return: null
+        """
+        change = None
+        if check != "Scaling" and baselineValue and currentValue is not None:
+            change = f"{(currentValue - baselineValue) / baselineValue:+.0%}"
+        self.findings.append(
+            {
+                "Size": size,
+                "Stage": stageResult["Stage"],
+                "Parent": stageResult["Parent"],
+                "Method": stageResult.get("Method"),
+                "Check": check,
+                "Baseline": baselineValue,
+                "Current": currentValue,
+                "Change": change,
+                "Status": status,
+            }
+        )
+
+    def writeReport(self, reportPath):
+        """
+        Write the findings to a csv file.
+        :param reportPath: report file location
+        :return: null
+        """
+        with open(reportPath, "w", newline="", encoding="utf-8") as reportFile:
+            fileWriter = csv.DictWriter(reportFile, fieldnames=self.reportColumns)
+            fileWriter.writeheader()
+            fileWriter.writerows(self.findings)
+        print("Regression report written to " + reportPath)
+
+    def printReport(self):
+        """
+        Print the findings and the scaling curves.
+        :return: null
+        """
+        print(
+            f"Baseline {self.baseline['Label']}, run {self.current['Label']}: "
+            f"time threshold {self.timeThreshold:.0%}, memory threshold {self.memoryThreshold:.0%}"
+        )
+        for finding in self.findings:
+            stageName = finding["Stage"]
+            if finding["Parent"]:
+                stageName = f"{finding['Parent']}/{stageName}"
+            line = f"  {finding['Status']:<12}{finding['Size']:<12}{stageName:<56}{finding['Check']:<8}"
+            if finding["Check"] == "Scaling":
+                line += f"exponent {finding['Current']} > {finding['Baseline']}"
+            else:
+                line += f"{finding['Baseline']} -> {finding['Current']}"
+                if finding["Change"]:
+                    line += f" ({finding['Change']})"
+            print(line)
+        if not self.findings:
+            print("  No changes above the thresholds")
+        if self.scalingCurves:
+            print("Scaling (json MB: seconds)")
+            for curve in sorted(
+                self.scalingCurves, key=lambda x: x["Exponent"], reverse=True
+            ):
+                stageName = curve["Stage"]
+                if curve["Parent"]:
+                    stageName = f"{curve['Parent']}/{stageName}"
+                points = ", ".join(f"{n:g}: {t:.3f}" for n, t in curve["Points"])
+                baselineExponent = (
+                    f" (baseline n^{curve['BaselineExponent']})"
+                    if curve["BaselineExponent"] is not None
+                    else ""
+                )
+                print(
+                    f"  {stageName:<56}n^{curve['Exponent']:<6}{baselineExponent} {points}"
+                )
+
+
+def loadResults(resultsPath):
+    """
+    Read a stagebench results file.
+    :param resultsPath: json file location
+    :return: results dict
+    """
+    with open(resultsPath, "r", encoding="utf-8") as resultsFile:
+        return json.load(resultsFile)
+
+
+def main(argv):
+    """
+    Compare a stagebench run with a baseline and exit with 1 on regressions.
+    :param argv: arguments
+    :return: null
+    """
+    if len(argv) < 3:
+        print(__doc__)
+        sys.exit(2)
+    options = {}
+    for optionName, argName in (
+        ("timeThreshold", "--TIME_THRESHOLD"),
+        ("memoryThreshold", "--MEMORY_THRESHOLD"),
+        ("scalingLimit", "--SCALING_LIMIT"),
+    ):
+        if argName in argv:
+            options[optionName] = float(argv[argv.index(argName) + 1])
+    if "--BUDGETS" in argv:
+        options["budgets"] = loadResults(argv[argv.index("--BUDGETS") + 1])
+    regressionGate = RegressionGate(
+        loadResults(argv[1]), loadResults(argv[2]), **options
+    )
+    passed = regressionGate.run()
+    regressionGate.printReport()
+    if "--OUT" in argv:
+        regressionGate.writeReport(argv[argv.index("--OUT") + 1])
+    print("Regression gate " + ("passed" if passed else "failed"))
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
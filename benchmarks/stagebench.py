@@ -0,0 +1,294 @@
+"""
+Stage level benchmark of the extraction on synthetic tenants.
+
+python benchmarks/stagebench.py --OUT <results directory> [--SIZES <sizes>] [--REPEAT <n>] [--LABEL <name>]
+    [--SEED <n>] [--XLSX] [--COLUMNAR] [--BASELINE <baseline json>]
+
+<sizes> is a comma separated list of tenantgenerator sizes (default small,medium). The tenant of every size is
+generated once into <results directory>/tenants and extracted REPEAT times (default 3) with every extraction stage
+and the csv export (and the xlsx export with --XLSX, the parquet export with --COLUMNAR), each run in a new process.
+The time, SQL statements, inserted rows and peak memory of every stage are written to <label>.json and <label>.csv in
+the results directory, so runs of two versions with the same sizes and seed can be compared stage by stage. With --BASELINE, the run is checked
+against the results of an earlier run by regressiongate.py and the exit code is 1 on regressions.
+"""
+
+import csv
+import io
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from datetime import datetime
+from zipfile import ZipFile
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+from batchextractor import setTenantLogging  # noqa: E402
+from regressiongate import RegressionGate, loadResults  # noqa: E402
+from commondatafuncs import CommonDataFunction  # noqa: E402
+from instrumentation import StageRecorder  # noqa: E402
+from stageplanner import stagesByName  # noqa: E402
+from tenantextraction import TenantExtraction  # noqa: E402
+from tenantgenerator import TenantGenerator, getParameters  # noqa: E402
+
+extractionOptions = {
+    "model": True,
+    "ui": True,
+    "dependencies": True,
+    "csv": True,
+    "xlsx": False,
+    "columnar": False,
+    "measureUsage": True,
+    "archive": "",
+    "outputs": [],
+    "warehouse": "",
+    "snapshot": "",
+    "profile": False,
+}
+
+# Extractor and method of the recorded stages which are not in the stage plan.
+extraStages = {
+    "jsonLoad": ("json", "readJsonFile"),
+    "cleanDependencies": ("dependencies", "cleanDependenciesTable"),
+    "excelExport": ("files", "createExcelFromDB"),
+    "columnarExport": ("columnar", "exportTables"),
+}
+
+resultColumns = [
+    "Label",
+    "Size",
+    "Stage",
+    "Parent",
+    "Extractor",
+    "Method",
+    "Runs",
+    "BestSeconds",
+    "MedianSeconds",
+    "CPUSeconds",
+    "SQLStatements",
+    "RowsInserted",
+    "PeakMemoryMB",
+    "MemoryGrowthMB",
+]
+
+
+def getStageMethod(stageName, parentName):
+    """
+    Get the extractor and method running a recorded stage.
+    :param stageName: stage name
+    :param parentName: name of the stage running the stage as a step, None for a stage of the plan
+    :return: tuple of the extractor and method names
+    """
+    if parentName is not None:
+        return stagesByName[parentName].extractor, stageName
+    if stageName in stagesByName:
+        return stagesByName[stageName].extractor, stagesByName[stageName].method
+    return extraStages.get(stageName, (None, None))
+
+
+def runExtraction(task):
+    """
+    Extract a tenant zip into a temporary directory, in a worker process.
+    :param task: tuple of zip file location, extraction options and log file location
+    :return: run report of the StageRecorder
+    """
+    zipFile, options, logFileName = task
+    setTenantLogging(logFileName)
+    recorder = StageRecorder(countStatements=True)
+    with tempfile.TemporaryDirectory() as destDir, redirect_stdout(io.StringIO()):
+        commonObj = CommonDataFunction()
+        with recorder.stage("jsonLoad"):
+            commonObj.readJsonFile(zipFile, destDir)
+        TenantExtraction(options, recorder=recorder).extract(
+            commonObj.destPath,
+            commonObj.jsonData,
+            commonObj.destDir,
+            commonObj.uiDestDir,
+            commonObj.tenantIndex,
+        )
+    return recorder.getReport()
+
+
+def summarizeRuns(runReports):
+    """
+    Summarize the stage records of the runs of one tenant.
+    :param runReports: run reports of the runs
+    :return: list of stage result dicts, in execution order
+    """
+    stageRuns = {}
+    for runReport in runReports:
+        for stageRecord in runReport["Stages"]:
+            stageRuns.setdefault(
+                (stageRecord["Stage"], stageRecord["Parent"]), []
+            ).append(stageRecord)
+    stageResults = []
+    for (stageName, parentName), stageRecords in stageRuns.items():
+        extractorName, methodName = getStageMethod(stageName, parentName)
+        seconds = [x["Seconds"] for x in stageRecords]
+        peakMemory = [x["PeakMemoryMB"] for x in stageRecords if x["PeakMemoryMB"]]
+        memoryGrowth = [
+            x["MemoryGrowthMB"]
+            for x in stageRecords
+            if x.get("MemoryGrowthMB") is not None
+        ]
+        stageResults.append(
+            {
+                "Stage": stageName,
+                "Parent": parentName,
+                "Extractor": extractorName,
+                "Method": methodName,
+                "Runs": len(stageRecords),
+                "BestSeconds": min(seconds),
+                "MedianSeconds": round(statistics.median(seconds), 4),
+                "CPUSeconds": round(
+                    statistics.median(x["CPUSeconds"] for x in stageRecords), 4
+                ),
+                "SQLStatements": stageRecords[-1]["SQLStatements"],
+                "RowsInserted": sum(stageRecords[-1]["RowsInserted"].values()),
+                "PeakMemoryMB": max(peakMemory) if peakMemory else None,
+                "MemoryGrowthMB": (
+                    round(statistics.median(memoryGrowth)) if memoryGrowth else None
+                ),
+            }
+        )
+    return stageResults
+
+
+def getTenantZip(tenantDir, size, seed):
+    """
+    Get the synthetic tenant zip of a size, generated if it does not exist yet.
+    :param tenantDir: directory of the generated tenants
+    :param size: tenantgenerator size
+    :param seed: generator seed
+    :return: zip file location
+    """
+    zipFile = os.path.join(tenantDir, f"{size}_seed{seed}.zip")
+    if not os.path.exists(zipFile):
+        print(f"Generating {size} tenant")
+        os.makedirs(tenantDir, exist_ok=True)
+        TenantGenerator(
+            getParameters(size), tenantName="Synthetic_" + size, seed=seed
+        ).writeZip(zipFile)
+    return zipFile
+
+
+def writeResults(results, outDir):
+    """
+    Write the results as json and as one csv row per size and stage.
+    :param results: results dict
+    :param outDir: results directory
+    :return: tuple of the json and csv file locations
+    """
+    jsonFileName = os.path.join(outDir, results["Label"] + ".json")
+    with open(jsonFileName, "w", encoding="utf-8") as jsonFile:
+        json.dump(results, jsonFile, indent=4)
+    csvFileName = os.path.join(outDir, results["Label"] + ".csv")
+    with open(csvFileName, "w", newline="", encoding="utf-8") as csvFile:
+        writer = csv.DictWriter(csvFile, fieldnames=resultColumns)
+        writer.writeheader()
+        for size, sizeResult in results["Sizes"].items():
+            for stageResult in sizeResult["Stages"]:
+                writer.writerow(dict(stageResult, Label=results["Label"], Size=size))
+    return jsonFileName, csvFileName
+
+
+def main(argv):
+    """
+    Benchmark the extraction stages on synthetic tenants of the given sizes.
+    :param argv: arguments
+    :return: null
+    """
+    if "--OUT" not in argv:
+        print(__doc__)
+        sys.exit(1)
+    outDir = argv[argv.index("--OUT") + 1]
+    sizes = (
+        argv[argv.index("--SIZES") + 1].split(",")
+        if "--SIZES" in argv
+        else ["small", "medium"]
+    )
+    repeat = int(argv[argv.index("--REPEAT") + 1]) if "--REPEAT" in argv else 3
+    seed = int(argv[argv.index("--SEED") + 1]) if "--SEED" in argv else 0
+    label = (
+        argv[argv.index("--LABEL") + 1]
+        if "--LABEL" in argv
+        else datetime.now().strftime("stagebench_%Y%m%d_%H%M%S")
+    )
+    options = dict(
+        extractionOptions, xlsx="--XLSX" in argv, columnar="--COLUMNAR" in argv
+    )
+    os.makedirs(outDir, exist_ok=True)
+
+    results = {
+        "Label": label,
+        "StartedAt": datetime.now().isoformat(timespec="seconds"),
+        "Python": platform.python_version(),
+        "Platform": platform.platform(),
+        "Seed": seed,
+        "Repeat": repeat,
+        "Options": options,
+        "Sizes": {},
+    }
+    for size in sizes:
+        zipFile = getTenantZip(os.path.join(outDir, "tenants"), size, seed)
+        logFileName = os.path.join(outDir, f"{label}_{size}.log")
+        with ZipFile(zipFile) as inputZip:
+            jsonMB = inputZip.getinfo("_legacy.json").file_size / 1024 / 1024
+        runReports = []
+        for run in range(repeat):
+            # A new spawned process per run, so the peak memory of a run does not include the earlier runs or the
+            # tenant generation.
+            with multiprocessing.get_context("spawn").Pool(1) as pool:
+                runReports.append(
+                    pool.apply(runExtraction, ((zipFile, options, logFileName),))
+                )
+            print(f"{size} run {run + 1}: {runReports[-1]['Seconds']:.2f}s")
+        results["Sizes"][size] = {
+            "Parameters": getParameters(size),
+            "JsonMB": round(jsonMB, 2),
+            "Seconds": [x["Seconds"] for x in runReports],
+            "PeakMemoryMB": max((x["PeakMemoryMB"] or 0) for x in runReports),
+            "MemoryMeasure": runReports[-1].get("MemoryMeasure"),
+            "Stages": summarizeRuns(runReports),
+        }
+
+    for size, sizeResult in results["Sizes"].items():
+        print(
+            f"\n{size}: {sizeResult['JsonMB']} MB json, median "
+            f"{statistics.median(sizeResult['Seconds']):.2f}s, peak {sizeResult['PeakMemoryMB']} MB"
+        )
+        print(
+            f"{'stage':<42}{'best s':>10}{'median s':>10}{'statements':>12}{'rows':>10}"
+        )
+        for stageResult in sizeResult["Stages"]:
+            stageName = (
+                "  " + stageResult["Stage"]
+                if stageResult["Parent"]
+                else stageResult["Stage"]
+            )
+            print(
+                f"{stageName:<42}{stageResult['BestSeconds']:>10.3f}{stageResult['MedianSeconds']:>10.3f}"
+                f"{stageResult['SQLStatements']:>12}{stageResult['RowsInserted']:>10}"
+            )
+    jsonFileName, csvFileName = writeResults(results, outDir)
+    print(f"\nResults written to {jsonFileName} and {csvFileName}")
+    if "--BASELINE" in argv:
+        regressionGate = RegressionGate(
+            loadResults(argv[argv.index("--BASELINE") + 1]), results
+        )
+        passed = regressionGate.run()
+        print()
+        regressionGate.printReport()
+        regressionGate.writeReport(os.path.join(outDir, label + "_regressions.csv"))
+        if not passed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,1483 @@
+"""
+Generator of synthetic tenant zips, to reproduce the extraction performance without a real tenant.
+
+python benchmarks/tenantgenerator.py <output zip> [--SIZE <size>] [--SEED <n>] [--<parameter> <n> ...]
+
+<size> is one of small, medium, large or verylarge (default small). Any parameter of the size can be overridden,
+e.g. --measuresPerMeasureGroup 50 --widgets 2000. Run without arguments to list the sizes and their parameters.
+"""
+
+import json
+import random
+import sys
+import zipfile
+
+# Counts of the generated entities. Counts named ...PerX are per parent entity, the others are per tenant.
+sizePresets = {
+    "small": {
+        "dimensions": 6,
+        "attributesPerDimension": 4,
+        "propertiesPerAttribute": 1,
+        "pickLists": 3,
+        "relationshipTypes": 2,
+        "plans": 2,
+        "measureGroupsPerPlan": 3,
+        "measuresPerMeasureGroup": 10,
+        "activeRuleFiles": 2,
+        "scopesPerRuleFile": 3,
+        "rulesPerScope": 3,
+        "namedSetFiles": 1,
+        "namedSetsPerFile": 5,
+        "procedureFiles": 1,
+        "proceduresPerFile": 5,
+        "statementsPerProcedure": 4,
+        "pluginsPerClass": 1,
+        "pluginsPerRuleFile": 1,
+        "tenantPlugins": 2,
+        "widgets": 40,
+        "measuresPerWidget": 5,
+        "workspaces": 2,
+        "pagesPerWorkspace": 3,
+        "viewsPerPage": 2,
+        "widgetsPerView": 3,
+        "languages": 2,
+        "actionButtons": 5,
+        "excelFolders": 1,
+        "workbooksPerFolder": 2,
+        "widgetsPerWorkbook": 3,
+        "users": 5,
+    },
+    "medium": {
+        "dimensions": 20,
+        "attributesPerDimension": 8,
+        "propertiesPerAttribute": 2,
+        "pickLists": 10,
+        "relationshipTypes": 5,
+        "plans": 5,
+        "measureGroupsPerPlan": 8,
+        "measuresPerMeasureGroup": 25,
+        "activeRuleFiles": 10,
+        "scopesPerRuleFile": 8,
+        "rulesPerScope": 5,
+        "namedSetFiles": 3,
+        "namedSetsPerFile": 20,
+        "procedureFiles": 5,
+        "proceduresPerFile": 20,
+        "statementsPerProcedure": 10,
+        "pluginsPerClass": 5,
+        "pluginsPerRuleFile": 2,
+        "tenantPlugins": 10,
+        "widgets": 500,
+        "measuresPerWidget": 10,
+        "workspaces": 8,
+        "pagesPerWorkspace": 6,
+        "viewsPerPage": 3,
+        "widgetsPerView": 4,
+        "languages": 3,
+        "actionButtons": 50,
+        "excelFolders": 5,
+        "workbooksPerFolder": 5,
+        "widgetsPerWorkbook": 5,
+        "users": 50,
+    },
+    "large": {
+        "dimensions": 40,
+        "attributesPerDimension": 12,
+        "propertiesPerAttribute": 3,
+        "pickLists": 30,
+        "relationshipTypes": 15,
+        "plans": 10,
+        "measureGroupsPerPlan": 15,
+        "measuresPerMeasureGroup": 30,
+        "activeRuleFiles": 30,
+        "scopesPerRuleFile": 15,
+        "rulesPerScope": 8,
+        "namedSetFiles": 5,
+        "namedSetsPerFile": 60,
+        "procedureFiles": 15,
+        "proceduresPerFile": 40,
+        "statementsPerProcedure": 20,
+        "pluginsPerClass": 15,
+        "pluginsPerRuleFile": 3,
+        "tenantPlugins": 30,
+        "widgets": 2500,
+        "measuresPerWidget": 15,
+        "workspaces": 20,
+        "pagesPerWorkspace": 10,
+        "viewsPerPage": 4,
+        "widgetsPerView": 5,
+        "languages": 5,
+        "actionButtons": 200,
+        "excelFolders": 15,
+        "workbooksPerFolder": 8,
+        "widgetsPerWorkbook": 8,
+        "users": 200,
+    },
+    "verylarge": {
+        "dimensions": 80,
+        "attributesPerDimension": 15,
+        "propertiesPerAttribute": 4,
+        "pickLists": 80,
+        "relationshipTypes": 40,
+        "plans": 20,
+        "measureGroupsPerPlan": 25,
+        "measuresPerMeasureGroup": 30,
+        "activeRuleFiles": 80,
+        "scopesPerRuleFile": 20,
+        "rulesPerScope": 10,
+        "namedSetFiles": 10,
+        "namedSetsPerFile": 100,
+        "procedureFiles": 40,
+        "proceduresPerFile": 50,
+        "statementsPerProcedure": 30,
+        "pluginsPerClass": 40,
+        "pluginsPerRuleFile": 4,
+        "tenantPlugins": 80,
+        "widgets": 10000,
+        "measuresPerWidget": 20,
+        "workspaces": 50,
+        "pagesPerWorkspace": 12,
+        "viewsPerPage": 5,
+        "widgetsPerView": 6,
+        "languages": 8,
+        "actionButtons": 800,
+        "excelFolders": 40,
+        "workbooksPerFolder": 10,
+        "widgetsPerWorkbook": 10,
+        "users": 1000,
+    },
+}
+
+# Global plugin classes, by the ConfigJson layout RuleExtractor.createPlugins reads.
+nonRPluginClasses = (
+    "BosToInventory",
+    "InventoryToBos",
+    "EndingOnHandPlan",
+    "PeriodToDatePlan",
+    "SupplyChainSolver",
+)
+pluginClasses = nonRPluginClasses + (
+    "RScriptGeneralized",
+    "RScriptTimeSeries",
+    "PythonScript",
+    "PySparkScript",
+)
+languages = (
+    (1031, "German"),
+    (1036, "French"),
+    (1041, "Japanese"),
+    (1034, "Spanish"),
+    (1046, "Portuguese"),
+    (2052, "Chinese"),
+    (1040, "Italian"),
+    (1043, "Dutch"),
+)
+scopeTypes = ("Regular", "Cartesian", "Spreading", "Block", "Recurrence", "Graph")
+
+
+class TenantGenerator:
+    def __init__(self, parameters, tenantName="Synthetic", seed=0):
+        """
+        TenantGenerator Constructor. Builds a tenant json with the same layout as an exported _legacy.json, with
+        formulas, rules, procedures, plugins and widgets referencing the generated measures, attributes, named sets,
+        procedures and plugins, so that every extraction and dependency stage has work to do.
+        :param parameters: entity counts, see sizePresets
+        :param tenantName: tenant name
+        :param seed: seed of the random choices, the same parameters and seed give the same tenant
+        """
+        self.parameters = parameters
+        self.tenantName = tenantName
+        self.random = random.Random(seed)
+        self.nextId = 0
+        self.attributes = []
+        self.measureNames = []
+        self.pickListIds = []
+        self.namedSetNames = []
+        self.procedureNames = []
+        self.pluginNames = []
+        self.tenantPluginNames = []
+        self.widgetIds = []
+        self.viewIds = []
+        self.actionButtonNames = []
+        self.relationshipTypeNames = []
+        self.edgePropertyNames = []
+
+    def newId(self):
+        """
+        Get a new entity id, unique in the tenant.
+        :return: id
+        """
+        self.nextId += 1
+        return self.nextId
+
+    def pick(self, values, count=1):
+        """
+        Pick distinct random values.
+        :param values: list of values
+        :param count: number of values
+        :return: list of values
+        """
+        return self.random.sample(values, min(count, len(values)))
+
+    def measureRef(self, measureName=None):
+        """
+        IBPL reference of a measure.
+        :param measureName: measure name, a random measure if not given
+        :return: reference text
+        """
+        return (
+            "Measure.[" + (measureName or self.random.choice(self.measureNames)) + "]"
+        )
+
+    def attributeRef(self):
+        """
+        IBPL reference of a random attribute.
+        :return: reference text
+        """
+        dimensionName, attributeName, _ = self.random.choice(self.attributes)
+        return f"[{dimensionName}].[{attributeName}]"
+
+    def memberScopes(self, count=3):
+        """
+        AttributeMemberScopes of a scope.
+        :param count: number of attributes
+        :return: list of member scopes
+        """
+        return [
+            {"DimensionName": dimensionName, "LevelAttributeName": attributeName}
+            for dimensionName, attributeName, _ in self.pick(self.attributes, count)
+        ]
+
+    def translations(self, nameKey, descriptionKey, name, description):
+        """
+        Translations of an entity in every generated language.
+        :param nameKey: key of the translated name
+        :param descriptionKey: key of the translated description
+        :param name: name
+        :param description: description
+        :return: list of translations
+        """
+        return [
+            {
+                nameKey: f"{name} ({language})",
+                descriptionKey: f"{description} ({language})",
+                "LCID": lcid,
+                "Language": language,
+            }
+            for lcid, language in languages[: self.parameters["languages"]]
+        ]
+
+    def generate(self):
+        """
+        Generate the tenant.
+        :return: tenant json data
+        """
+        data = {"Tenant": {"Name": self.tenantName}}
+        data["PickLists"] = self.createPickLists()
+        data["Dimensions"] = self.createDimensions()
+        data["MemberRelationshipTypes"] = self.createRelationshipTypes()
+        data["MemberRelNodeProperties"] = self.createRelNodeProperties()
+        data["Plans"] = self.createPlans()
+        data["Users"] = {
+            str(x): f"user{x}@example.com"
+            for x in range(1, self.parameters["users"] + 1)
+        }
+        data["TenantPlugIns"] = self.createTenantPlugins()
+        data["GlobalPlugIns"] = self.createGlobalPlugins()
+        (
+            data["RuleGroupLabels"],
+            data["RuleGroupScopeLabels"],
+            data["RuleGroups"],
+        ) = self.createRules()
+        data["IbplRules"] = self.createDataSecurityRules()
+        data["Layout"] = {"ActionButtons": self.createActionButtons()}
+        data["Layout"]["WidgetModels"], data["Layout"]["WidgetDefinitions"] = (
+            self.createWidgets()
+        )
+        data["Layout"]["Workspaces"] = self.createWorkspaces()
+        data["Layout"]["Views"] = []
+        data["Translations"] = self.createLayoutTranslations(data["Layout"])
+        (
+            data["XLFolders"],
+            data["XLWorkbooks"],
+            data["XLWorkbookInFolders"],
+            data["XLWidgetInWorkbooks"],
+        ) = self.createExcelLayout()
+        return data
+
+    def createPickLists(self):
+        """
+        Generate the pick lists.
+        :return: list of pick lists
+        """
+        pickLists = []
+        for p in range(self.parameters["pickLists"]):
+            pickListId = self.newId()
+            self.pickListIds.append(pickListId)
+            pickLists.append(
+                {
+                    "Id": pickListId,
+                    "PickListName": f"Pick List {p:03d}",
+                    "PickListDescription": f"Pick list {p}",
+                    "DataType": "string",
+                    "IsMultiSelectAllowed": p % 2 == 0,
+                    "PickListValues": [
+                        {
+                            "Value": f"V{v}",
+                            "DisplayName": f"Value {v}",
+                            "DisplayPosition": v,
+                        }
+                        for v in range(5)
+                    ],
+                }
+            )
+        return pickLists
+
+    def createDimensions(self):
+        """
+        Generate the dimensions with their attributes, properties and hierarchies.
+        :return: list of dimensions
+        """
+        dimensions = []
+        for d in range(self.parameters["dimensions"]):
+            dimensionName = "Version" if d == 0 else f"Dimension {d:03d}"
+            attributes = []
+            for a in range(self.parameters["attributesPerDimension"]):
+                attributeName = (
+                    "Version Name"
+                    if d == 0 and a == 0
+                    else f"Attribute {d:03d}-{a:02d}"
+                )
+                attributeId = self.newId()
+                self.attributes.append((dimensionName, attributeName, attributeId))
+                description = f"{attributeName} of {dimensionName}"
+                attributes.append(
+                    {
+                        "Id": attributeId,
+                        "AttributeName": attributeName,
+                        "Description": description,
+                        "KeyColumnDataType": "string",
+                        "IsKey": a == 0,
+                        "SeedTags": None,
+                        "DimensionAttributeTranslations": self.translations(
+                            "AttributeName", "Description", attributeName, description
+                        ),
+                        "DimensionAttributeAliases": (
+                            [
+                                {
+                                    "AliasName": attributeName + " Alias",
+                                    "AliasDescription": "",
+                                }
+                            ]
+                            if a % 3 == 0
+                            else []
+                        ),
+                        "Properties": [
+                            {
+                                "AttributeName": attributeName,
+                                "PropertyName": f"{attributeName} Property {p}",
+                                "Description": f"Property {p} of {attributeName}",
+                                "KeyColumnDataType": "string",
+                                "DimensionAttributeTranslations": self.translations(
+                                    "AttributeName",
+                                    "Description",
+                                    f"{attributeName} Property {p}",
+                                    "",
+                                ),
+                            }
+                            for p in range(self.parameters["propertiesPerAttribute"])
+                        ],
+                    }
+                )
+            dimensions.append(
+                {
+                    "DimensionName": dimensionName,
+                    "DimensionDescription": f"{dimensionName} description",
+                    "DimensionType": "Regular",
+                    "DimensionAliases": (
+                        [
+                            {
+                                "AliasName": dimensionName + " Alias",
+                                "AliasDescription": "",
+                            }
+                        ]
+                        if d % 4 == 1
+                        else []
+                    ),
+                    "DimensionAttributes": attributes,
+                    "Hierarchies": [
+                        {
+                            "HierarchyName": f"{dimensionName} Hierarchy",
+                            "HierarchyDescription": "",
+                            "Levels": [
+                                {
+                                    "LevelPosition": position,
+                                    "LevelName": x["AttributeName"],
+                                    "LevelDescription": x["Description"],
+                                }
+                                for position, x in enumerate(attributes)
+                            ],
+                        }
+                    ],
+                }
+            )
+        return dimensions
+
+    def createRelationshipTypes(self):
+        """
+        Generate the graph relationship types with their edge properties.
+        :return: list of relationship types
+        """
+        relationshipTypes = []
+        for r in range(self.parameters["relationshipTypes"]):
+            relationshipTypeName = f"Relationship {r:03d}"
+            self.relationshipTypeNames.append(relationshipTypeName)
+            properties = []
+            for p in range(3):
+                propertyName = f"Edge Property {r:03d}-{p}"
+                self.edgePropertyNames.append(propertyName)
+                properties.append(
+                    {
+                        "PropertyName": propertyName,
+                        "PropertyDescription": "",
+                        "PropertyDataType": "double",
+                        "AggregateFunction": "Sum",
+                        "IsEditable": True,
+                        "FormatString": "#,##0",
+                        "MemberRelationPropertyTranslations": self.translations(
+                            "PropertyName", "PropertyDescription", propertyName, ""
+                        ),
+                    }
+                )
+            nodes = []
+            for isTailNode, (dimensionName, attributeName, attributeId) in zip(
+                (False, True), self.pick(self.attributes, 2)
+            ):
+                nodes.append(
+                    {
+                        "IsTailNode": isTailNode,
+                        "DimensionAttributeId": attributeId,
+                        "DimensionName": dimensionName,
+                        "AttributeName": attributeName,
+                        "MemberRelNodeTranslations": self.translations(
+                            "AttributeName", "Description", attributeName, ""
+                        ),
+                    }
+                )
+            relationshipTypes.append(
+                {
+                    "RelationshipTypeName": relationshipTypeName,
+                    "RelationshipTypeDescription": "",
+                    "MemberRelationshipNodeAttributeElements": nodes,
+                    "MemberRelationshipProperties": properties,
+                }
+            )
+        return relationshipTypes
+
+    def createRelNodeProperties(self):
+        """
+        Generate the node properties of the graph relationships.
+        :return: list of node properties
+        """
+        return [
+            {
+                "Id": self.newId(),
+                "MemberRelNodePropertyAttributes": [
+                    x[2] for x in self.pick(self.attributes, 2)
+                ],
+                "PropertyName": f"Node Property {n:03d}",
+                "PropertyDescription": "",
+                "PropertyDataType": "double",
+                "PropertyDataSize": 8,
+                "PropertyFormula": None,
+            }
+            for n in range(self.parameters["relationshipTypes"])
+        ]
+
+    def createPlans(self):
+        """
+        Generate the plans, measure groups and measures. Measures are named first, so formulas can reference any
+        measure of the tenant.
+        :return: list of plans
+        """
+        measureCount = (
+            self.parameters["plans"]
+            * self.parameters["measureGroupsPerPlan"]
+            * self.parameters["measuresPerMeasureGroup"]
+        )
+        self.measureNames = [f"Measure {m:06d}" for m in range(measureCount)]
+        measureNames = iter(self.measureNames)
+        plans = []
+        for p in range(self.parameters["plans"]):
+            measureGroups = []
+            for g in range(self.parameters["measureGroupsPerPlan"]):
+                measureGroupName = f"Measure Group {p:02d}-{g:03d}"
+                grain = self.pick(self.attributes, 4)
+                measures = [
+                    self.createMeasure(next(measureNames), m, grain)
+                    for m in range(self.parameters["measuresPerMeasureGroup"])
+                ]
+                measureGroups.append(
+                    {
+                        "MeasureGroupName": measureGroupName,
+                        "MeasureGroupDescription": f"{measureGroupName} description",
+                        "DimensionUsages": [
+                            {
+                                "DimensionName": dimensionName,
+                                "AttributeName": attributeName,
+                                "SortOrder": position,
+                            }
+                            for position, (
+                                dimensionName,
+                                attributeName,
+                                _,
+                            ) in enumerate(grain)
+                        ],
+                        "MeasureGroupTranslations": [
+                            {
+                                "MeasureGroupName": f"{measureGroupName} ({language})",
+                                "MeasureGroupDescription": "",
+                                "Language": language,
+                            }
+                            for _, language in languages[: self.parameters["languages"]]
+                        ],
+                        "MeasureGroupExternalConfigs": (
+                            [
+                                {
+                                    "NeedsRedeployment": False,
+                                    "DeploymentStatus": "Deployed",
+                                    "MaintainLocalCache": True,
+                                    "DeploymentStatusMessage": "",
+                                    "ExternalConfigJson": json.dumps(
+                                        {"Source": "Lake", "Table": measureGroupName}
+                                    ),
+                                    "DataSourceType": "Lake",
+                                }
+                            ]
+                            if g % 5 == 0
+                            else []
+                        ),
+                        "MeasureGroupAssociationGraphAttributes": (
+                            [
+                                {"DimensionAttributeId": x[2], "IsTailNode": i == 1}
+                                for i, x in enumerate(grain[:2])
+                            ]
+                            if g % 4 == 3
+                            else []
+                        ),
+                        "Measures": measures,
+                    }
+                )
+            plans.append(
+                {
+                    "PlanName": f"Plan {p:02d}",
+                    "PlanDescription": f"Plan {p} description",
+                    "MeasureGroups": measureGroups,
+                }
+            )
+        return plans
+
+    def createMeasure(self, measureName, position, grain):
+        """
+        Generate one measure. Every third measure is computed from other measures.
+        :param measureName: measure name
+        :param position: position of the measure in its measure group
+        :param grain: attributes of the measure group
+        :return: measure
+        """
+        isComputed = position % 3 == 2
+        description = f"{measureName} description"
+        if position % 4 == 0:
+            description += " Tags[Benchmark, Synthetic]"
+        return {
+            "MeasureName": measureName,
+            "MeasureDescription": description,
+            "AggregateFunction": "Computed" if isComputed else "Sum",
+            "DataType": "double",
+            "FormatString": "#,##0.00",
+            "IsEditable": not isComputed,
+            "MeasureType": "Regular",
+            "AssociationMeasure": None,
+            "BgColorFormula": (
+                f'if ({self.measureRef()} > 0) then "#00FF00" else "#FF0000"'
+                if position % 7 == 0
+                else None
+            ),
+            "FgColorFormula": None,
+            "TrendFormula": None,
+            "FormattingViewModel": None,
+            "PickListId": (
+                self.random.choice(self.pickListIds)
+                if self.pickListIds and position % 10 == 5
+                else None
+            ),
+            "MeasureFormula": (
+                " + ".join(self.measureRef() for _ in range(3)) if isComputed else ""
+            ),
+            "MeasureColumnName": measureName.replace(" ", ""),
+            "IsReportingMeasure": False,
+            "ToolTip": "",
+            "MeasureSpreads": (
+                [
+                    {
+                        "BasisMeasureName": self.random.choice(self.measureNames),
+                        "BasisMeasureType": "Measure",
+                        "SpreadingType": "Proportional",
+                    }
+                ]
+                if not isComputed
+                else []
+            ),
+            "MeasureTranslations": [
+                dict(x, ToolTip="")
+                for x in self.translations(
+                    "MeasureName", "MeasureDescription", measureName, description
+                )
+            ],
+            "MeasureTwins": (
+                [
+                    {
+                        "PrimaryMeasureName": measureName,
+                        "TwinMeasureName": self.random.choice(self.measureNames),
+                        "TwinToPrimaryFormula": self.measureRef(),
+                        "ExternalChangeUpdatesPrimary": True,
+                    }
+                ]
+                if position % 10 == 1
+                else []
+            ),
+            "MeasureAggregates": [
+                {"AggregateFunction": "Sum", "Order": order, "DimensionName": x[0]}
+                for order, x in enumerate(grain[:2])
+            ],
+            "MeasureProperties": [],
+            "MeasureStaticProperties": [
+                {"PropertyName": "Unit", "PropertyValue": "Units"},
+                {"PropertyName": "IsInputOutputInterface", "PropertyValue": "true"},
+            ],
+        }
+
+    def createTenantPlugins(self):
+        """
+        Generate the javascript and powershell plugins of the tenant.
+        :return: list of tenant plugins
+        """
+        tenantPlugins = []
+        for t in range(self.parameters["tenantPlugins"]):
+            moduleName = f"TenantPlugin{t:03d}"
+            self.tenantPluginNames.append(moduleName)
+            tenantPlugins.append(
+                {
+                    "Language": "Javascript" if t % 2 == 0 else "Powershell",
+                    "ModuleName": moduleName,
+                    "Description": f"{moduleName} description",
+                    "Code": "\n".join(
+                        f'var m{i} = "{self.measureRef()}";' for i in range(5)
+                    ),
+                }
+            )
+        return tenantPlugins
+
+    def createGlobalPlugins(self):
+        """
+        Generate the configured global plugins, pluginsPerClass of every class.
+        :return: list of global plugin modules
+        """
+        configuredPlugins = []
+        for pluginClass in pluginClasses:
+            for p in range(self.parameters["pluginsPerClass"]):
+                instanceName = f"{pluginClass}{p:03d}"
+                self.pluginNames.append(instanceName)
+                configuredPlugins.append(
+                    {
+                        "ClassName": "o9.GraphCube.Plugins." + pluginClass,
+                        "InstanceName": instanceName,
+                        "ConfigJson": self.createPluginConfig(pluginClass),
+                    }
+                )
+        return [
+            {
+                "ModuleName": "o9.GraphCube.Plugins",
+                "ConfiguredGlobalPlugins": configuredPlugins,
+            }
+        ]
+
+    def createPluginConfig(self, pluginClass):
+        """
+        Generate the ConfigJson of a global plugin.
+        :param pluginClass: plugin class name
+        :return: ConfigJson
+        """
+        sliceKeys = [
+            {
+                "DimensionName": x["DimensionName"],
+                "AttributeName": x["LevelAttributeName"],
+            }
+            for x in self.memberScopes(2)
+        ]
+        if pluginClass in nonRPluginClasses:
+            return {
+                "InputMeasure": self.random.choice(self.measureNames),
+                "OutputMeasure": self.random.choice(self.measureNames),
+                "Grain": sliceKeys,
+            }
+        scriptLines = [
+            f"# reads {self.measureRef()} and writes {self.measureRef()}"
+            for _ in range(20)
+        ]
+        if pluginClass == "RScriptGeneralized":
+            return {
+                "ScriptParams": [{"VariableName": "Periods", "Value": "12"}],
+                "Exceptions": {"measure": self.random.choice(self.measureNames)},
+                "InputMeasures": [
+                    {
+                        "VariableName": "Input",
+                        "Measures": [
+                            {"MeasureName": x} for x in self.pick(self.measureNames, 5)
+                        ],
+                    }
+                ],
+                "InputQueries": [
+                    {
+                        "VariableName": "Query",
+                        "Query": f"Select ({self.attributeRef()} * {{{self.measureRef()}}});",
+                    }
+                ],
+                "OutputMeasures": [
+                    {
+                        "VariableName": "Output",
+                        "Measures": [
+                            {"MeasureName": x} for x in self.pick(self.measureNames, 3)
+                        ],
+                    },
+                    {
+                        "VariableName": "Edges",
+                        "EdgeProperties": [
+                            {"EdgePropertyName": x}
+                            for x in self.pick(self.edgePropertyNames, 2)
+                        ],
+                    },
+                ],
+                "SliceKeys": sliceKeys,
+                "ScriptCode": "\n".join(scriptLines),
+            }
+        if pluginClass == "RScriptTimeSeries":
+            return {
+                "ScriptParams": [{"Algorithm": "ARIMA", "Periods": "12"}],
+                "Exceptions": {"measure": self.random.choice(self.measureNames)},
+                "InputMeasures": [
+                    {"measure": x, "variable": "Actual", "is_primary": i == 0}
+                    for i, x in enumerate(self.pick(self.measureNames, 3))
+                ],
+                "OutputMeasures": [
+                    {"measure": x, "variable": "Forecast", "is_historical": False}
+                    for x in self.pick(self.measureNames, 2)
+                ],
+                "ScriptCode": "\n".join(scriptLines),
+                "TimeseriesParams": {"Frequency": "Weekly", "Horizon": "52"},
+            }
+        outputMeasures = "\n".join(f"# {self.measureRef()}" for _ in range(3))
+        config = {
+            "ScriptParams": [{"VariableName": "Periods", "Value": "12"}],
+            "Exceptions": {"measure": self.random.choice(self.measureNames)},
+            "InputTables": [
+                {
+                    "VariableName": "Input",
+                    "Query": f"Select ({self.attributeRef()} * {{{self.measureRef()}}});",
+                }
+            ],
+            "SliceKeys": sliceKeys,
+            "ScriptCode": "\n".join(scriptLines)
+            + "\n# TENANT EXTRACTOR: OUTPUT MEASURES START\n"
+            + outputMeasures
+            + "\n# TENANT EXTRACTOR: OUTPUT MEASURES END\n",
+        }
+        if pluginClass == "PythonScript":
+            config["OutputTables"] = [{"VariableName": "Output"}]
+        else:
+            config["OutputTables"] = [
+                {"VariableName": "Output", "VariableType": "DataFrame"}
+            ]
+        return config
+
+    def createActionButtons(self):
+        """
+        Generate the action buttons.
+        :return: list of action buttons
+        """
+        actionButtons = []
+        for b in range(self.parameters["actionButtons"]):
+            actionButtonName = f"Action Button {b:04d}"
+            self.actionButtonNames.append(actionButtonName)
+            actionButtons.append(
+                {
+                    "Name": actionButtonName,
+                    "Tooltip": f"{actionButtonName} tooltip",
+                    "ActionButtonType": "Custom",
+                    "Alignment": "Right",
+                    "IsPopOver": b % 2 == 0,
+                    "IsGlobal": b % 5 == 0,
+                    "ConfigJson": {
+                        "IBPLRules": [
+                            {"template": f"{self.measureRef()} = {self.measureRef()};"}
+                            for _ in range(2)
+                        ],
+                        "FieldBindings": [
+                            {
+                                "fieldName": f"Field{f}",
+                                "fieldType": "Text",
+                                "validation": {"required": True},
+                            }
+                            for f in range(2)
+                        ],
+                        "DataSources": [
+                            {
+                                "Name": "Source",
+                                "IBPLRules": [
+                                    {
+                                        "template": f"Select ({self.attributeRef()} * {{{self.measureRef()}}});"
+                                    }
+                                ],
+                            }
+                        ],
+                        "JavascriptRules": (
+                            [
+                                {
+                                    "modulename": self.random.choice(
+                                        self.tenantPluginNames
+                                    ),
+                                    "functionname": "run",
+                                }
+                            ]
+                            if self.tenantPluginNames
+                            else []
+                        ),
+                    },
+                }
+            )
+        return actionButtons
+
+    def createWidgets(self):
+        """
+        Generate the widget models and the widget definitions using them.
+        :return: tuple of the widget models and the widget definitions
+        """
+        widgetModels = []
+        widgetDefinitions = []
+        for w in range(self.parameters["widgets"]):
+            widgetModelId = self.newId()
+            widgetId = self.newId()
+            self.widgetIds.append(widgetId)
+            measureNames = self.pick(
+                self.measureNames, self.parameters["measuresPerWidget"]
+            )
+            levelAttributes = [
+                {
+                    "Dimension": x["DimensionName"],
+                    "AttributeName": x["LevelAttributeName"],
+                    "IsFilter": i == 0,
+                    "SelectedMembers": [{"Name": "Member 1"}, {"Name": "Member 2"}],
+                    "IsVisible": True,
+                }
+                for i, x in enumerate(self.memberScopes(4))
+            ]
+            widgetModelConfig = {
+                "LevelAttributes": levelAttributes,
+                "RegularMeasures": [{"Name": x} for x in measureNames],
+                "TransientMeasures": [
+                    {
+                        "Name": f"Transient {w}",
+                        "Formula": f"{self.measureRef(measureNames[0])} * 2",
+                    }
+                ],
+                "AssociationMeasures": [
+                    {
+                        "MeasureFilterIBPLExpression": f"{self.measureRef()} > 0",
+                        "MeasureFilterScope": "Row",
+                    }
+                ],
+                "AssociationMeasureExpressions": [
+                    {"Expression": f"{self.measureRef()} <> 0"}
+                ],
+                "FilterProperties": {
+                    "VersionDependentFilter": w % 2 == 0,
+                    "InterDependentMeasure": {
+                        "Name": self.random.choice(self.measureNames)
+                    },
+                },
+            }
+            if self.namedSetNames:
+                widgetModelConfig["NamedSets"] = [
+                    {
+                        "DimensionName": self.attributes[0][0],
+                        "SelectedNamedSet": {"Name": self.namedSetNames[0]},
+                        "AvailableNamedSets": [
+                            {"Name": x, "DisplayName": x}
+                            for x in self.pick(self.namedSetNames, 2)
+                        ],
+                    }
+                ]
+            if self.relationshipTypeNames:
+                widgetModelConfig["GraphRelations"] = [
+                    {
+                        "Name": self.random.choice(self.relationshipTypeNames),
+                        "EdgeProperties": [
+                            {"Name": x} for x in self.pick(self.edgePropertyNames, 2)
+                        ],
+                    }
+                ]
+            widgetModels.append({"Id": widgetModelId, "ConfigJson": widgetModelConfig})
+            isPrivate = w % 10 == 9
+            widgetDefinitions.append(
+                {
+                    "Id": widgetId,
+                    "Name": f"Widget {w:05d}",
+                    "WidgetType": ("Grid", "Chart", "Form", "Graph")[w % 4],
+                    "IsPrivate": isPrivate,
+                    "CreatedUserId": (w % self.parameters["users"]) + 1,
+                    "WidgetModelId": widgetModelId,
+                    "ConfigJson": {
+                        "Presentation": {
+                            "ShowTotals": True,
+                            "PageSize": 100,
+                            "Title": f"Widget {w:05d}",
+                            "MeasureCollections": [
+                                {
+                                    "Measures": [
+                                        {
+                                            "Name": x,
+                                            "IsVisible": i % 4 != 3,
+                                            "Color": "#336699",
+                                        }
+                                        for i, x in enumerate(measureNames)
+                                    ]
+                                }
+                            ],
+                        },
+                        "Widget": {
+                            "ActionButtonBindings": [
+                                {"Name": x}
+                                for x in self.pick(self.actionButtonNames, 1)
+                            ],
+                            "ExcelActionButtons": [
+                                {
+                                    "Name": x,
+                                    "IBPLExpression": f"{self.measureRef()} = 0;",
+                                    "IsBackgroundProcess": False,
+                                }
+                                for x in self.pick(self.actionButtonNames, w % 2)
+                            ],
+                        },
+                    },
+                }
+            )
+        return widgetModels, widgetDefinitions
+
+    def createWorkspaces(self):
+        """
+        Generate the workspaces with their page groups, pages and views. Views navigate to views generated before
+        them.
+        :return: list of workspaces
+        """
+        workspaces = []
+        for s in range(self.parameters["workspaces"]):
+            workspaceTitle = f"Workspace {s:03d}"
+            pageGroups = [
+                {
+                    "Id": self.newId(),
+                    "PageGroupId": self.newId(),
+                    "Name": f"{workspaceTitle} Group {g}",
+                    "Title": f"{workspaceTitle} Group {g}",
+                    "DisplayOrder": g,
+                }
+                for g in range(2)
+            ]
+            pages = []
+            for p in range(self.parameters["pagesPerWorkspace"]):
+                pageTitle = f"{workspaceTitle} Page {p:02d}"
+                views = []
+                for v in range(self.parameters["viewsPerPage"]):
+                    views.append(self.createView(f"{pageTitle} View {v}", v))
+                pageWidgetIds = self.pick(self.widgetIds, 2)
+                pages.append(
+                    {
+                        "Id": self.newId(),
+                        "PageId": self.newId(),
+                        "Name": pageTitle,
+                        "Title": pageTitle,
+                        "DisplayOrder": p,
+                        "IsDefault": p == 0,
+                        "PageGroupId": pageGroups[p % 2]["Id"],
+                        "Widgets": [
+                            {"WidgetDefinitionId": x, "Rank": rank}
+                            for rank, x in enumerate(pageWidgetIds)
+                        ],
+                        "PageWidgetDefinitions": [
+                            {
+                                "PageWidgetDefinitionId": self.newId(),
+                                "Name": f"{pageTitle} Tile {rank}",
+                            }
+                            for rank in range(len(pageWidgetIds))
+                        ],
+                        "Views": views,
+                        "ActionButtonBindings": [
+                            {"ActionButtonName": x}
+                            for x in self.pick(self.actionButtonNames, 1)
+                        ],
+                    }
+                )
+            workspaces.append(
+                {
+                    "Id": self.newId(),
+                    "WorkspaceId": self.newId(),
+                    "Name": workspaceTitle.replace(" ", ""),
+                    "Title": workspaceTitle,
+                    "IsHidden": False,
+                    "Position": s,
+                    "Roles": ["Planner", "Admin"],
+                    "PageGroups": pageGroups,
+                    "Pages": pages,
+                    "ActionButtonBindings": [
+                        {"ActionButtonName": x}
+                        for x in self.pick(self.actionButtonNames, 1)
+                    ],
+                }
+            )
+        return workspaces
+
+    def createView(self, viewTitle, position):
+        """
+        Generate a view with its widgets.
+        :param viewTitle: view title
+        :param position: position of the view in its page
+        :return: view
+        """
+        viewWidgets = []
+        for i, widgetId in enumerate(
+            self.pick(self.widgetIds, self.parameters["widgetsPerView"])
+        ):
+            filterScope = {
+                "LevelAttribute": self.memberScopes(1)[0],
+                "Scope": "Global",
+            }
+            filterScope["LevelAttribute"] = {
+                "Dimension": filterScope["LevelAttribute"]["DimensionName"],
+                "AttributeName": filterScope["LevelAttribute"]["LevelAttributeName"],
+            }
+            config = {
+                "FilterSharings": [dict(filterScope, MemberFilterExpression="")],
+                "FilterScopes": [filterScope],
+                "ShowInfoContext": {
+                    "MemberInfo": True,
+                    "Pulse": {
+                        "Title": viewTitle,
+                        "Folders": [{"Name": "General"}],
+                        "PostIndicator": {
+                            "UnreadOnly": True,
+                            "MemberIndicator": True,
+                            "LastNDays": 7,
+                        },
+                    },
+                    "TaskManagement": {"TaskIndicator": True},
+                },
+                "ActionButtonBindings": [
+                    {"ActionButtonName": x}
+                    for x in self.pick(self.actionButtonNames, 1)
+                ],
+            }
+            if self.viewIds:
+                config["Navigations"] = {
+                    "RowNavigationList": {
+                        "Views": [{"ViewId": self.random.choice(self.viewIds)}]
+                    }
+                }
+            viewWidgets.append(
+                {
+                    "ViewWidgetDefinitionId": self.newId(),
+                    "WidgetDefinitionId": widgetId,
+                    "Name": f"{viewTitle} Widget {i}",
+                    "IsPrimary": i == 0,
+                    "ConfigJson": config,
+                }
+            )
+        viewId = self.newId()
+        self.viewIds.append(viewId)
+        return {
+            "ViewId": viewId,
+            "Name": viewTitle,
+            "Title": viewTitle,
+            "Position": position,
+            "IsDefault": position == 0,
+            "Roles": ["Planner"],
+            "ViewWidgetDefinitions": viewWidgets,
+            "ActionButtonBindings": [
+                {"ActionButtonName": x} for x in self.pick(self.actionButtonNames, 1)
+            ],
+        }
+
+    def createLayoutTranslations(self, layout):
+        """
+        Generate the translations of the workspaces, page groups, pages, views and their widgets.
+        :param layout: generated layout
+        :return: list of translations
+        """
+        entities = []
+        for workspace in layout["Workspaces"]:
+            entities.append(("Workspace", workspace["WorkspaceId"], workspace["Title"]))
+            for pageGroup in workspace["PageGroups"]:
+                entities.append(
+                    ("PageGroup", pageGroup["PageGroupId"], pageGroup["Title"])
+                )
+            for page in workspace["Pages"]:
+                entities.append(("Page", page["PageId"], page["Title"]))
+                for pageWidget in page["PageWidgetDefinitions"]:
+                    entities.append(
+                        (
+                            "PageWidgetDefinitions",
+                            pageWidget["PageWidgetDefinitionId"],
+                            pageWidget["Name"],
+                        )
+                    )
+                for view in page["Views"]:
+                    entities.append(("View", view["ViewId"], view["Title"]))
+                    for viewWidget in view["ViewWidgetDefinitions"]:
+                        entities.append(
+                            (
+                                "ViewWidgetDefinition",
+                                viewWidget["ViewWidgetDefinitionId"],
+                                viewWidget["Name"],
+                            )
+                        )
+        return [
+            {
+                "EntityType": entityType,
+                "EntityId": entityId,
+                "LCID": lcid,
+                "Config": {"Title": f"{title} ({language})"},
+            }
+            for entityType, entityId, title in entities
+            for lcid, language in languages[: self.parameters["languages"]]
+        ]
+
+    def createRules(self):
+        """
+        Generate the rule files: active rule files with scopes, formulas and plugin calls, named set files and
+        procedure files.
+        :return: tuple of the rule group labels, scope labels and rule groups
+        """
+        labels = []
+        scopeLabels = []
+        ruleGroups = []
+
+        def addLabel(labelName, labelType):
+            labelId = self.newId()
+            labels.append(
+                {
+                    "Id": labelId,
+                    "LabelName": labelName,
+                    "LabelType": labelType,
+                    "Position": len(labels) + 1,
+                    "LabelDescription": f"{labelName} description",
+                }
+            )
+            return labelId
+
+        for n in range(self.parameters["namedSetFiles"]):
+            labelId = addLabel(f"NamedSets{n:02d}", "NamedSet")
+            for s in range(self.parameters["namedSetsPerFile"]):
+                setName = f"Set{n:02d}_{s:03d}"
+                self.namedSetNames.append(setName)
+                ruleGroups.append(
+                    {
+                        "RuleGroupLabelId": labelId,
+                        "RuleGroupName": setName,
+                        "RuleGroupDescription": "",
+                        "RuleGroupType": "NamedSet",
+                        "ScopeLabelId": 0,
+                        "ScopeLabelPosition": 0,
+                        "RuleGroupLabelPosition": s,
+                        "IsEnabled": True,
+                        "RuleGroupContent": {
+                            "RuleGroupText": f'{self.attributeRef()}.filter(#.Name startswith "A")'
+                        },
+                    }
+                )
+
+        for r in range(self.parameters["activeRuleFiles"]):
+            labelId = addLabel(f"ActiveRules{r:03d}", "ActiveRule")
+            for s in range(self.parameters["scopesPerRuleFile"]):
+                scopeType = scopeTypes[s % len(scopeTypes)]
+                scopeLabelId = self.newId()
+                if scopeType == "Graph" and self.relationshipTypeNames:
+                    members = self.memberScopes(3)
+                    scopeExpression = {
+                        "RelationshipTypeName": self.random.choice(
+                            self.relationshipTypeNames
+                        ),
+                        "VersionScope": {
+                            "DimensionName": "Version",
+                            "LevelAttributeName": "Version Name",
+                        },
+                        "FromScopes": members[:1],
+                        "ToScopes": members[1:],
+                    }
+                else:
+                    if scopeType == "Graph":
+                        scopeType = "Regular"
+                    scopeExpression = {"AttributeMemberScopes": self.memberScopes(3)}
+                    if self.namedSetNames and s % 4 == 1:
+                        scopeExpression["AttributeMemberScopes"].append(
+                            {
+                                "FilterExpression": "&"
+                                + self.random.choice(self.namedSetNames)
+                            }
+                        )
+                scopeLabels.append(
+                    {
+                        "Id": scopeLabelId,
+                        "RuleGroupLabelId": labelId,
+                        "RuleGroupType": scopeType,
+                        "ScopeExpression": scopeExpression,
+                        "LabelDescription": f"Scope {s}",
+                        "Position": s,
+                    }
+                )
+                for f in range(self.parameters["rulesPerScope"]):
+                    target = (
+                        f"Edge.[{self.random.choice(self.edgePropertyNames)}]"
+                        if scopeType == "Graph"
+                        else self.measureRef()
+                    )
+                    ruleGroups.append(
+                        {
+                            "RuleGroupLabelId": labelId,
+                            "RuleGroupName": f"Rule{r:03d}_{s:02d}_{f:02d}",
+                            "RuleGroupDescription": "",
+                            "RuleGroupType": scopeType,
+                            "ScopeLabelId": scopeLabelId,
+                            "ScopeLabelPosition": f,
+                            "RuleGroupLabelPosition": s * 100 + f,
+                            "IsEnabled": f % 10 != 9,
+                            "RuleGroupContent": {
+                                "RuleGroupText": f"{target} = {self.measureRef()} * {self.measureRef()};"
+                            },
+                        }
+                    )
+            for p in range(self.parameters["pluginsPerRuleFile"]):
+                if not self.pluginNames:
+                    break
+                ruleGroups.append(
+                    {
+                        "RuleGroupLabelId": labelId,
+                        "RuleGroupName": f"Plugin{r:03d}_{p}",
+                        "RuleGroupDescription": f"Plugin call {p}",
+                        "RuleGroupType": "Plugin",
+                        "ScopeLabelId": 0,
+                        "ScopeLabelPosition": p,
+                        "RuleGroupLabelPosition": 10000 + p,
+                        "IsEnabled": True,
+                        "RuleGroupContent": {
+                            "PluginInstanceName": self.random.choice(self.pluginNames),
+                            "PluginScopes": [
+                                {
+                                    "MeasureNames": self.pick(self.measureNames, 3),
+                                    "AttributeMemberScopes": self.memberScopes(2),
+                                }
+                            ],
+                            "PluginArguments": {"Periods": 12},
+                        },
+                    }
+                )
+
+        procedureFiles = []
+        for n in range(self.parameters["procedureFiles"]):
+            labelId = addLabel(f"Procedures{n:02d}", "Procedure")
+            procedureFiles.append(labelId)
+            for p in range(self.parameters["proceduresPerFile"]):
+                self.procedureNames.append(f"Proc{n:02d}_{p:03d}")
+        procedureNames = iter(self.procedureNames)
+        for n, labelId in enumerate(procedureFiles):
+            for p in range(self.parameters["proceduresPerFile"]):
+                procedureName = next(procedureNames)
+                ruleGroups.append(
+                    {
+                        "RuleGroupLabelId": labelId,
+                        "RuleGroupName": procedureName,
+                        "RuleGroupDescription": f"{procedureName} description",
+                        "RuleGroupType": "Procedure",
+                        "ScopeLabelId": 0,
+                        "ScopeLabelPosition": 0,
+                        "RuleGroupLabelPosition": p,
+                        "IsEnabled": True,
+                        "RuleGroupContent": {
+                            "IsParameterized": p % 3 == 0,
+                            "ParameterJson": (
+                                {
+                                    "properties": {
+                                        "Version": {"type": "string"},
+                                        "Items": {
+                                            "type": "array",
+                                            "items": {"type": "string"},
+                                        },
+                                    }
+                                }
+                                if p % 3 == 0
+                                else None
+                            ),
+                            "RuleGroupText": self.createProcedureCode(),
+                        },
+                    }
+                )
+        return labels, scopeLabels, ruleGroups
+
+    def createProcedureCode(self):
+        """
+        Generate the code of a procedure: scoped assignments, plugin and procedure calls.
+        :return: procedure code
+        """
+        lines = ["begin"]
+        for s in range(self.parameters["statementsPerProcedure"]):
+            if s % 5 == 3 and self.pluginNames:
+                lines.append(
+                    f"exec plugin instance [{self.random.choice(self.pluginNames)}] "
+                    f"for measures {{{self.measureRef()}}} using scope ({self.attributeRef()});"
+                )
+            elif s % 5 == 4 and self.procedureNames:
+                lines.append(
+                    f"exec procedure {self.random.choice(self.procedureNames)} ;"
+                )
+            else:
+                lines.append(
+                    f"cartesian scope: ({self.attributeRef()} * {self.attributeRef()});"
+                )
+                lines.append(
+                    f"{self.measureRef()} = {self.measureRef()} + {self.measureRef()};"
+                )
+                lines.append("end scope;")
+        lines.append("end")
+        return "\n".join(lines)
+
+    def createDataSecurityRules(self):
+        """
+        Generate the data security rules.
+        :return: list of IBPL rules
+        """
+        return [
+            {
+                "Name": f"Security Rule {r:02d}",
+                "ScriptType": "DataSecurity",
+                "IsActive": True,
+                "Script": f"grant read on {self.attributeRef()} to Planner;",
+            }
+            for r in range(self.parameters["activeRuleFiles"])
+        ]
+
+    def createExcelLayout(self):
+        """
+        Generate the excel folders, their workbooks and the widgets of the workbooks.
+        :return: tuple of the folders, workbooks, workbooks in folders and widgets in workbooks
+        """
+        folders = []
+        workbooks = []
+        workbooksInFolders = []
+        widgetsInWorkbooks = []
+        for f in range(self.parameters["excelFolders"]):
+            folderId = self.newId()
+            folders.append(
+                {
+                    "Id": folderId,
+                    "FolderName": f"Folder {f:03d}",
+                    "IsPublished": True,
+                    "DisplayOrder": f,
+                    "IsPrivate": False,
+                    "Roles": ["Planner"],
+                    "CreatedUserEmail": "user1@example.com",
+                    "ModifiedUserEmail": "user1@example.com",
+                    "ConfigJson": {
+                        "ActionButtonBindings": [
+                            {"Name": x} for x in self.pick(self.actionButtonNames, 1)
+                        ]
+                    },
+                }
+            )
+            for b in range(self.parameters["workbooksPerFolder"]):
+                workbookId = self.newId()
+                workbooks.append(
+                    {
+                        "Id": workbookId,
+                        "WorkbookName": f"Workbook {f:03d}-{b:02d}",
+                        "ConfigJson": {
+                            "ActionButtonBindings": [
+                                {"Name": x}
+                                for x in self.pick(self.actionButtonNames, 1)
+                            ]
+                        },
+                    }
+                )
+                workbooksInFolders.append(
+                    {
+                        "XLFolderId": folderId,
+                        "XLWorkbookId": workbookId,
+                        "DisplayOrder": b,
+                        "IsPublished": True,
+                    }
+                )
+                widgetsInWorkbooks.extend(
+                    {"XLWorkbookId": workbookId, "WidgetDefinitionId": x}
+                    for x in self.pick(
+                        self.widgetIds, self.parameters["widgetsPerWorkbook"]
+                    )
+                )
+        return folders, workbooks, workbooksInFolders, widgetsInWorkbooks
+
+    def writeZip(self, zipFileName):
+        """
+        Generate the tenant and write it as _legacy.json into a zip, like an exported tenant.
+        :param zipFileName: zip file location
+        :return: null
+        """
+        with zipfile.ZipFile(zipFileName, "w", zipfile.ZIP_DEFLATED) as outputZip:
+            outputZip.writestr("_legacy.json", json.dumps(self.generate()))
+
+
+def getParameters(size, overrides=None):
+    """
+    Get the entity counts of a size.
+    :param size: name in sizePresets
+    :param overrides: dict of counts replacing the counts of the size
+    :return: parameters dict
+    """
+    parameters = dict(sizePresets[size])
+    for name, value in (overrides or {}).items():
+        if name not in parameters:
+            raise ValueError(f"Unknown parameter {name}")
+        parameters[name] = value
+    return parameters
+
+
+def main(argv):
+    """
+    Write a synthetic tenant zip.
+    :param argv: arguments
+    :return: null
+    """
+    if len(argv) < 2:
+        print(__doc__)
+        for size, parameters in sizePresets.items():
+            print(size + ": " + ", ".join(f"{k}={v}" for k, v in parameters.items()))
+        sys.exit(1)
+    size = argv[argv.index("--SIZE") + 1] if "--SIZE" in argv else "small"
+    seed = int(argv[argv.index("--SEED") + 1]) if "--SEED" in argv else 0
+    overrides = {
+        argv[i][2:]: int(argv[i + 1])
+        for i in range(2, len(argv) - 1)
+        if argv[i].startswith("--") and argv[i][2:] in sizePresets[size]
+    }
+    TenantGenerator(
+        getParameters(size, overrides), tenantName="Synthetic_" + size, seed=seed
+    ).writeZip(argv[1])
+    print(f"{size} tenant written to {argv[1]}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,225 @@
+import csv
+import logging
+import multiprocessing
+import os
+import time
+import traceback
+
+from commondatafuncs import CommonDataFunction
+from instrumentation import StageRecorder
+from tenantextraction import TenantExtraction
+
+
+def getTenantZips(source):
+    """
+    Get the tenant zip files of a batch.
+    :param source: directory holding the tenant zips, or manifest file listing one zip path per line
+    :return: list of zip file locations
+    """
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, x)
+            for x in os.listdir(source)
+            if x.lower().endswith(".zip")
+        )
+    manifestDir = os.path.dirname(os.path.abspath(source))
+    with open(source, "r", encoding="utf-8") as manifestFile:
+        return [
+            os.path.join(manifestDir, x.strip())
+            for x in manifestFile
+            if x.strip() and not x.strip().startswith("#")
+        ]
+
+
+def setTenantLogging(logFileName):
+    """
+    Send the extractor logs of the worker process to the log file of the tenant.
+    :param logFileName: log file location
+    :return: null
+    """
+    logger = logging.getLogger("extractor-logger")
+    logger.setLevel(logging.DEBUG)
+    # A worker process extracts several tenants, the log file of the previous one is closed.
+    for fHandler in list(logger.handlers):
+        logger.removeHandler(fHandler)
+        fHandler.close()
+    fh = logging.FileHandler(logFileName, mode="w")
+    fh.setLevel(logging.DEBUG)
+    fh.setFormatter(
+        logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    )
+    logger.addHandler(fh)
+
+
+def claimTenantName(claimedTenants, tenantName, zipFile):
+    """
+    Claim the destination of a tenant for a zip before anything is written, so two zips of the same tenant in one
+    batch do not write the same database and directories at the same time.
+    :param claimedTenants: dict shared by the workers, tenant name to the zip claiming it
+    :param tenantName: tenant name
+    :param zipFile: zip file location
+    :return: null
+    """
+    claimingZip = claimedTenants.setdefault(tenantName, zipFile)
+    if claimingZip != zipFile:
+        raise ValueError(
+            f"Tenant {tenantName} is also extracted from {claimingZip} in this batch, "
+            f"extract this zip in another batch or to another destination"
+        )
+
+
+def extractTenantZip(task):
+    """
+    Extract one tenant zip in a worker process.
+    :param task: tuple of zip file location, destination directory, extraction options, StagePlan and the claimed
+    tenant names shared by the workers
+    :return: report dict of the tenant
+    """
+    zipFile, destDir, extractionOptions, stagePlan, claimedTenants = task
+    startTime = time.perf_counter()
+    report = {
+        "TenantZip": zipFile,
+        "TenantName": None,
+        "Status": "Error",
+        "Seconds": None,
+        "PeakMemoryMB": None,
+        "Error": None,
+    }
+    logFileName = os.path.join(
+        destDir, os.path.splitext(os.path.basename(zipFile))[0] + ".log"
+    )
+    setTenantLogging(logFileName)
+    recorder = None
+    try:
+        recorder = StageRecorder(
+            profileDir=(
+                os.path.splitext(logFileName)[0] + "_profile"
+                if extractionOptions.get("profile")
+                else None
+            )
+        )
+        tenantExtraction = TenantExtraction(extractionOptions, stagePlan, recorder)
+        unchangedTenantName = None
+        if extractionOptions.get("incremental"):
+            unchangedTenantName = tenantExtraction.skipUnchangedTenant(zipFile, destDir)
+        if unchangedTenantName is not None:
+            report["TenantName"] = unchangedTenantName
+            claimTenantName(claimedTenants, unchangedTenantName, zipFile)
+            report["Status"] = "Unchanged"
+        else:
+            commonObj = CommonDataFunction()
+            with recorder.stage("jsonLoad"):
+                commonObj.readJsonFile(zipFile, destDir)
+            report["TenantName"] = commonObj.jsonData["Tenant"]["Name"]
+            claimTenantName(claimedTenants, report["TenantName"], zipFile)
+            if tenantExtraction.extract(
+                commonObj.destPath,
+                commonObj.jsonData,
+                commonObj.destDir,
+                commonObj.uiDestDir,
+                commonObj.tenantIndex,
+                zipFile,
+            ):
+                report["Status"] = "Success"
+    except Exception as e:
+        logging.getLogger("extractor-logger").error(traceback.format_exc())
+        report["Error"] = str(e)
+    report["Seconds"] = round(time.perf_counter() - startTime, 2)
+    if recorder is not None:
+        report["PeakMemoryMB"] = recorder.getPeakMemoryMB()
+    return report
+
+
+class BatchExtractor:
+    reportFileName = "BatchReport.csv"
+    # Tenants extracted by a worker process before it is replaced. The split table statements and imported modules
+    # are reused within a process, replacing it returns the memory kept after a large tenant.
+    tenantsPerWorker = 10
+    reportColumns = [
+        "TenantZip",
+        "TenantName",
+        "Status",
+        "Seconds",
+        "PeakMemoryMB",
+        "Error",
+    ]
+
+    def __init__(self, zipFiles, destDir, extractionOptions, workers=None):
+        """
+        BatchExtractor Constructor. Extracts many tenants on a bounded pool of worker processes, each tenant with its
+        own log and report so a failing tenant does not affect the others. A tenant name is extracted from one zip
+        only, the other zips of the same tenant fail.
+        :param zipFiles: list of tenant zip file locations
+        :param destDir: destination directory for all the tenants
+        :param extractionOptions: extraction options dict for TenantExtraction
+        :param workers: number of worker processes, defaults to the number of cores
+        """
+        self.logger = logging.getLogger("extractor-logger")
+        self.zipFiles = zipFiles
+        self.destDir = destDir
+        self.extractionOptions = extractionOptions
+        self.workers = min(workers or os.cpu_count() or 1, max(len(zipFiles), 1))
+        # The plan only depends on the options, so it is resolved once for all tenants.
+        self.stagePlan = TenantExtraction.createStagePlan(extractionOptions)
+
+    def run(self):
+        """
+        Extract all tenants and write the batch report.
+        :return: list of report dicts, one per tenant
+        """
+        os.makedirs(self.destDir, exist_ok=True)
+        print(f"Extracting {len(self.zipFiles)} tenants with {self.workers} workers")
+        self.logger.info(
+            f"Extracting {len(self.zipFiles)} tenants with {self.workers} workers"
+        )
+        startTime = time.perf_counter()
+        reports = []
+        with multiprocessing.Manager() as manager, multiprocessing.Pool(
+            self.workers, maxtasksperchild=self.tenantsPerWorker
+        ) as pool:
+            claimedTenants = manager.dict()
+            tasks = [
+                (
+                    zipFile,
+                    self.destDir,
+                    self.extractionOptions,
+                    self.stagePlan,
+                    claimedTenants,
+                )
+                for zipFile in self.zipFiles
+            ]
+            for report in pool.imap_unordered(extractTenantZip, tasks):
+                reports.append(report)
+                summary = (
+                    f"{report['Status']}: {report['TenantZip']} in {report['Seconds']}s"
+                )
+                if report["PeakMemoryMB"] is not None:
+                    summary += f", peak memory {report['PeakMemoryMB']} MB"
+                self.logger.info(summary)
+                print(summary)
+        wallTime = time.perf_counter() - startTime
+        reports.sort(key=lambda x: x["TenantZip"])
+        self.writeReport(reports)
+
+        tenantTime = sum(x["Seconds"] for x in reports)
+        summary = (
+            f"Batch completed: {sum(x['Status'] in ('Success', 'Unchanged') for x in reports)} of {len(reports)} "
+            f"tenants ({sum(x['Status'] == 'Unchanged' for x in reports)} unchanged) in {wallTime:.2f}s wall time, "
+            f"{tenantTime:.2f}s tenant time"
+        )
+        self.logger.info(summary)
+        print(summary)
+        return reports
+
+    def writeReport(self, reports):
+        """
+        Write the per tenant timing and memory report to the destination directory.
+        :param reports: list of report dicts
+        :return: null
+        """
+        reportPath = os.path.join(self.destDir, self.reportFileName)
+        with open(reportPath, "w", newline="", encoding="utf-8") as reportFile:
+            fileWriter = csv.DictWriter(reportFile, fieldnames=self.reportColumns)
+            fileWriter.writeheader()
+            fileWriter.writerows(reports)
+        print("Batch report written to " + reportPath)
@@ -0,0 +1,134 @@
+import logging
+import os
+import time
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # Optional, only needed for the columnar output.
+    pyarrow = None
+try:
+    import pyarrow.parquet as parquet
+except ImportError:  # pyarrow built without parquet, Arrow IPC is written.
+    parquet = None
+
+from textstore import getColumnExpression
+
+
+class ColumnarExport:
+    # A text column is dictionary encoded when it has at most this many distinct values per row, e.g. TenantName,
+    # PlanName or MeasureGroupName.
+    dictionaryRatio = 0.5
+    fileExtensions = {"parquet": ".parquet", "arrow": ".arrow"}
+
+    def __init__(self, dbConnection, destPath, tenantName):
+        """
+        ColumnarExport Constructor. Writes every extracted table as a typed columnar file, parquet when pyarrow has
+        parquet support, else Arrow IPC, into the <Tenant>_Tables directory.
+        :param dbConnection: tenant database connection
+        :param destPath: destination directory
+        :param tenantName: tenant name
+        """
+        self.logger = logging.getLogger("extractor-logger")
+        self.dbConnection = dbConnection
+        self.outputDir = os.path.join(destPath, tenantName + "_Tables")
+        self.fileFormat = "parquet" if parquet is not None else "arrow"
+
+    def exportTables(self):
+        """
+        Write all the extracted tables, and delete the files of tables not extracted anymore.
+        :return: number of tables written
+        """
+        if pyarrow is None:
+            self.logger.error(
+                "Columnar output needs the pyarrow module - pip install pyarrow"
+            )
+            print("Columnar output needs the pyarrow module - pip install pyarrow")
+            return 0
+        startTime = time.perf_counter()
+        os.makedirs(self.outputDir, exist_ok=True)
+        tableNames = [
+            x[0]
+            for x in self.dbConnection.execute(
+                'SELECT name FROM sqlite_master WHERE type="table" AND name NOT LIKE "SearchIndex%" '
+                'AND name != "ExtractionFingerprints" AND name != "StoredTexts" ORDER BY name;'
+            )
+        ]
+        writtenFiles = set()
+        for tableName in tableNames:
+            try:
+                writtenFiles.add(self.exportTable(tableName))
+            except Exception as e:
+                self.logger.error(
+                    f"Unable to write {tableName} as {self.fileFormat}: {e}"
+                )
+                print(f"Unable to write {tableName} as {self.fileFormat}: {e}")
+        for fileName in os.listdir(self.outputDir):
+            if (
+                os.path.splitext(fileName)[1] in self.fileExtensions.values()
+                and fileName not in writtenFiles
+            ):
+                os.remove(os.path.join(self.outputDir, fileName))
+        self.logger.info(
+            f"{len(writtenFiles)} tables written as {self.fileFormat} to {self.outputDir} "
+            f"in {time.perf_counter() - startTime:.2f}s"
+        )
+        print(
+            f"{len(writtenFiles)} tables written as {self.fileFormat} to {self.outputDir}"
+        )
+        return len(writtenFiles)
+
+    def exportTable(self, tableName):
+        """
+        Write one table, its columns typed after the declared sqlite types.
+        :param tableName: table name
+        :return: file name
+        """
+        columns = [
+            (x[1], x[2])
+            for x in self.dbConnection.execute(f'PRAGMA table_info("{tableName}");')
+        ]
+        rows = self.dbConnection.execute(
+            f"SELECT {', '.join(getColumnExpression(tableName, x[0]) for x in columns)} "
+            f'FROM "{tableName}";'
+        ).fetchall()
+        columnValues = zip(*rows) if rows else ([] for _ in columns)
+        table = pyarrow.table(
+            {
+                columnName: self.getColumnArray(list(values), columnType)
+                for (columnName, columnType), values in zip(columns, columnValues)
+            }
+        )
+        fileName = tableName + self.fileExtensions[self.fileFormat]
+        filePath = os.path.join(self.outputDir, fileName)
+        if self.fileFormat == "parquet":
+            parquet.write_table(table, filePath)
+        else:
+            with pyarrow.OSFile(filePath, "wb") as outFile:
+                with pyarrow.ipc.new_file(outFile, table.schema) as writer:
+                    writer.write_table(table)
+        return fileName
+
+    def getColumnArray(self, values, columnType):
+        """
+        Build the typed array of a column.
+        :param values: column values
+        :param columnType: declared sqlite type, e.g. TEXT, INTEGER or REAL
+        :return: pyarrow array, dictionary encoded for repetitive text
+        """
+        arrowType = {
+            "INTEGER": pyarrow.int64(),
+            "REAL": pyarrow.float64(),
+        }.get(columnType.upper(), pyarrow.string())
+        try:
+            array = pyarrow.array(values, type=arrowType)
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+            # sqlite keeps values it cannot convert to the declared type, e.g. text in an INTEGER column.
+            arrowType = pyarrow.string()
+            array = pyarrow.array(
+                [None if x is None else str(x) for x in values], type=arrowType
+            )
+        if arrowType == pyarrow.string() and values:
+            if len(set(values)) <= len(values) * self.dictionaryRatio:
+                return array.dictionary_encode()
+        return array
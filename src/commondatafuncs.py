@@ -1,5 +1,4 @@
 import logging
-import json
 import os
 import sys
 from selenium import webdriver
@@ -8,6 +7,9 @@ from tkinter import Tk, messagebox
 from zipfile import ZipFile
 from requests import get
 
+import jsonbackend
+from tenantindex import TenantModelIndex
+
 
 class CommonDataFunction:
     def __init__(self):
@@ -19,8 +21,7 @@ class CommonDataFunction:
         self.destDir = None
         self.uiDestDir = None
         self.jsonData = {}
-        self.tenantAttributeIdToDimName = {}
-        self.tenantAttributeIdToAttrName = {}
+        self.tenantIndex = None
         self.chromeDriver = None
         self.logger = None
         self.destPath = None
@@ -153,14 +154,14 @@ class CommonDataFunction:
             )
 
         print("Reading json file " + jsonFileName)
-        with inputZip.open(jsonFileName) as dataFile:
-            self.jsonData = json.load(dataFile)
-            self.destDir = os.path.join(
-                destDirName, self.jsonData["Tenant"]["Name"] + "_Models"
-            )
-            self.uiDestDir = os.path.join(
-                destDirName, self.jsonData["Tenant"]["Name"] + "_UIElements"
-            )
+        self.jsonData = jsonbackend.loadZipMember(inputZip, jsonFileName)
+        self.tenantIndex = TenantModelIndex(self.jsonData)
+        self.destDir = os.path.join(
+            destDirName, self.jsonData["Tenant"]["Name"] + "_Models"
+        )
+        self.uiDestDir = os.path.join(
+            destDirName, self.jsonData["Tenant"]["Name"] + "_UIElements"
+        )
         print("Destination directory for Models files " + self.destDir)
         print("Destination directory for UI files " + self.uiDestDir)
         self.destPath = destDirName
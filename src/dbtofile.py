@@ -1,82 +1,87 @@
 import logging
 import csv
 import sys
-import os
-import errno
 import re
-from pandas import ExcelWriter, DataFrame, read_sql
+from itertools import groupby
+from operator import itemgetter
+
+from filesinks import DirectorySink
+from textstore import getColumnExpression
 
 
 class DBToFiles:
-    def __init__(self, dbConnection, modelFilePath, uiFilePath):
+    def __init__(self, dbConnection, modelFilePath, uiFilePath, fileSink=None):
         """
         DBToFiles Constructor.
         :param dbConnection: Database connection
         :param modelFilePath: Model files path
         :param uiFilePath: UI files path
+        :param fileSink: sink the files are written to, defaults to the destination directories
         """
         self.dbConn = dbConnection
         self.dbConnection = dbConnection.cursor()
         self.modelFilePath = modelFilePath
         self.uiFilePath = uiFilePath
+        self.tableFilePath = modelFilePath.split("_Models")[0] + "_TableCSV"
+        self.fileSink = fileSink if fileSink is not None else DirectorySink()
         try:
             self.logger = logging.getLogger("extractor-logger")
         except:
             print("Unable to set log file, Exiting.")
             sys.exit()
 
-    def generateCSVArrays(self):
-        print("Creating CSV Files...")
-        # 'NodeCombos', 'NodeCombosConditionalFormats'
-        modelList = [
-            "Dimensions",
-            "DimAttributes",
-            "DimAttrProperties",
-            "DimAttrTranslations",
-            "DimAttrPropTranslations",
-            "DimHierarchies",
-            "DimHierLevels",
-            "Graphs",
-            "GraphEdges",
-            "GraphEdgeTranslations",
-            "GraphFromNodes",
-            "GraphNodeTranslations",
-            "GraphToNodes",
-            "Plans",
-            "Picklists",
-            "DimAliases",
-            "DimAttrAliases",
-            "PickListValues",
-            "NamedSets",
-        ]
-        planList = []
-        abList = [
-            "ActionButtonBindingsForWeb",
-            "ActionButtonDataSource",
-            "ActionButtonDetails",
-            "ActionButtonFieldBindings",
-            "ActionButtonJSRules",
-            "ActionButtonRules",
-            "ExcelActionButtonsForWidget",
+    def createTableCSVFiles(self):
+        """
+        Create one csv file per table, holding all the rows of the table sorted on all its columns.
+        :return: null
+        """
+        self.fileSink.addRoot(self.tableFilePath)
+        self.dbConnection.execute(
+            'SELECT name FROM sqlite_master WHERE type="table" AND name NOT LIKE "SearchIndex%" '
+            'AND name != "ExtractionFingerprints" AND name != "StoredTexts" ORDER BY name;'
+        )
+        for i in self.dbConnection.fetchall():
+            try:
+                self.createSortedTableCSV(i["name"], f"{i['name']}.csv")
+            except Exception as e:
+                self.logger.error(
+                    "Error writing the table file of " + i["name"] + ": " + str(e)
+                )
+                print("Error writing the table file of " + i["name"] + ": ", str(e))
+
+    def createSortedTableCSV(self, tableName, fileName):
+        """
+        Stream all the rows of a table, sorted in sqlite on all its columns and without TenantName, to a csv file of
+        the table folder.
+        :param tableName: table name
+        :param fileName: filename
+        :return: null
+        """
+        columns = [
+            i["name"]
+            for i in self.dbConn.execute(f'PRAGMA TABLE_INFO("{tableName}");')
+            if i["name"] != "TenantName"
         ]
-        uiList = []
-        self.dbConnection.execute('SELECT name FROM sqlite_master WHERE type="table";')
-        fetchData = self.dbConnection.fetchall()
-        for i in fetchData:
-            tableName = i["name"]
-            df = read_sql(f"SELECT * FROM {tableName};", self.dbConn)
-            df_columns = list(df.columns)
-            if "TenantName" in df_columns:
-                df_columns.remove("TenantName")
-            df = df[df_columns]
-            df.sort_values(by=df_columns, inplace=True)
-            filePath = self.modelFilePath
-            if tableName in modelList:
-                filePath = self.modelFilePath
-            elif tableName in abList:
-                filePath = os.path.join(self.modelFilePath, "ActionButtons")
-            os.makedirs(filePath, exist_ok=True)
-            df.to_csv(f"{filePath}/{tableName}.csv", index=False)
+        if len(columns) == 0:
+            return
+        selectColumns = ", ".join(getColumnExpression(tableName, i) for i in columns)
+        orderColumns = ", ".join(
+            f"{getColumnExpression(tableName, i)} ASC NULLS LAST" for i in columns
+        )
+        rowCursor = self.dbConn.execute(
+            f'SELECT {selectColumns} FROM "{tableName}" ORDER BY {orderColumns};'
+        )
+        with self.fileSink.openText(self.tableFilePath, fileName) as csvFile:
+            fileWriter = csv.writer(
+                csvFile, delimiter=",", quotechar='"', quoting=csv.QUOTE_MINIMAL
+            )
+            fileWriter.writerow(columns)
+            while True:
+                rows = rowCursor.fetchmany(1000)
+                if not rows:
+                    break
+                fileWriter.writerows(rows)
+        self.logger.info("Data Written in file: " + fileName)
 
     def createDSRulesFile(self):
         """
@@ -116,9 +121,15 @@ class DBToFiles:
         Create xlsx files from all the tables in the database.
         :return: null
         """
+        # pandas is only needed for the xlsx output, import it here to keep it out of the csv only runs.
+        from pandas import ExcelWriter, DataFrame
+
         self.logger.info("Generating Excel File.")
         print("Generating Excel File.")
-        self.dbConnection.execute('SELECT name FROM sqlite_master WHERE type="table";')
+        self.dbConnection.execute(
+            'SELECT name FROM sqlite_master WHERE type="table" AND name NOT LIKE "SearchIndex%" '
+            'AND name != "ExtractionFingerprints" AND name != "StoredTexts";'
+        )
         tables = self.dbConnection.fetchall()
         xlFileLocation = self.modelFilePath.split("_Models")[0] + ".xlsx"
         writer = ExcelWriter(xlFileLocation, engine="xlsxwriter")
@@ -140,7 +151,13 @@ class DBToFiles:
             fetchHeaderData = self.dbConnection.fetchall()
             headerData = [i[0] for i in fetchHeaderData]
             data = []
-            self.dbConnection.execute("SELECT * FROM " + tableName + ";")
+            self.dbConnection.execute(
+                "SELECT "
+                + ", ".join(getColumnExpression(tableName, i) for i in headerData)
+                + ' FROM "'
+                + tableName
+                + '";'
+            )
             fetchRowData = self.dbConnection.fetchall()
             for row in fetchRowData:
                 data.append(row)
@@ -756,7 +773,10 @@ class DBToFiles:
             # MeasureGrpExternalConfigs file
             try:
                 self.dbConnection.execute(
-                    "SELECT * from MeasureGrpExternalConfigs WHERE PlanName=? ORDER BY MeasureGroupName ASC;",
+                    "SELECT MeasureGroupName, NeedsRedeployment, DeploymentStatus, MaintainLocalCache, "
+                    f"DeploymentStatusMessage, {getColumnExpression('MeasureGrpExternalConfigs', 'ExternalConfigJson')} "
+                    "AS ExternalConfigJson, DataSourceType "
+                    "from MeasureGrpExternalConfigs WHERE PlanName=? ORDER BY MeasureGroupName ASC;",
                     (plan,),
                 )
                 fetchData = self.dbConnection.fetchall()
@@ -1057,7 +1077,10 @@ class DBToFiles:
         # ActionButtonDetails file
         try:
             self.dbConnection.execute(
-                "SELECT * from ActionButtonDetails ORDER BY ActionButtonName ASC, Tooltip ASC;"
+                "SELECT ActionButtonName, Tooltip, ActionButtonType, Alignment, IsPopOver, IsGlobal, "
+                f"{getColumnExpression('ActionButtonDetails', 'ConfigJson')} AS ConfigJson "
+                "from ActionButtonDetails ORDER BY ActionButtonName ASC, "
+                "Tooltip ASC;"
             )
             fetchData = self.dbConnection.fetchall()
             actionButtonDetailList = [
@@ -1315,113 +1338,77 @@ class DBToFiles:
             self.dbConnection.execute("SELECT RuleFileName FROM ActiveRuleFiles")
             fetchData = self.dbConnection.fetchall()
             ruleFileList = [i["RuleFileName"] for i in fetchData]
-            finalData = ""
-            for ruleFileName in ruleFileList:
+            ruleFileSet = set(ruleFileList)
+            # Scopes with their formulae and then the plugins of every rule file, in one ordered pass.
+            ruleTextCursor = self.dbConn.execute(
+                "SELECT s.RuleFileName, 0 AS RowKind, s.rowid AS ScopeRowId, s.ScopeDescription, s.ScopeType, "
+                "s.ScopeString AS RuleText, f.rowid AS FormulaRowId, f.FormulaStatement, f.IsEnabled "
+                "FROM ActiveRuleScopeLists s LEFT JOIN ActiveRuleFormulae f "
+                "ON f.RuleFileName = s.RuleFileName AND f.ScopePosition = s.ScopePosition "
+                "WHERE s.ScopeType IS NOT 'Plugin' "
+                "UNION ALL "
+                "SELECT RuleFileName, 1, rowid, NULL, NULL, PluginText, NULL, NULL, NULL FROM ActivePluginDetails "
+                "ORDER BY 1, 2, 3, 7;"
+            )
+            writtenRuleFiles = set()
+            for ruleFileName, ruleRows in groupby(ruleTextCursor, key=itemgetter(0)):
+                if ruleFileName not in ruleFileSet:
+                    continue
+                writtenRuleFiles.add(ruleFileName)
                 try:
-                    self.dbConnection.execute(
-                        "SELECT ScopeDescription, ScopeType, ScopePosition, ScopeString FROM ActiveRuleScopeLists "
-                        "WHERE RuleFileName=?;",
-                        (ruleFileName,),
-                    )
-                    fetchData = self.dbConnection.fetchall()
-                    scopeData = [
-                        {
-                            "ScopeComment": i["ScopeDescription"],
-                            "ScopeType": i["ScopeType"],
-                            "ScopePosition": i["ScopePosition"],
-                            "ScopeString": i["ScopeString"],
-                        }
-                        for i in fetchData
-                    ]
-                    for scope in scopeData:
-                        if scope["ScopeType"] == "Plugin":
-                            pass
-                        else:
-                            if len(scope["ScopeComment"].strip()) == 0:
-                                scope["ScopeComment"] = " "
-                            finalData = (
-                                finalData + "/*" + scope["ScopeComment"] + "*/\n"
-                            )
-
-                            if scope["ScopeType"] == "Block":
-                                finalData = finalData + "block "
-                            elif scope["ScopeType"] == "Cartesian":
-                                finalData = finalData + "cartesian "
-                            elif scope["ScopeType"] == "EvaluateMember":
-                                finalData = finalData + "evaluatemember "
-                            elif scope["ScopeType"] == "Recurrence":
-                                finalData = finalData + "recurrence "
-                            elif scope["ScopeType"] == "Spreading":
-                                finalData = finalData + "spread "
-
-                            finalData = (
-                                finalData + "scope: ( " + scope["ScopeString"] + " );\n"
-                            )
-                            try:
-                                self.dbConnection.execute(
-                                    "SELECT * FROM ActiveRuleFormulae WHERE RuleFileName=? AND ScopePosition=?;",
-                                    (ruleFileName, scope["ScopePosition"]),
-                                )
-                                fetchData = self.dbConnection.fetchall()
-                                formulaeData = [
-                                    {
-                                        "FormulaPosition": i["FormulaPosition"],
-                                        "FormulaStatement": i["FormulaStatement"],
-                                        "FormulaScope": i["ScopeGrain"],
-                                        "IsEnabled": i["IsEnabled"],
-                                    }
-                                    for i in fetchData
-                                ]
-
-                                for formula in formulaeData:
-                                    if formula["IsEnabled"] == "1":
-                                        finalData = (
-                                            finalData
-                                            + "  "
-                                            + formula["FormulaStatement"]
-                                            + "\n"
-                                        )
-                                    else:
-                                        finalData = (
-                                            finalData
-                                            + "/*"
-                                            + formula["FormulaStatement"]
-                                            + "*/\n"
-                                        )
-
-                            except Exception as e:
-                                self.logger.error(
-                                    "Error in getting data from ActiveRuleFormulae: "
-                                    + str(e)
-                                )
-
-                            finalData = finalData + "end scope;\n\n"
-                    try:
-                        self.dbConnection.execute(
-                            "SELECT PluginText FROM ActivePluginDetails WHERE RuleFileName=?;",
-                            (ruleFileName,),
-                        )
-                        fetchData = self.dbConnection.fetchall()
-                        plugin = [{"text": i["PluginText"]} for i in fetchData]
-                        for x in plugin:
-                            finalData = finalData + x["text"]
-
-                    except Exception as e:
-                        self.logger.error(
-                            "Error in getting data from ActivePluginDetails: " + str(e)
-                        )
-                    filename = ("ActiveRules/" + ruleFileName + ".ibpl").replace(
-                        ":", ""
-                    )
-                    self.createEntityFile(self.replaceNewLine(finalData), filename)
-                    finalData = ""
-
+                    self.createRuleFile(ruleFileName, ruleRows)
                 except Exception as ex:
                     self.logger.error("Error creating rule file:" + str(ex))
+            # Rule files without any scope or plugin
+            for ruleFileName in ruleFileSet - writtenRuleFiles:
+                self.createRuleFile(ruleFileName, [])
 
         except Exception as e:
             self.logger.error("Error getting data from ActiveRuleFiles:  " + str(e))
 
+    def createRuleFile(self, ruleFileName, ruleRows):
+        """
+        Create the ibpl file of a rule file.
+        :param ruleFileName: rule file name
+        :param ruleRows: ordered scope/formula rows followed by the plugin rows of the rule file
+        :return: null
+        """
+        scopeKeywords = {
+            "Block": "block ",
+            "Cartesian": "cartesian ",
+            "EvaluateMember": "evaluatemember ",
+            "Recurrence": "recurrence ",
+            "Spreading": "spread ",
+        }
+        finalData = []
+        currentScope = None
+        for row in ruleRows:
+            if row["RowKind"] == 1:
+                if currentScope is not None:
+                    finalData.append("end scope;\n\n")
+                    currentScope = None
+                finalData.append(row["RuleText"])
+                continue
+            if row["ScopeRowId"] != currentScope:
+                if currentScope is not None:
+                    finalData.append("end scope;\n\n")
+                currentScope = row["ScopeRowId"]
+                scopeComment = row["ScopeDescription"]
+                if len(scopeComment.strip()) == 0:
+                    scopeComment = " "
+                finalData.append("/*" + scopeComment + "*/\n")
+                finalData.append(scopeKeywords.get(row["ScopeType"], ""))
+                finalData.append("scope: ( " + row["RuleText"] + " );\n")
+            if row["FormulaRowId"] is not None:
+                if row["IsEnabled"] == "1":
+                    finalData.append("  " + row["FormulaStatement"] + "\n")
+                else:
+                    finalData.append("/*" + row["FormulaStatement"] + "*/\n")
+        if currentScope is not None:
+            finalData.append("end scope;\n\n")
+        filename = ("ActiveRules/" + ruleFileName + ".ibpl").replace(":", "")
+        self.createEntityFile(self.replaceNewLine("".join(finalData)), filename)
+
     def createPluginsCSVArrays(self):
         """
         Create plugin related csv files.
@@ -1441,7 +1428,8 @@ class DBToFiles:
                 if plugin["PluginClass"] == "RScriptGeneralized":
                     try:
                         self.dbConnection.execute(
-                            "SELECT ScriptCode FROM RGenPluginScripts WHERE PluginName=? ORDER BY ScriptCode ASC;",
+                            "SELECT storedtext(ScriptCode) AS ScriptCode FROM RGenPluginScripts WHERE PluginName=? "
+                            "ORDER BY storedtext(ScriptCode) ASC;",
                             (plugin["PluginName"],),
                         )
                         fetchData = self.dbConnection.fetchall()
@@ -1615,7 +1603,8 @@ class DBToFiles:
                 elif plugin["PluginClass"] == "RScriptTimeSeries":
                     try:
                         self.dbConnection.execute(
-                            "SELECT ScriptCode FROM RTimePluginScripts WHERE PluginName=? ORDER BY ScriptCode;",
+                            "SELECT storedtext(ScriptCode) AS ScriptCode FROM RTimePluginScripts WHERE PluginName=? "
+                            "ORDER BY storedtext(ScriptCode);",
                             (plugin["PluginName"],),
                         )
                         fetchData = self.dbConnection.fetchall()
@@ -1834,7 +1823,8 @@ class DBToFiles:
                     # ScriptCode
                     try:
                         self.dbConnection.execute(
-                            "SELECT ScriptCode FROM PythonPluginScripts WHERE PluginName=? ORDER BY ScriptCode ASC;",
+                            "SELECT storedtext(ScriptCode) AS ScriptCode FROM PythonPluginScripts WHERE PluginName=? "
+                            "ORDER BY storedtext(ScriptCode) ASC;",
                             (plugin["PluginName"],),
                         )
                         fetchData = self.dbConnection.fetchall()
@@ -1946,7 +1936,8 @@ class DBToFiles:
                     # CODE
                     try:
                         self.dbConnection.execute(
-                            "SELECT ScriptCode FROM PySparkPluginScripts WHERE PluginName=? ORDER BY ScriptCode ASC;",
+                            "SELECT storedtext(ScriptCode) AS ScriptCode FROM PySparkPluginScripts WHERE PluginName=? "
+                            "ORDER BY storedtext(ScriptCode) ASC;",
                             (plugin["PluginName"],),
                         )
                         fetchData = self.dbConnection.fetchall()
@@ -2135,7 +2126,7 @@ class DBToFiles:
 
                 try:
                     self.dbConnection.execute(
-                        "SELECT ProcCode FROM ProcCodes WHERE ProcName=?;",
+                        "SELECT storedtext(ProcCode) AS ProcCode FROM ProcCodes WHERE ProcName=?;",
                         (procedure["ProcName"],),
                     )
                     fetchData = self.dbConnection.fetchall()
@@ -2519,202 +2510,146 @@ class DBToFiles:
             self.logger.error("Error fetching WidgetNamedSets data: " + str(e))
             print("Error fetching WidgetNamedSets data: ", str(e))
 
-        for workspace in workspaceNameList:
-            try:
-                self.dbConnection.execute(
-                    "SELECT * FROM WebLayoutViewWidgets WHERE Workspace=? ORDER BY Pagegroup ASC, Page ASC, View ASC, "
-                    "WidgetName ASC;",
-                    (workspace,),
-                )
-                fetchData = self.dbConnection.fetchall()
-                webLayoutViewWidgetsData = [
-                    {
-                        "Pagegroup": i["Pagegroup"],
-                        "Page": i["Page"],
-                        "View": i["View"],
-                        "WidgetName": i["WidgetName"],
-                        "WidgetTitle": i["WidgetTitle"],
-                        "IsAnchor": i["IsAnchor"],
-                    }
-                    for i in fetchData
-                ]
-                filename = "WorkspaceWebWidgets/" + workspace + ".WebWidgets.csv"
-                self.createCSV(filename, webLayoutViewWidgetsData, True)
-
-            except Exception as e:
-                self.logger.error("Error fetching WebLayoutViewWidgets data: " + str(e))
-                print("Error fetching WebLayoutViewWidgets data: ", str(e))
-
-            try:
-                self.dbConnection.execute(
-                    "SELECT \
-                        vw.Pagegroup, \
-                        vw.Page, \
-                        vw.View, \
-                        ml.WidgetName, \
-                        ml.Type, \
-                        ml.MeasureName, \
-                        ml.IsVisible, \
-                        ml.Formula,\
-                        ml.Color\
-                    from WebLayoutViewWidgets as vw \
-                    INNER JOIN WidgetMeasuresList as ml on vw.WidgetName = ml.WidgetName \
-                    WHERE vw.Workspace = ? \
-                    ORDER BY vw.Pagegroup ASC, vw.Page ASC, vw.View ASC, ml.WidgetName ASC, ml.MeasureName ASC;",
-                    (workspace,),
-                )
-                fetchData = self.dbConnection.fetchall()
-                measureListData = [
-                    {
-                        "Pagegroup": i["Pagegroup"],
-                        "Page": i["Page"],
-                        "View": i["View"],
-                        "Widget": i["WidgetName"],
-                        "Type": i["Type"],
-                        "MeasureName": i["MeasureName"],
-                        "IsVisible": i["IsVisible"],
-                        "Formula": i["Formula"],
-                        "Color": i["Color"],
-                    }
-                    for i in fetchData
-                ]
-                filename = (
-                    "WorkspaceWidgetMeasuresList/"
-                    + workspace
-                    + ".WidgetMeasuresList.csv"
-                )
-                self.createCSV(filename, measureListData, True)
-
-            except Exception as e:
-                self.logger.error("Error fetching WidgetMeasuresList data: " + str(e))
-                print("Error fetching WidgetMeasuresList data: ", str(e))
-
-            try:
-                self.dbConnection.execute(
-                    "SELECT vw.Pagegroup, vw.Page, vw.View, el.WidgetName, el.GraphName, el.EdgeName from "
-                    "WebLayoutViewWidgets as vw INNER JOIN WidgetGraphEdgesList as el on vw.WidgetName = el.WidgetName "
-                    "WHERE vw.Workspace = ? ORDER BY vw.Pagegroup ASC, vw.Page ASC, vw.View ASC, el.WidgetName ASC, "
-                    "el.GraphName ASC, el.EdgeName ASC;",
-                    (workspace,),
-                )
-                fetchData = self.dbConnection.fetchall()
-                graphListData = [
-                    {
-                        "Pagegroup": i["Pagegroup"],
-                        "Page": i["Page"],
-                        "View": i["View"],
-                        "Widget": i["WidgetName"],
-                        "GraphName": i["GraphName"],
-                        "EdgeName": i["EdgeName"],
-                    }
-                    for i in fetchData
-                ]
-                filename = (
-                    "WorkspaceWidgetGraphEdgesList/"
-                    + workspace
-                    + ".WidgetGraphEdgesList.csv"
-                )
-                self.createCSV(filename, graphListData, True)
-
-            except Exception as e:
-                self.logger.error("Error fetching WidgetGraphEdgesList data: " + str(e))
-                print("Error fetching WidgetGraphEdgesList data: ", str(e))
-
-            try:
-                self.dbConnection.execute(
-                    "SELECT * FROM WidgetFilterSharings WHERE WorkspaceName=? ORDER BY PageGroupName ASC, PageName ASC,"
-                    " ViewName ASC, WidgetName ASC, DimName ASC;",
-                    (workspace,),
-                )
-                fetchData = self.dbConnection.fetchall()
-                widgetFilterSharingsData = [
-                    {
-                        "PageGroupName": i["PageGroupName"],
-                        "PageName": i["PageName"],
-                        "ViewName": i["ViewName"],
-                        "WidgetName": i["WidgetName"],
-                        "DimName": i["DimName"],
-                        "AttributeName": i["AttributeName"],
-                        "Scope": i["Scope"],
-                        "MemberFilterExpression": i["MemberFilterExpression"],
-                    }
-                    for i in fetchData
-                ]
-                filename = (
-                    "WorkspaceWidgetFilterSharings/"
-                    + workspace
-                    + ".WidgetFilterSharings.csv"
-                )
-                self.createCSV(filename, widgetFilterSharingsData, True)
-
-            except Exception as e:
-                self.logger.error("Error fetching WidgetFilterSharings data: " + str(e))
-                print("Error fetching WidgetFilterSharings data: ", str(e))
-
-            # WidgetFilterLinkings
-            try:
-                self.dbConnection.execute(
-                    "SELECT * FROM WidgetFilterLinkings WHERE WorkspaceName=? ORDER BY PageGroupName ASC, PageName ASC,"
-                    " ViewName ASC, WidgetName ASC, DimName ASC;",
-                    (workspace,),
-                )
-                fetchData = self.dbConnection.fetchall()
-                widgetFilterLinkingsData = [
-                    {
-                        "PageGroupName": i["PageGroupName"],
-                        "PageName": i["PageName"],
-                        "ViewName": i["ViewName"],
-                        "WidgetName": i["WidgetName"],
-                        "DimName": i["DimName"],
-                        "AttributeName": i["AttributeName"],
-                        "Scope": i["Scope"],
-                    }
-                    for i in fetchData
-                ]
-                filename = (
-                    "WorkspaceWidgetFilterLinkings/"
-                    + workspace
-                    + ".WidgetFilterLinkings.csv"
-                )
-                self.createCSV(filename, widgetFilterLinkingsData, True)
-
-            except Exception as e:
-                self.logger.error("Error fetching WidgetFilterLinkings data: " + str(e))
-                print("Error fetching WidgetFilterLinkings data: ", str(e))
+        # Per workspace files, every table is read once ordered by workspace and split while streaming.
+        self.createWorkspaceCSVFiles(
+            "SELECT Workspace AS WorkspaceKey, * FROM WebLayoutViewWidgets "
+            "ORDER BY Workspace ASC, Pagegroup ASC, Page ASC, View ASC, WidgetName ASC;",
+            "WebLayoutViewWidgets",
+            "WebWidgets",
+            {
+                "Pagegroup": "Pagegroup",
+                "Page": "Page",
+                "View": "View",
+                "WidgetName": "WidgetName",
+                "WidgetTitle": "WidgetTitle",
+                "IsAnchor": "IsAnchor",
+            },
+            workspaceNameList,
+        )
+        self.createWorkspaceCSVFiles(
+            "SELECT vw.Workspace AS WorkspaceKey, vw.Pagegroup, vw.Page, vw.View, ml.WidgetName, ml.Type, "
+            "ml.MeasureName, ml.IsVisible, ml.Formula, ml.Color from WebLayoutViewWidgets as vw "
+            "INNER JOIN WidgetMeasuresList as ml on vw.WidgetName = ml.WidgetName "
+            "ORDER BY vw.Workspace ASC, vw.Pagegroup ASC, vw.Page ASC, vw.View ASC, ml.WidgetName ASC, "
+            "ml.MeasureName ASC;",
+            "WidgetMeasuresList",
+            "WidgetMeasuresList",
+            {
+                "Pagegroup": "Pagegroup",
+                "Page": "Page",
+                "View": "View",
+                "Widget": "WidgetName",
+                "Type": "Type",
+                "MeasureName": "MeasureName",
+                "IsVisible": "IsVisible",
+                "Formula": "Formula",
+                "Color": "Color",
+            },
+            workspaceNameList,
+        )
+        self.createWorkspaceCSVFiles(
+            "SELECT vw.Workspace AS WorkspaceKey, vw.Pagegroup, vw.Page, vw.View, el.WidgetName, el.GraphName, "
+            "el.EdgeName from WebLayoutViewWidgets as vw "
+            "INNER JOIN WidgetGraphEdgesList as el on vw.WidgetName = el.WidgetName "
+            "ORDER BY vw.Workspace ASC, vw.Pagegroup ASC, vw.Page ASC, vw.View ASC, el.WidgetName ASC, "
+            "el.GraphName ASC, el.EdgeName ASC;",
+            "WidgetGraphEdgesList",
+            "WidgetGraphEdgesList",
+            {
+                "Pagegroup": "Pagegroup",
+                "Page": "Page",
+                "View": "View",
+                "Widget": "WidgetName",
+                "GraphName": "GraphName",
+                "EdgeName": "EdgeName",
+            },
+            workspaceNameList,
+        )
+        self.createWorkspaceCSVFiles(
+            "SELECT WorkspaceName AS WorkspaceKey, * FROM WidgetFilterSharings ORDER BY WorkspaceName ASC, "
+            "PageGroupName ASC, PageName ASC, ViewName ASC, WidgetName ASC, DimName ASC;",
+            "WidgetFilterSharings",
+            "WidgetFilterSharings",
+            {
+                "PageGroupName": "PageGroupName",
+                "PageName": "PageName",
+                "ViewName": "ViewName",
+                "WidgetName": "WidgetName",
+                "DimName": "DimName",
+                "AttributeName": "AttributeName",
+                "Scope": "Scope",
+                "MemberFilterExpression": "MemberFilterExpression",
+            },
+            workspaceNameList,
+        )
+        self.createWorkspaceCSVFiles(
+            "SELECT WorkspaceName AS WorkspaceKey, * FROM WidgetFilterLinkings ORDER BY WorkspaceName ASC, "
+            "PageGroupName ASC, PageName ASC, ViewName ASC, WidgetName ASC, DimName ASC;",
+            "WidgetFilterLinkings",
+            "WidgetFilterLinkings",
+            {
+                "PageGroupName": "PageGroupName",
+                "PageName": "PageName",
+                "ViewName": "ViewName",
+                "WidgetName": "WidgetName",
+                "DimName": "DimName",
+                "AttributeName": "AttributeName",
+                "Scope": "Scope",
+            },
+            workspaceNameList,
+        )
+        self.createWorkspaceCSVFiles(
+            "SELECT WorkspaceName AS WorkspaceKey, * FROM WidgetInfoContext ORDER BY WorkspaceName ASC, "
+            "PageGroupName ASC, PageName ASC, ViewName ASC, WidgetName ASC, Title ASC;",
+            "WidgetInfoContext",
+            "WidgetInfoContext",
+            {
+                "PageGroupName": "PageGroupName",
+                "PageName": "PageName",
+                "ViewName": "ViewName",
+                "WidgetName": "WidgetName",
+                "MemberInfo": "MemberInfo",
+                "Title": "Title",
+                "UnreadOnly": "UnreadOnly",
+                "MemberIndicator": "MemberIndicator",
+                "LastNDays": "LastNDays",
+                "Folders": "Folders",
+                "IsShowTask": "IsShowTask",
+                "TaskIndicator": "TaskIndicator",
+            },
+            workspaceNameList,
+        )
 
-            # WidgetInfoContext
-            try:
-                self.dbConnection.execute(
-                    "SELECT * FROM WidgetInfoContext WHERE WorkspaceName=? ORDER BY PageGroupName ASC, "
-                    "PageName ASC, ViewName ASC, WidgetName ASC, Title ASC;",
-                    (workspace,),
-                )
-                fetchData = self.dbConnection.fetchall()
-                widgetInfoContextData = [
-                    {
-                        "PageGroupName": i["PageGroupName"],
-                        "PageName": i["PageName"],
-                        "ViewName": i["ViewName"],
-                        "WidgetName": i["WidgetName"],
-                        "MemberInfo": i["MemberInfo"],
-                        "Title": i["Title"],
-                        "UnreadOnly": i["UnreadOnly"],
-                        "MemberIndicator": i["MemberIndicator"],
-                        "LastNDays": i["LastNDays"],
-                        "Folders": i["Folders"],
-                        "IsShowTask": i["IsShowTask"],
-                        "TaskIndicator": i["TaskIndicator"],
-                    }
-                    for i in fetchData
+    def createWorkspaceCSVFiles(
+        self, query, tableName, fileType, columns, workspaceNameList
+    ):
+        """
+        Create one csv file per workspace from a query ordered by workspace.
+        :param query: query returning the workspace as first column, ordered by workspace
+        :param tableName: table name used in the log messages
+        :param fileType: file type used in the folder and file names
+        :param columns: dict of csv header to query column
+        :param workspaceNameList: workspaces for which files are created
+        :return: null
+        """
+        workspaceSet = set(workspaceNameList)
+        try:
+            rowCursor = self.dbConn.execute(query)
+            for workspace, rows in groupby(rowCursor, key=itemgetter(0)):
+                if workspace not in workspaceSet:
+                    continue
+                workspaceData = [
+                    {header: i[column] for header, column in columns.items()}
+                    for i in rows
                 ]
                 filename = (
-                    "WorkspaceWidgetInfoContext/" + workspace + ".WidgetInfoContext.csv"
+                    "Workspace" + fileType + "/" + workspace + "." + fileType + ".csv"
                 )
-                self.createCSV(filename, widgetInfoContextData, True)
+                self.createCSV(filename, workspaceData, True)
 
-            except Exception as e:
-                self.logger.error("Error fetching WidgetInfoContext data: " + str(e))
-                print("Error fetching WidgetInfoContext data: ", str(e))
+        except Exception as e:
+            self.logger.error("Error fetching " + tableName + " data: " + str(e))
+            print("Error fetching " + tableName + " data: ", str(e))
 
     def createTranslationFileArray(self):
         """
@@ -3071,6 +3006,31 @@ class DBToFiles:
             self.logger.error("Error fetching UIDependencies data: " + str(e))
             print("Error fetching UIDependencies data: ", str(e))
 
+        # MeasureXRef file
+        try:
+            self.dbConnection.execute(
+                "SELECT * FROM MeasureXRef ORDER BY MeasureName ASC, MeasureType ASC, EntityType ASC, "
+                "EntityName ASC, Role ASC;"
+            )
+            fetchData = self.dbConnection.fetchall()
+            measureXRefList = [
+                {
+                    "MeasureName": i["MeasureName"],
+                    "MeasureType": i["MeasureType"],
+                    "EntityType": i["EntityType"],
+                    "EntityName": i["EntityName"],
+                    "Role": i["Role"],
+                    "SourceTable": i["SourceTable"],
+                }
+                for i in fetchData
+            ]
+            filename = "ModelDependencies/MeasureXRef.csv"
+            self.createCSV(filename, measureXRefList)
+
+        except Exception as e:
+            self.logger.error("Error fetching MeasureXRef data: " + str(e))
+            print("Error fetching MeasureXRef data: ", str(e))
+
         # Formulae file
         try:
             self.dbConnection.execute(
@@ -3107,19 +3067,8 @@ class DBToFiles:
         :return: null
         """
         if len(data) > 0:
-            if ui is True:
-                dirName = os.path.join(self.uiFilePath, fileName)
-            else:
-                dirName = os.path.join(self.modelFilePath, fileName)
-            if not os.path.exists(os.path.dirname(dirName)):
-                try:
-                    os.makedirs(os.path.dirname(dirName))
-                except OSError as exc:  # Guard against race condition
-                    if exc.errno != errno.EEXIST:
-                        raise
-            with open(dirName, "w", newline="", encoding="utf-8") as csvFile:
-                if data == []:
-                    return
+            rootDir = self.uiFilePath if ui is True else self.modelFilePath
+            with self.fileSink.openText(rootDir, fileName) as csvFile:
                 fileWriter = csv.writer(
                     csvFile, delimiter=",", quotechar='"', quoting=csv.QUOTE_MINIMAL
                 )
@@ -3137,22 +3086,23 @@ class DBToFiles:
         :param ui: if to be added to ui or model folder
         :return: null
         """
-        if ui:
-            dirName = os.path.join(self.uiFilePath, fileName)
-        else:
-            dirName = os.path.join(self.modelFilePath, fileName)
-        if not os.path.exists(os.path.dirname(dirName)):
-            try:
-                os.makedirs(os.path.dirname(dirName))
-            except OSError as exc:  # Guard against race condition
-                if exc.errno != errno.EEXIST:
-                    raise
-        with open(dirName, "w", newline="", encoding="utf-8") as txtFile:
-            txtFile.write(dataBody)
+        rootDir = self.uiFilePath if ui else self.modelFilePath
+        self.fileSink.writeText(rootDir, fileName, dataBody)
 
         self.logger.info("Data Written in file: " + fileName)
         return
 
+    def close(self, deleteStale=True):
+        """
+        Finish writing files and report the files added, changed, unchanged and deleted in this run.
+        :param deleteStale: False when only part of the files were produced, files of earlier runs are kept
+        :return: dict with the file counts
+        """
+        if deleteStale:
+            self.fileSink.addRoot(self.modelFilePath)
+            self.fileSink.addRoot(self.uiFilePath)
+        return self.fileSink.close(deleteStale)
+
     @staticmethod
     def replaceNewLine(inputString):
         """
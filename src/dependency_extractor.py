@@ -1,44 +1,73 @@
 import logging
 import re
+
+from namescanner import NameScanner
 from tables import insertData
 
+# Statements of insertData, split once per process.
+outputParameterInserts = [
+    x.strip() for x in insertData.split(";") if x.strip().startswith("INSERT")
+]
+
 
 class DependencyExtractor:
-    def __init__(self, dbConnection):
+    # Methods of extractModelDependencies, in execution order.
+    modelDependencySteps = (
+        "insertOutputParameterData",
+        "processMeasureConditionalFormats",
+        "activeRuleMeasureDependencies",
+        "procMeasureDependencies",
+        "actionButtonMeasureDependencies",
+        "pluginInvocationForJSRule",
+        "processMeasureTwins",
+        "processMeasureFormulae",
+        "processMeasureSpread",
+        "processRGenPluginInputQueries",
+        "processRGenPluginInputTables",
+        "processRGenPluginOutputTables",
+        "processPythonPluginInputTables",
+        "processTenantPluginDetails",
+        "processNonRPluginParams",
+        "processPluginScripts",
+    )
+    # Plugin script tables scanned for measure and edge names.
+    pluginScriptTables = (
+        "RGenPluginScripts",
+        "RTimePluginScripts",
+        "PythonPluginScripts",
+        "PySparkPluginScripts",
+    )
+
+    def __init__(self, dbConnection, tenantIndex=None, extractAll=True):
         """
         DependencyExtractor Constructor.
         :param dbConnection: database connection
+        :param tenantIndex: TenantModelIndex of the json data, the measure names are read from the database if not given
+        :param extractAll: extract all the dependencies right away, else the caller runs the stages it needs
         """
         self.dbConnection = dbConnection.cursor()
+        self.tenantIndex = tenantIndex
         self.logger = logging.getLogger("extractor-logger")
-        self.insertOutputParameterData()
-        self.processMeasureConditionalFormats()
-        self.activeRuleMeasureDependencies()
-        self.procMeasureDependencies()
-        self.actionButtonMeasureDependencies()
-        self.pluginInvocationForJSRule()
-        self.processMeasureTwins()
-        self.processMeasureFormulae()
-        self.processMeasureSpread()
-        self.processRGenPluginInputQueries()
-        self.processRGenPluginInputTables()
-        self.processRGenPluginOutputTables()
-        self.processPythonPluginInputTables()
-        self.processTenantPluginDetails()
-        self.processNonRPluginParams()
-        self.processWidgetDependencies()
-        self.cleanDependenciesTable()
+        if extractAll:
+            self.extractModelDependencies()
+            self.processWidgetDependencies()
+            self.cleanDependenciesTable()
+            self.createMeasureXRef()
+
+    def extractModelDependencies(self):
+        """
+        Extract the dependencies of measures, rules, procedures, plugins and action buttons.
+        """
+        for step in self.modelDependencySteps:
+            getattr(self, step)()
 
     def insertOutputParameterData(self):
         """
         Insert the output parameters data and update the param type in the NonRPluginParams table.
         """
-        insertList = insertData.split(";")
-        for insert in insertList:
-            insert = insert.strip()
+        for insert in outputParameterInserts:
             try:
-                if insert.startswith("INSERT"):
-                    self.dbConnection.execute(insert)
+                self.dbConnection.execute(insert)
             except Exception as e:
                 print("Cannot insert row: " + str(e))
                 self.logger.error("Cannot insert row: " + str(e))
@@ -74,6 +103,43 @@ class DependencyExtractor:
         )
         self.dbConnection.execute("DROP TABLE IF EXISTS TEMPUIDependencies;")
 
+    def createMeasureXRef(self):
+        """
+        Create the MeasureXRef table: every entity referencing a measure or edge, with the role of the reference
+        (read, write, display or filter), from the dependency tables and the plugin and widget tables not in them.
+        Indexed on the measure name, so the usage of a measure is one lookup.
+        """
+        self.logger.info("Create Measure Cross Reference.")
+        sourceQueries = [
+            # Measures written and read by rules, procedures, action buttons, plugins, formulae, twins and spreads.
+            # The entity of a formula is the measure it computes.
+            'SELECT TenantName, trim(LHS), LHSType, EntityType, coalesce(EntityName, LHS), "write", '
+            '"ModelDependencies" FROM ModelDependencies WHERE LHSType IN ("Measure", "Edge") AND LHS != ""',
+            'SELECT TenantName, trim(RHS), RHSType, EntityType, coalesce(EntityName, LHS), "read", '
+            '"ModelDependencies" FROM ModelDependencies WHERE RHSType IN ("Measure", "Edge") AND RHS != ""',
+            # Measures shown, formatted or filtered on by widgets, conditional formats and validations.
+            'SELECT TenantName, trim(RHS), RHSType, EntityType, EntityName, CASE WHEN EntityType="Measure" THEN '
+            '"read" WHEN EntityType="ConditionalFormats" OR DependencyType IN ("Regular", "Transient", '
+            '"InterDependentMeasure", "Association Measure") THEN "display" ELSE "filter" END, "UIDependencies" '
+            'FROM UIDependencies WHERE RHSType IN ("Measure", "Edge") AND RHS != ""',
+            'SELECT TenantName, MeasureName, Type, "PythonPlugin", PluginName, "write", "PythonPluginOutputMeasures" '
+            "FROM PythonPluginOutputMeasures WHERE MeasureName IS NOT NULL",
+            'SELECT TenantName, MeasureName, "Measure", "RTimePlugin", PluginName, "read", "RTimePluginInputs" '
+            "FROM RTimePluginInputs WHERE MeasureName IS NOT NULL",
+            'SELECT TenantName, MeasureName, "Measure", "RTimePlugin", PluginName, "write", "RTimePluginOutputs" '
+            "FROM RTimePluginOutputs WHERE MeasureName IS NOT NULL",
+            'SELECT TenantName, EdgeName, "Edge", "Widget", WidgetName, "display", "WidgetGraphEdgesList" '
+            "FROM WidgetGraphEdgesList WHERE EdgeName IS NOT NULL",
+        ]
+        self.dbConnection.execute("DELETE FROM MeasureXRef;")
+        self.dbConnection.execute(
+            "INSERT INTO MeasureXRef (TenantName, MeasureName, MeasureType, EntityType, EntityName, Role, "
+            "SourceTable) " + " UNION ".join(sourceQueries) + ";"
+        )
+        self.dbConnection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_MeasureXRef_MeasureName ON MeasureXRef (MeasureName);"
+        )
+
     def processWidgetDependencies(self):
         """
         Process widget measure list dependencies.
@@ -228,6 +294,51 @@ class DependencyExtractor:
             'GraphEdges as g where n.ParamValue=g.PropertyName AND n.ParamType="Input";'
         )
 
+    def processPluginScripts(self):
+        """
+        Scan the R, RTime, Python and PySpark plugin scripts for the names of all the measures and edges, all names in
+        one pass per script. The output measures of a python plugin are written by it, the other names are read.
+        """
+        self.logger.info("Process Plugin Scripts Dependencies.")
+        self.dbConnection.execute("SELECT DISTINCT PropertyName FROM GraphEdges;")
+        nameTypes = {x["PropertyName"]: "Edge" for x in self.dbConnection.fetchall()}
+        if self.tenantIndex is not None:
+            measureNames = self.tenantIndex.measureNameToPlanGroup
+        else:
+            self.dbConnection.execute("SELECT DISTINCT MeasureName FROM Measures;")
+            measureNames = [x["MeasureName"] for x in self.dbConnection.fetchall()]
+        nameTypes.update({x: "Measure" for x in measureNames})
+        nameScanner = NameScanner(nameTypes)
+        self.dbConnection.execute(
+            "SELECT PluginName, MeasureName FROM PythonPluginOutputMeasures;"
+        )
+        outputMeasures = {
+            (x["PluginName"], x["MeasureName"]) for x in self.dbConnection.fetchall()
+        }
+        depData = []
+        for tableName in self.pluginScriptTables:
+            self.dbConnection.execute(
+                f"SELECT TenantName, PluginName, storedtext(ScriptCode) AS ScriptCode FROM {tableName};"
+            )
+            for i in self.dbConnection.fetchall():
+                for name in sorted(nameScanner.findNames(i["ScriptCode"])):
+                    isOutput = (i["PluginName"], name) in outputMeasures
+                    depData.append(
+                        {
+                            "TenantName": i["TenantName"],
+                            "LHSType": nameTypes[name] if isOutput else None,
+                            "LHS": name if isOutput else None,
+                            "RHSType": None if isOutput else nameTypes[name],
+                            "RHS": None if isOutput else name,
+                            "EntityType": tableName,
+                            "EntityName": i["PluginName"],
+                            "Scope": None,
+                            "Formula": "Refer Plugin code",
+                            "NamedSets": None,
+                        }
+                    )
+        self.insertIntoDependencyTable(depData)
+
     def processTenantPluginDetails(self):
         """
         Process tenant plugin dependencies.
@@ -715,7 +826,9 @@ class DependencyExtractor:
         """
         self.logger.info("Extracting Procedures measures dependencies.")
         try:
-            self.dbConnection.execute("SELECT * FROM ProcCodes;")
+            self.dbConnection.execute(
+                "SELECT TenantName, ProcName, storedtext(ProcCode) AS ProcCode FROM ProcCodes;"
+            )
             fetchData = self.dbConnection.fetchall()
             procCodeData = [
                 {
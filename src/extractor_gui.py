@@ -1,7 +1,5 @@
-import errno
 import logging
 import os
-import sqlite3
 import sys
 import threading
 from tkinter import E, FALSE, N, S, W
@@ -11,12 +9,9 @@ from tkinter.constants import DISABLED, NORMAL
 from tkinter.font import nametofont
 
 from commondatafuncs import CommonDataFunction
-from dbtofile import DBToFiles
-from dependency_extractor import DependencyExtractor
-from modelextractor import ModelExtractor
-from ruleextractor import RuleExtractor
-from tables import tablesData
-from uiextractor import UIExtractor
+from filesinks import archiveFormats
+from instrumentation import StageRecorder
+from tenantextraction import TenantExtraction
 
 
 class ExtractorGUI:
@@ -42,6 +37,8 @@ class ExtractorGUI:
         self.selectUICheckBox = None
         self.selectDepCheckBox = None
         self.selectXLSXCheckBox = None
+        self.selectColumnarCheckBox = None
+        self.selectSearchCheckBox = None
         self.startExtractionButton = None
         self.statusLabelForFileFrame = None
         self.getExtractionDataThread = None
@@ -49,6 +46,9 @@ class ExtractorGUI:
         self.selectCSVCheckBox = None
         self.outputLabel = None
         self.selectMeasureUsageCheckBox = None
+        self.selectProfileCheckBox = None
+        self.archiveFormatLabel = None
+        self.archiveFormatComboBox = None
         self.destinationDir = StringVar()
         self.logFileDest = StringVar()
         self.zipFile = StringVar()
@@ -57,9 +57,15 @@ class ExtractorGUI:
         self.selectUI = IntVar()
         self.selectDep = IntVar()
         self.selectXLSX = IntVar()
+        self.selectColumnar = IntVar()
+        self.selectSearch = IntVar()
         self.selectCSV = IntVar()
         self.selectMeasureUsage = IntVar()
+        self.selectProfile = IntVar()
+        self.archiveFormat = StringVar()
         self.extractionStatus = "Error"
+        self.extractionProgress = None
+        self.recorder = None
         self.note = None
         self.logger = None
         self.master = master
@@ -120,8 +126,12 @@ class ExtractorGUI:
         self.selectUI.set(1)
         self.selectDep.set(1)
         self.selectXLSX.set(0)
+        self.selectColumnar.set(0)
+        self.selectSearch.set(0)
         self.selectCSV.set(0)
         self.selectMeasureUsage.set(1)
+        self.selectProfile.set(0)
+        self.archiveFormat.set("folder")
 
     def createWidgets(self):
         """
@@ -217,6 +227,33 @@ class ExtractorGUI:
         )
         self.selectCSVCheckBox.grid(row=7, column=3, padx=10, pady=10)
 
+        self.selectColumnarCheckBox = ttk.Checkbutton(
+            self.selectExtGroup, variable=self.selectColumnar, text="parquet"
+        )
+        self.selectColumnarCheckBox.grid(row=7, column=4, padx=10, pady=10)
+
+        self.selectSearchCheckBox = ttk.Checkbutton(
+            self.selectExtGroup, variable=self.selectSearch, text="search index"
+        )
+        self.selectSearchCheckBox.grid(row=7, column=5, padx=10, pady=10)
+
+        self.archiveFormatLabel = ttk.Label(self.selectExtGroup, text="csv files in:")
+        self.archiveFormatLabel.grid(row=8, column=1, padx=10, pady=10)
+
+        self.archiveFormatComboBox = ttk.Combobox(
+            self.selectExtGroup,
+            textvariable=self.archiveFormat,
+            values=["folder"] + list(archiveFormats),
+            state="readonly",
+            width=8,
+        )
+        self.archiveFormatComboBox.grid(row=8, column=2, padx=10, pady=10)
+
+        self.selectProfileCheckBox = ttk.Checkbutton(
+            self.selectExtGroup, variable=self.selectProfile, text="Profile"
+        )
+        self.selectProfileCheckBox.grid(row=8, column=3, padx=10, pady=10)
+
         self.startExtractionButton = ttk.Button(
             self.fileFrame, text="Start Extraction", command=self.startExtractionClicked
         )
@@ -318,6 +355,7 @@ class ExtractorGUI:
         :return: null
         """
         if self.getExtractionDataThread.is_alive():
+            self.updateProgressBars()
             self.fileFrame.after(100, self.startExtractionCompletionCheck)
         else:
             self.stopProgressBars()
@@ -335,148 +373,96 @@ class ExtractorGUI:
         Read the json file from the zip file and extract data from the json file.
         :return: null
         """
-        commonObj = CommonDataFunction()
+        profileDir = None
+        if self.getExtractionOptions()["profile"]:
+            profileDir = os.path.splitext(self.logFileName)[0] + "_profile"
+        self.recorder = StageRecorder(self.setExtractionProgress, profileDir)
+        self.recorder.runInfo["AppVersion"] = self.version
         if self.guiOption["ui"]:
-            commonObj.readJsonFile(self.zipFile.get(), self.destinationDir.get())
+            zipFile = self.zipFile.get()
+            destinationDir = self.destinationDir.get()
         else:
-            commonObj.readJsonFile(
-                self.guiOption["nonUIZippedJSON"], self.guiOption["nonUIDestDir"]
-            )
+            zipFile = self.guiOption["nonUIZippedJSON"]
+            destinationDir = self.guiOption["nonUIDestDir"]
+        tenantExtraction = TenantExtraction(
+            self.getExtractionOptions(), recorder=self.recorder
+        )
+        if self.getExtractionOptions()["incremental"]:
+            if tenantExtraction.skipUnchangedTenant(zipFile, destinationDir):
+                self.tenantDataDBName = tenantExtraction.tenantDataDBName
+                self.extractionStatus = "Success"
+                return
+        commonObj = CommonDataFunction()
+        with self.recorder.stage("jsonLoad"):
+            commonObj.readJsonFile(zipFile, destinationDir)
         self.destDir = commonObj.destDir
         self.uiDestDir = commonObj.uiDestDir
-        self.createDB(commonObj.destPath, commonObj.jsonData)
+        self.createDB(
+            commonObj.destPath,
+            commonObj.jsonData,
+            commonObj.tenantIndex,
+            tenantExtraction,
+            zipFile,
+        )
 
-    def createDB(self, location, data):
+    def createDB(
+        self, location, data, tenantIndex=None, tenantExtraction=None, zipFile=None
+    ):
         """
         Create the database, all the tables in the database and Extract the model, ui and dependencies data.
         :param location: destination location for the database
         :param data: json data as dict
+        :param tenantIndex: TenantModelIndex of the json data, built here if not given
+        :param tenantExtraction: TenantExtraction running the extraction, created here if not given
+        :param zipFile: tenant zip file location
         :return: null
         """
-        self.tenantDataDBName = os.path.join(location, data["Tenant"]["Name"] + ".db")
-        if not os.path.exists(os.path.dirname(self.tenantDataDBName)):
-            try:
-                os.makedirs(os.path.dirname(self.tenantDataDBName))
-            except OSError as exc:  # Guard against race condition
-                if exc.errno != errno.EEXIST:
-                    raise
-        try:
-            # creating a connection
-            tenantDataDBConnection = sqlite3.connect(self.tenantDataDBName)
-            tenantDataDBConnection.isolation_level = (
-                "DEFERRED"  # Set None for auto-commit.
+        if tenantExtraction is None:
+            tenantExtraction = TenantExtraction(
+                self.getExtractionOptions(), recorder=self.recorder
             )
-            tenantDataDBConnection.row_factory = sqlite3.Row  # faster access to data
-            # tenantDataDBconnection.set_trace_callback(print)  # To debug all sqlite callback
-            # tenantDataDBconnection = tenantDataDBconnection.cursor()
-            self.logger.info(
-                "Tenant Database created successfully at " + self.tenantDataDBName
-            )
-            tableList = tablesData.split(";")
-            for table in tableList:
-                table = table.strip()
-                try:
-                    if table.startswith("DROP") or table.startswith("CREATE TABLE"):
-                        tenantDataDBConnection.execute(table)
-                except Exception as e:
-                    print("Cannot create table: " + str(e))
-                    self.logger.error("Cannot create table: " + str(e))
-            self.logger.info("All Tables added in the database.")
-
-        except Exception as e:
-            self.logger.error("Error creating Tenant Database " + str(e))
-            print("Error creating Tenant Database " + str(e))
-            return
-
-        isSelectModel = True
-        isSelectDep = True
-        isSelectUI = True
-        if self.guiOption["ui"]:
-            isSelectModel = True if self.selectModel.get() == 1 else False
-            isSelectDep = True if self.selectDep.get() == 1 else False
-            isSelectUI = True if self.selectUI.get() == 1 else False
-
-        # Parse and insert data in the table
-        modelExtractor = ModelExtractor(
-            tenantDataDBConnection, data, self.selectMeasureUsage.get()
+        isExtracted = tenantExtraction.extract(
+            location, data, self.destDir, self.uiDestDir, tenantIndex, zipFile
         )
-        if isSelectModel or isSelectDep:
-            self.logger.info("Extracting Dimensions Data")
-            print("Extracting Dimensions Data")
-            modelExtractor.createDimTablesInDB()
-            self.logger.info("Extracting Graph Data")
-            print("Extracting Graph Data")
-            modelExtractor.createGraphTablesInDB()
-            self.logger.info("Extracting Plans Data")
-            print("Extracting Plans Data")
-            modelExtractor.createPlanTablesInDB()
-
-        ruleExtractor = RuleExtractor(data, tenantDataDBConnection)
-        if isSelectModel or isSelectDep:
-            self.logger.info("Extracting Rules Data")
-            print("Extracting Rules Data")
-            ruleExtractor.extractRules()
-            ruleExtractor.extractIBPLRules()
-
-        uiExtractor = UIExtractor(data, tenantDataDBConnection)
-        if isSelectUI or isSelectDep:
-            self.logger.info("Extracting Widgets Data")
-            print("Extracting Widgets Data")
-            uiExtractor.createWidgetTablesInDB()
-            self.logger.info("Extracting Web Widgets Data")
-            print("Extracting Web Widgets Data")
-            uiExtractor.createWebLayoutTablesInDB()
-            self.logger.info("Extracting Excel Widgets Data")
-            print("Extracting Excel Widgets Data")
-            uiExtractor.createExcelLayoutTablesInDB()
-            self.logger.info("Extracting Translation Data")
-            print("Extracting Translation Data")
-            uiExtractor.createTranslationTablesInDB()
-            self.logger.info("Extracting Action button Data")
-            print("Extracting Action button Data")
-            uiExtractor.createActionButtonTableInDB()
-
-        # Measure dependencies
-        # try:
-        if isSelectDep:
-            self.logger.info("Extracting Dependencies table")
-            print("Extracting Dependencies table")
-            DependencyExtractor(tenantDataDBConnection)
-            self.logger.info("Done with Dependencies table")
-        # except Exception as e:
-        #     self.logger.error('Error in Measure Dependencies Generation: ' + str(e))
-        #     print('Error in Measure Dependencies Generation: ' + str(e))
-        #     return
-
-        dbToFiles = DBToFiles(tenantDataDBConnection, self.destDir, self.uiDestDir)
-        if self.selectCSV.get():
-            self.logger.info("Creating CSV Files.")
-            print("Creating CSV Files.")
-            # dbToFiles.generateCSVArrays()
-            dbToFiles.createDimCSVArrays()
-            dbToFiles.createGraphCSVArrays()
-            dbToFiles.createPlanCSVArrays()
-            dbToFiles.createActionButtonCSVArrays()
-            dbToFiles.createRuleFilesArray()
-            dbToFiles.createPluginsCSVArrays()
-            dbToFiles.createProceduresFilesArray()
-            dbToFiles.createUIFilesArray()
-            dbToFiles.createTranslationFileArray()
-            dbToFiles.createExcelFilesArray()
-            dbToFiles.createDependenciesCSVArray()
-            dbToFiles.createDSRulesFile()
-        if self.selectXLSX.get():
-            dbToFiles.createExcelFromDB()
-        self.logger.info("Completed Extraction")
-        print("Completed Extraction")
-        try:
-            tenantDataDBConnection.commit()
-            tenantDataDBConnection.close()
-        except Exception as e:
-            self.logger.error("Unable to Close DB connection " + str(e))
-            print("Unable to Close DB connection " + str(e))
-
-        self.extractionStatus = "Success"
+        self.tenantDataDBName = tenantExtraction.tenantDataDBName
+        if isExtracted:
+            self.extractionStatus = "Success"
+
+    def getExtractionOptions(self):
+        """
+        Get the extraction options selected in the GUI, or from the command line options without GUI.
+        :return: extraction options dict for TenantExtraction
+        """
+        extractionOptions = {
+            "model": True,
+            "ui": True,
+            "dependencies": True,
+            "csv": self.selectCSV.get() == 1,
+            "xlsx": self.selectXLSX.get() == 1,
+            "measureUsage": self.selectMeasureUsage.get() == 1,
+            "profile": bool(self.guiOption.get("profile")),
+            "archive": self.guiOption.get("archive", ""),
+            "outputs": self.guiOption.get("outputs", []),
+            "warehouse": self.guiOption.get("warehouse", ""),
+            "snapshot": self.guiOption.get("snapshot", ""),
+            "incremental": bool(self.guiOption.get("incremental")),
+            "columnar": bool(self.guiOption.get("columnar")),
+            "search": bool(self.guiOption.get("search")),
+        }
+        if self.guiOption["ui"]:
+            extractionOptions["model"] = self.selectModel.get() == 1
+            extractionOptions["ui"] = self.selectUI.get() == 1
+            extractionOptions["dependencies"] = self.selectDep.get() == 1
+            extractionOptions["profile"] = self.selectProfile.get() == 1
+            extractionOptions["columnar"] = self.selectColumnar.get() == 1
+            extractionOptions["search"] = self.selectSearch.get() == 1
+            archiveFormat = self.archiveFormat.get()
+            extractionOptions["archive"] = (
+                "" if archiveFormat == "folder" else archiveFormat
+            )
+        elif extractionOptions["archive"]:
+            extractionOptions["csv"] = True
+        return extractionOptions
 
     def updateStatus(self, updateText, color="sky blue"):
         """
@@ -488,13 +474,41 @@ class ExtractorGUI:
         self.appStatus.set(updateText)
         self.statusLabelForFileFrame.configure(bg=color)
 
+    def setExtractionProgress(self, event):
+        """
+        StageRecorder listener, keeps the last stage event for the progress bar. Called from the extraction thread,
+        the widgets are updated by updateProgressBars on the GUI thread.
+        :param event: stage event dict
+        :return: null
+        """
+        self.extractionProgress = event
+
     def startProgressBars(self):
         """
         Starts all progress bars.
         """
+        self.extractionProgress = None
+        self.progressBarForFileFrame.configure(mode="indeterminate")
         self.progressBarForFileFrame.grid()
         self.progressBarForFileFrame.start()
 
+    def updateProgressBars(self):
+        """
+        Show the completed stages on the progress bar once the number of stages is known.
+        """
+        event = self.extractionProgress
+        if event is None or not event["Total"]:
+            return
+        if str(self.progressBarForFileFrame.cget("mode")) != "determinate":
+            self.progressBarForFileFrame.stop()
+            self.progressBarForFileFrame.configure(
+                mode="determinate", maximum=event["Total"]
+            )
+        self.progressBarForFileFrame.configure(value=event["Completed"])
+        self.appStatus.set(
+            f"Extracting {event['Stage']} ({event['Completed']}/{event['Total']})"
+        )
+
     def stopProgressBars(self):
         """
         Stop all progress bars.
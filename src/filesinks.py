@@ -0,0 +1,383 @@
+import errno
+import hashlib
+import io
+import json
+import logging
+import os
+import tarfile
+import time
+import zipfile
+
+
+class DirectorySink:
+    manifestFileName = ".extractor_manifest.json"
+
+    def __init__(self):
+        """
+        DirectorySink Constructor. Writes exported files to the file system and skips the files whose content is
+        unchanged since the last run, using a hash manifest kept in every output root directory.
+        """
+        self.logger = logging.getLogger("extractor-logger")
+        self.manifests = {}
+        self.writtenFiles = {}
+        self.knownDirs = set()
+        self.counts = {"added": 0, "changed": 0, "unchanged": 0, "deleted": 0}
+
+    def writeText(self, rootDir, fileName, dataBody):
+        """
+        Write a text file below the root directory unless the file already holds the same content.
+        :param rootDir: output root directory (model or ui folder)
+        :param fileName: file name relative to the root directory
+        :param dataBody: file content
+        :return: null
+        """
+        manifest = self.getManifest(rootDir)
+        relName = fileName.replace("\\", "/")
+        filePath = os.path.join(rootDir, fileName)
+        content = dataBody.encode("utf-8")
+        contentHash = hashlib.sha1(content).hexdigest()
+        self.writtenFiles[rootDir].add(relName)
+
+        entry = manifest.get(relName)
+        if entry is not None and entry["hash"] == contentHash:
+            if self.isUnchangedOnDisk(filePath, entry, content):
+                self.counts["unchanged"] += 1
+                return
+        fileExists = entry is not None or os.path.exists(filePath)
+        if entry is None and fileExists:
+            # No manifest entry, e.g. the first run over an earlier export or a git checkout: compare the file.
+            fileStat = self.getIdenticalFileStat(filePath, content)
+            if fileStat is not None:
+                manifest[relName] = {
+                    "hash": contentHash,
+                    "size": fileStat.st_size,
+                    "mtime": fileStat.st_mtime_ns,
+                }
+                self.counts["unchanged"] += 1
+                return
+        self.makeDirs(os.path.dirname(filePath))
+        with open(filePath, "wb") as outFile:
+            outFile.write(content)
+        fileStat = os.stat(filePath)
+        manifest[relName] = {
+            "hash": contentHash,
+            "size": fileStat.st_size,
+            "mtime": fileStat.st_mtime_ns,
+        }
+        self.counts["changed" if fileExists else "added"] += 1
+
+    def openText(self, rootDir, fileName):
+        """
+        Open a text stream for a file below the root directory. Content is written when the stream is closed.
+        :param rootDir: output root directory (model or ui folder)
+        :param fileName: file name relative to the root directory
+        :return: writable text stream
+        """
+        return _SinkTextStream(self, rootDir, fileName)
+
+    @staticmethod
+    def isUnchangedOnDisk(filePath, entry, content):
+        """
+        Check that the file on disk still holds the content recorded in the manifest.
+        :param filePath: file location
+        :param entry: manifest entry of the file
+        :param content: new content as bytes
+        :return: True if the file does not need to be rewritten
+        """
+        try:
+            fileStat = os.stat(filePath)
+        except OSError:
+            return False
+        if fileStat.st_size != entry["size"]:
+            return False
+        if fileStat.st_mtime_ns == entry["mtime"]:
+            return True
+        # File was touched outside the extractor, compare the actual content.
+        with open(filePath, "rb") as inFile:
+            if inFile.read() != content:
+                return False
+        entry["mtime"] = fileStat.st_mtime_ns
+        return True
+
+    @staticmethod
+    def getIdenticalFileStat(filePath, content):
+        """
+        Check if a file already holds the given content.
+        :param filePath: file location
+        :param content: new content as bytes
+        :return: os.stat result of the file if its content is the same, else None
+        """
+        try:
+            fileStat = os.stat(filePath)
+            if fileStat.st_size != len(content):
+                return None
+            with open(filePath, "rb") as inFile:
+                if inFile.read() != content:
+                    return None
+        except OSError:
+            return None
+        return fileStat
+
+    def makeDirs(self, dirName):
+        """
+        Create the directory once per run.
+        :param dirName: directory location
+        :return: null
+        """
+        if dirName in self.knownDirs:
+            return
+        try:
+            os.makedirs(dirName)
+        except OSError as exc:  # Guard against race condition
+            if exc.errno != errno.EEXIST:
+                raise
+        self.knownDirs.add(dirName)
+
+    def addRoot(self, rootDir):
+        """
+        Register an output root directory so stale files below it are removed even if nothing was written to it.
+        :param rootDir: output root directory
+        :return: null
+        """
+        self.getManifest(rootDir)
+
+    def getManifest(self, rootDir):
+        """
+        Get the hash manifest of a root directory, loading it from disk on first use.
+        :param rootDir: output root directory
+        :return: dict of relative file name to hash details
+        """
+        if rootDir not in self.manifests:
+            manifest = {}
+            manifestPath = os.path.join(rootDir, self.manifestFileName)
+            if os.path.isfile(manifestPath):
+                try:
+                    with open(manifestPath, "r", encoding="utf-8") as manifestFile:
+                        manifest = json.load(manifestFile)["files"]
+                except Exception as e:
+                    self.logger.error(
+                        "Ignoring unreadable manifest " + manifestPath + ": " + str(e)
+                    )
+                    manifest = {}
+            self.manifests[rootDir] = manifest
+            self.writtenFiles[rootDir] = set()
+        return self.manifests[rootDir]
+
+    def close(self, deleteStale=True):
+        """
+        Delete files written by an earlier run which were not produced in this run, save the manifests and log the
+        summary of the run.
+        :param deleteStale: False when only part of the files were produced, the other files are kept
+        :return: dict with the count of added, changed, unchanged and deleted files
+        """
+        for rootDir, manifest in self.manifests.items():
+            writtenFiles = self.writtenFiles[rootDir]
+            staleFiles = []
+            if deleteStale:
+                staleFiles = [i for i in manifest if i not in writtenFiles]
+            for relName in staleFiles:
+                filePath = os.path.join(rootDir, relName)
+                try:
+                    os.remove(filePath)
+                    self.counts["deleted"] += 1
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    self.logger.error(
+                        "Unable to delete stale file " + filePath + ": " + str(e)
+                    )
+                del manifest[relName]
+            self.makeDirs(rootDir)
+            with open(
+                os.path.join(rootDir, self.manifestFileName), "w", encoding="utf-8"
+            ) as manifestFile:
+                json.dump(
+                    {"version": 1, "files": manifest}, manifestFile, sort_keys=True
+                )
+        summary = (
+            f"Files added: {self.counts['added']}, changed: {self.counts['changed']}, "
+            f"unchanged: {self.counts['unchanged']}, deleted: {self.counts['deleted']}"
+        )
+        self.logger.info(summary)
+        print(summary)
+        return dict(self.counts)
+
+
+class _SinkTextStream(io.StringIO):
+    def __init__(self, sink, rootDir, fileName):
+        """
+        Text buffer handed out by a sink, flushed to the sink on close.
+        :param sink: owning sink
+        :param rootDir: output root directory
+        :param fileName: file name relative to the root directory
+        """
+        super().__init__(newline="")
+        self.sink = sink
+        self.rootDir = rootDir
+        self.fileName = fileName
+
+    def close(self):
+        if not self.closed:
+            self.sink.writeText(self.rootDir, self.fileName, self.getvalue())
+        super().close()
+
+
+class ZipArchiveSink:
+    def __init__(self, archivePath):
+        """
+        ZipArchiveSink Constructor. Writes exported files into a single zip archive, keeping the folder layout of
+        the destination directory.
+        :param archivePath: zip file location
+        """
+        self.logger = logging.getLogger("extractor-logger")
+        self.archivePath = archivePath
+        self.archive = zipfile.ZipFile(
+            archivePath, "w", compression=zipfile.ZIP_DEFLATED
+        )
+        self.fileCount = 0
+
+    def writeText(self, rootDir, fileName, dataBody):
+        """
+        Add a text file to the archive.
+        :param rootDir: output root directory (model or ui folder)
+        :param fileName: file name relative to the root directory
+        :param dataBody: file content
+        :return: null
+        """
+        self.archive.writestr(
+            archiveMemberName(rootDir, fileName), dataBody.encode("utf-8")
+        )
+        self.fileCount += 1
+
+    def openText(self, rootDir, fileName):
+        """
+        Open a text stream writing straight into an archive member.
+        :param rootDir: output root directory (model or ui folder)
+        :param fileName: file name relative to the root directory
+        :return: writable text stream
+        """
+        self.fileCount += 1
+        memberInfo = zipfile.ZipInfo(
+            archiveMemberName(rootDir, fileName), time.localtime()[:6]
+        )
+        memberInfo.compress_type = zipfile.ZIP_DEFLATED
+        return io.TextIOWrapper(
+            self.archive.open(memberInfo, "w", force_zip64=True),
+            encoding="utf-8",
+            newline="",
+        )
+
+    def addRoot(self, rootDir):
+        """
+        Archives are written from scratch, nothing to track per root directory.
+        :param rootDir: output root directory
+        :return: null
+        """
+
+    def close(self, deleteStale=True):
+        """
+        Close the archive and log the summary of the run.
+        :param deleteStale: unused, archives are written from scratch
+        :return: dict with the count of files written
+        """
+        self.archive.close()
+        summary = f"Files added: {self.fileCount} to archive {self.archivePath}"
+        self.logger.info(summary)
+        print(summary)
+        return {"added": self.fileCount, "changed": 0, "unchanged": 0, "deleted": 0}
+
+
+class TarZstdArchiveSink:
+    def __init__(self, archivePath):
+        """
+        TarZstdArchiveSink Constructor. Writes exported files into a single zstd compressed tar archive, keeping the
+        folder layout of the destination directory.
+        :param archivePath: tar.zst file location
+        """
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError(
+                "tar.zst output needs the zstandard module - pip install zstandard"
+            )
+        self.logger = logging.getLogger("extractor-logger")
+        self.archivePath = archivePath
+        self.rawFile = open(archivePath, "wb")
+        self.compressedFile = zstandard.ZstdCompressor().stream_writer(self.rawFile)
+        self.archive = tarfile.open(fileobj=self.compressedFile, mode="w|")
+        self.fileCount = 0
+
+    def writeText(self, rootDir, fileName, dataBody):
+        """
+        Add a text file to the archive.
+        :param rootDir: output root directory (model or ui folder)
+        :param fileName: file name relative to the root directory
+        :param dataBody: file content
+        :return: null
+        """
+        content = dataBody.encode("utf-8")
+        memberInfo = tarfile.TarInfo(archiveMemberName(rootDir, fileName))
+        memberInfo.size = len(content)
+        memberInfo.mtime = int(time.time())
+        self.archive.addfile(memberInfo, io.BytesIO(content))
+        self.fileCount += 1
+
+    def openText(self, rootDir, fileName):
+        """
+        Open a text stream for an archive member. tar needs the member size upfront, so the content is added when
+        the stream is closed.
+        :param rootDir: output root directory (model or ui folder)
+        :param fileName: file name relative to the root directory
+        :return: writable text stream
+        """
+        return _SinkTextStream(self, rootDir, fileName)
+
+    def addRoot(self, rootDir):
+        """
+        Archives are written from scratch, nothing to track per root directory.
+        :param rootDir: output root directory
+        :return: null
+        """
+
+    def close(self, deleteStale=True):
+        """
+        Close the archive and log the summary of the run.
+        :param deleteStale: unused, archives are written from scratch
+        :return: dict with the count of files written
+        """
+        self.archive.close()
+        self.compressedFile.close()
+        self.rawFile.close()
+        summary = f"Files added: {self.fileCount} to archive {self.archivePath}"
+        self.logger.info(summary)
+        print(summary)
+        return {"added": self.fileCount, "changed": 0, "unchanged": 0, "deleted": 0}
+
+
+archiveFormats = {"zip": ZipArchiveSink, "tar.zst": TarZstdArchiveSink}
+
+
+def createFileSink(archiveFormat, destPath, tenantName):
+    """
+    Create the sink for exported files.
+    :param archiveFormat: "zip", "tar.zst" or empty for plain files in the destination directory
+    :param destPath: destination directory
+    :param tenantName: tenant name, used for the archive name
+    :return: sink instance
+    """
+    if not archiveFormat:
+        return DirectorySink()
+    if archiveFormat not in archiveFormats:
+        raise ValueError("Unknown archive format " + archiveFormat)
+    archivePath = os.path.join(destPath, tenantName + "." + archiveFormat)
+    return archiveFormats[archiveFormat](archivePath)
+
+
+def archiveMemberName(rootDir, fileName):
+    """
+    Archive member name of an exported file, e.g. <Tenant>_Models/ActiveRules/Rule.ibpl.
+    :param rootDir: output root directory (model or ui folder)
+    :param fileName: file name relative to the root directory
+    :return: member name
+    """
+    return (os.path.basename(rootDir) + "/" + fileName).replace("\\", "/")
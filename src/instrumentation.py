@@ -0,0 +1,453 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:  # Optional, peak memory is only reported when profiling without it.
+    psutil = None
+
+
+class PeakMemoryTracker:
+    # Seconds between two samples of the resident memory.
+    sampleInterval = 0.01
+
+    def __init__(self, traceAllocations=False):
+        """
+        PeakMemoryTracker Constructor. Peak memory of every stage of a run and of the whole run. With
+        traceAllocations the python heap is measured with tracemalloc, which is exact but makes allocation heavy code
+        several times slower, so it is only used when profiling. Otherwise the resident memory of the process is
+        sampled with psutil on a background thread while a stage runs. Without psutil nothing is measured.
+        :param traceAllocations: measure the python heap with tracemalloc
+        """
+        self.traceAllocations = traceAllocations
+        if traceAllocations:
+            self.source = "tracemalloc"
+        else:
+            self.source = "rss" if psutil is not None else None
+        self.process = psutil.Process() if self.source == "rss" else None
+        self.startedTracing = False
+        if traceAllocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.startedTracing = True
+        self.peakBytes = self.getCurrentBytes()
+        # Peak of each running stage before its inner stage started, and the peak of the completed inner stages.
+        self.stagePeaks = []
+        self.innerPeak = 0
+        # Memory in use when each running stage started.
+        self.stageStartBytes = []
+        self.stopSampling = None
+        self.samplerThread = None
+
+    def getCurrentBytes(self):
+        """
+        Get the memory in use.
+        :return: bytes, 0 if not measured
+        """
+        if self.traceAllocations:
+            return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        if self.process is not None:
+            return self.process.memory_info().rss
+        return 0
+
+    def getPeakBytes(self):
+        """
+        Get the peak memory since the last reset.
+        :return: bytes
+        """
+        if self.traceAllocations:
+            return tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+        self.peakBytes = max(self.peakBytes, self.getCurrentBytes())
+        return self.peakBytes
+
+    def resetPeak(self):
+        """
+        Restart the peak from the memory in use.
+        :return: null
+        """
+        if self.traceAllocations:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+        else:
+            self.peakBytes = self.getCurrentBytes()
+
+    def sampleMemory(self):
+        """
+        Sample the resident memory until the stage ends. Runs on the sampler thread.
+        :return: null
+        """
+        while not self.stopSampling.wait(self.sampleInterval):
+            self.getPeakBytes()
+
+    def enterStage(self):
+        """
+        Start measuring the peak of a stage.
+        :return: null
+        """
+        self.stagePeaks.append(max(self.innerPeak, self.getPeakBytes()))
+        self.innerPeak = 0
+        self.resetPeak()
+        self.stageStartBytes.append(self.getCurrentBytes())
+        if self.process is not None and self.samplerThread is None:
+            self.stopSampling = threading.Event()
+            self.samplerThread = threading.Thread(target=self.sampleMemory, daemon=True)
+            self.samplerThread.start()
+
+    def exitStage(self):
+        """
+        Stop measuring the peak of a stage. The peak also counts for the stage running it.
+        :return: tuple of the peak memory of the stage and its growth over the memory in use when the stage started,
+        the memory the stage itself needed, in MB, None if not measured
+        """
+        stagePeak = max(self.innerPeak, self.getPeakBytes())
+        startBytes = self.stageStartBytes.pop()
+        self.innerPeak = max(self.stagePeaks.pop(), stagePeak)
+        if not self.stagePeaks and self.samplerThread is not None:
+            self.stopSampling.set()
+            self.samplerThread.join()
+            self.samplerThread = None
+        return self.toMB(stagePeak), self.toMB(max(stagePeak - startBytes, 0))
+
+    def getRunPeakMB(self):
+        """
+        Get the peak memory since the tracker was created.
+        :return: peak memory in MB, None if not measured
+        """
+        return self.toMB(max([self.innerPeak, self.getPeakBytes()] + self.stagePeaks))
+
+    def stop(self):
+        """
+        Stop tracing the allocations started by this tracker.
+        :return: null
+        """
+        if self.startedTracing:
+            self.innerPeak = max(self.innerPeak, self.getPeakBytes())
+            tracemalloc.stop()
+            self.startedTracing = False
+
+    def toMB(self, peakBytes):
+        """
+        Convert a peak to MB.
+        :param peakBytes: bytes
+        :return: MB, None if not measured
+        """
+        if self.source is None:
+            return None
+        return round(peakBytes / (1024 * 1024))
+
+
+def normalizeStatement(statement):
+    """
+    Replace the literals of an SQL statement, so the executions of one statement with different values are grouped.
+    :param statement: SQL statement as traced, with the parameter values
+    :return: statement with the literals replaced by ?
+    """
+    statement = re.sub(r"'(?:[^']|'')*'", "?", statement)
+    statement = re.sub(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b", "?", statement)
+    return " ".join(statement.split())
+
+
+class StageRecorder:
+    profileTopCount = 30
+
+    def __init__(self, listener=None, profileDir=None, countStatements=False):
+        """
+        StageRecorder Constructor. Records the wall time, CPU time, SQL statements, row counts and peak memory of
+        every stage of an extraction, for the run report and the progress of the GUI.
+        :param listener: function called with an event dict when a stage starts or completes, from the extraction
+        thread
+        :param profileDir: directory for the cProfile pstats file of every stage, the SQL statement times and the
+        summary of the hottest functions and statements, None to not profile. When profiling, the peak memory is the
+        python heap traced with tracemalloc, else the resident memory (see PeakMemoryTracker)
+        :param countStatements: count the SQL statements of every stage without profiling. The count needs a python
+        call for every statement, so it is off by default and the stages only record the rows changed
+        """
+        self.logger = logging.getLogger("extractor-logger")
+        self.listener = listener
+        self.runInfo = {"StartedAt": datetime.now().isoformat(timespec="seconds")}
+        self.stageRecords = []
+        self.stageCount = None
+        self.completedCount = 0
+        self.countStatements = bool(countStatements or profileDir)
+        self.statementCount = 0
+        self.dbConnection = None
+        self.traceCallback = None
+        self.startTime = time.perf_counter()
+        self.startCPUTime = time.process_time()
+        self.profileDir = profileDir
+        self.profileSummaries = []
+        # Normalized statement to [executions, seconds], and the statement running with its start time.
+        self.statementTimes = {}
+        self.runningStatement = None
+        self.memoryTracker = PeakMemoryTracker(traceAllocations=bool(profileDir))
+        self.runInfo["MemoryMeasure"] = self.memoryTracker.source
+        if profileDir:
+            os.makedirs(profileDir, exist_ok=True)
+
+    def attach(self, dbConnection):
+        """
+        Record the rows changed on a database connection, and count its SQL statements when profiling or counting
+        them. The row counts of the stage tables are read from it.
+        :param dbConnection: database connection
+        :return: null
+        """
+        self.dbConnection = dbConnection
+        if self.profileDir:
+            self.traceCallback = self.traceStatement
+        elif self.countStatements:
+            self.traceCallback = self.countStatement
+        if self.traceCallback is not None:
+            dbConnection.set_trace_callback(self.traceCallback)
+
+    def detach(self):
+        """
+        Stop recording the connection, before it is closed.
+        :return: null
+        """
+        if self.dbConnection is not None:
+            if self.traceCallback is not None:
+                self.dbConnection.set_trace_callback(None)
+            self.dbConnection = None
+        self.endStatement()
+
+    def countStatement(self, statement):
+        """
+        Trace callback of the database connection.
+        :param statement: SQL statement
+        :return: null
+        """
+        self.statementCount += 1
+
+    def traceStatement(self, statement):
+        """
+        Trace callback of the database connection when profiling. sqlite only reports the start of a statement, so a
+        statement is timed until the next statement starts or the stage ends, including the python code after it.
+        :param statement: SQL statement
+        :return: null
+        """
+        self.endStatement()
+        self.statementCount += 1
+        self.runningStatement = (normalizeStatement(statement), time.perf_counter())
+
+    def endStatement(self):
+        """
+        Add the time of the running statement to its normalized statement.
+        :return: null
+        """
+        if self.runningStatement is not None:
+            statement, startTime = self.runningStatement
+            statementTime = self.statementTimes.setdefault(statement, [0, 0.0])
+            statementTime[0] += 1
+            statementTime[1] += time.perf_counter() - startTime
+            self.runningStatement = None
+
+    @contextmanager
+    def stage(self, name, tables=(), parent=None):
+        """
+        Record one stage. Only stages without a parent count for the progress.
+        :param name: stage name
+        :param tables: tables filled by the stage, their row counts are recorded
+        :param parent: name of the stage running this one as a step
+        :return: null
+        """
+        if parent is None:
+            self.notify("StageStarted", name)
+        rowCounts = self.getRowCounts(tables)
+        self.endStatement()
+        # The steps of a stage are part of its profile, only one profiler can run at a time.
+        profile = cProfile.Profile() if self.profileDir and parent is None else None
+        startTime = time.perf_counter()
+        startCPUTime = time.process_time()
+        startStatementCount = self.statementCount
+        startChanges = self.getTotalChanges()
+        self.memoryTracker.enterStage()
+        status = "Error"
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+            status = "Success"
+        finally:
+            if profile is not None:
+                profile.disable()
+            peakMemory, memoryGrowth = self.memoryTracker.exitStage()
+            if profile is not None:
+                self.endStatement()
+                self.saveProfile(name, profile)
+            stageRecord = {
+                "Stage": name,
+                "Parent": parent,
+                "Status": status,
+                "Seconds": round(time.perf_counter() - startTime, 4),
+                "CPUSeconds": round(time.process_time() - startCPUTime, 4),
+                "SQLStatements": (
+                    self.statementCount - startStatementCount
+                    if self.countStatements
+                    else None
+                ),
+                "RowsChanged": self.getRowsChanged(startChanges),
+                "RowsInserted": {
+                    tableName: rowCount - rowCounts.get(tableName, 0)
+                    for tableName, rowCount in self.getRowCounts(tables).items()
+                },
+                "PeakMemoryMB": peakMemory,
+                "MemoryGrowthMB": memoryGrowth,
+            }
+            self.stageRecords.append(stageRecord)
+            if stageRecord["SQLStatements"] is not None:
+                self.logger.info(
+                    f"Stage {name}: {stageRecord['Seconds']}s, {stageRecord['SQLStatements']} statements"
+                )
+            else:
+                self.logger.info(f"Stage {name}: {stageRecord['Seconds']}s")
+            if parent is None:
+                self.completedCount += 1
+                self.notify("StageCompleted", name)
+
+    def saveProfile(self, stageName, profile):
+        """
+        Write the pstats file of a stage and keep its hottest functions for the summary.
+        :param stageName: stage name
+        :param profile: cProfile.Profile of the stage
+        :return: null
+        """
+        profileName = f"{len(self.profileSummaries) + 1:02d}_{stageName}"
+        profile.dump_stats(os.path.join(self.profileDir, profileName + ".pstats"))
+        summaryStream = io.StringIO()
+        pstats.Stats(profile, stream=summaryStream).sort_stats(
+            "cumulative"
+        ).print_stats(self.profileTopCount)
+        self.profileSummaries.append((profileName, summaryStream.getvalue()))
+
+    def writeProfileSummary(self):
+        """
+        Write the SQL statement times and the summary of the hottest functions and statements of every stage.
+        :return: null
+        """
+        statementTimes = sorted(
+            self.statementTimes.items(), key=lambda x: x[1][1], reverse=True
+        )
+        with open(
+            os.path.join(self.profileDir, "SQLStatements.tsv"), "w", encoding="utf-8"
+        ) as statementFile:
+            statementFile.write("Seconds\tExecutions\tStatement\n")
+            for statement, (executions, seconds) in statementTimes:
+                statementFile.write(f"{seconds:.4f}\t{executions}\t{statement}\n")
+
+        summaryPath = os.path.join(self.profileDir, "ProfileSummary.txt")
+        with open(summaryPath, "w", encoding="utf-8") as summaryFile:
+            summaryFile.write(
+                f"Top {self.profileTopCount} SQL statements by cumulative time\n"
+            )
+            summaryFile.write("Seconds\tExecutions\tStatement\n")
+            for statement, (executions, seconds) in statementTimes[
+                : self.profileTopCount
+            ]:
+                summaryFile.write(f"{seconds:.4f}\t{executions}\t{statement[:300]}\n")
+            for profileName, summary in self.profileSummaries:
+                summaryFile.write(f"\n===== {profileName} =====\n{summary}")
+        self.logger.info("Profile written to " + self.profileDir)
+        print("Profile written to " + self.profileDir)
+
+    def getTotalChanges(self):
+        """
+        Get the number of rows inserted, updated or deleted on the database connection, counted by sqlite.
+        :return: row count, None without a database connection
+        """
+        if self.dbConnection is None:
+            return None
+        return self.dbConnection.total_changes
+
+    def getRowsChanged(self, startChanges):
+        """
+        Get the rows inserted, updated or deleted since a stage started.
+        :param startChanges: getTotalChanges at the start of the stage
+        :return: row count, None if the stage did not run on the database connection
+        """
+        totalChanges = self.getTotalChanges()
+        if startChanges is None or totalChanges is None:
+            return None
+        return totalChanges - startChanges
+
+    def getRowCounts(self, tables):
+        """
+        Count the rows of tables.
+        :param tables: table names
+        :return: dict of table name to row count, empty without a database connection
+        """
+        if self.dbConnection is None or not tables:
+            return {}
+        rowCounts = {}
+        # The counts are not part of the SQL statements of the stage.
+        if self.traceCallback is not None:
+            self.dbConnection.set_trace_callback(None)
+        for tableName in tables:
+            try:
+                rowCounts[tableName] = self.dbConnection.execute(
+                    f'SELECT COUNT(*) FROM "{tableName}";'
+                ).fetchone()[0]
+            except Exception:  # Table not created in this run, or created by the stage.
+                pass
+        if self.traceCallback is not None:
+            self.dbConnection.set_trace_callback(self.traceCallback)
+        return rowCounts
+
+    def notify(self, event, stageName):
+        """
+        Send an event to the listener.
+        :param event: "StageStarted" or "StageCompleted"
+        :param stageName: stage name
+        :return: null
+        """
+        if self.listener is not None:
+            self.listener(
+                {
+                    "Event": event,
+                    "Stage": stageName,
+                    "Completed": self.completedCount,
+                    "Total": self.stageCount,
+                }
+            )
+
+    def getReport(self):
+        """
+        Get the run report.
+        :return: report dict with the run info, the totals and the stage records
+        """
+        report = dict(self.runInfo)
+        report["Seconds"] = round(time.perf_counter() - self.startTime, 4)
+        report["CPUSeconds"] = round(time.process_time() - self.startCPUTime, 4)
+        report["SQLStatements"] = self.statementCount if self.countStatements else None
+        report["PeakMemoryMB"] = self.getPeakMemoryMB()
+        report["Stages"] = self.stageRecords
+        return report
+
+    def getPeakMemoryMB(self):
+        """
+        Get the peak memory of the run.
+        :return: peak memory in MB, None if not measured
+        """
+        return self.memoryTracker.getRunPeakMB()
+
+    def writeReport(self, reportPath):
+        """
+        Write the run report as json.
+        :param reportPath: report file location
+        :return: null
+        """
+        with open(reportPath, "w", encoding="utf-8") as reportFile:
+            json.dump(self.getReport(), reportFile, indent=4)
+        self.logger.info("Run report written to " + reportPath)
+        print("Run report written to " + reportPath)
+        if self.profileDir:
+            self.writeProfileSummary()
+        self.memoryTracker.stop()
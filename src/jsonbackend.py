@@ -0,0 +1,85 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # Optional, the standard library parser is used without it.
+    orjson = None
+
+
+def stdlibLoads(data):
+    """
+    Decode json with the standard library parser.
+    :param data: json document as bytes or str
+    :return: decoded data
+    """
+    return json.loads(data)
+
+
+def orjsonLoads(data):
+    """
+    Decode json with orjson. Documents orjson rejects but the standard library accepts (NaN, integers above 64 bits,
+    byte order mark) are decoded with the standard library.
+    :param data: json document as bytes or str
+    :return: decoded data
+    """
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return json.loads(data)
+
+
+decoders = {"json": stdlibLoads}
+if orjson is not None:
+    decoders["orjson"] = orjsonLoads
+defaultDecoder = "orjson" if orjson is not None else "json"
+
+
+def loads(data, decoderName=None):
+    """
+    Decode a json document with the fastest available parser.
+    :param data: json document as bytes or str
+    :param decoderName: name of the decoder in decoders, defaults to defaultDecoder
+    :return: decoded data
+    """
+    return decoders[decoderName or defaultDecoder](data)
+
+
+def loadZipMember(inputZip, memberName, decoderName=None):
+    """
+    Decode a json file of a zip from the bytes of the member, without a text stream in between.
+    :param inputZip: ZipFile
+    :param memberName: name of the json file in the zip
+    :param decoderName: name of the decoder in decoders, defaults to defaultDecoder
+    :return: decoded data
+    """
+    return loads(inputZip.read(memberName), decoderName)
+
+
+def dumps(data, indent=None, compact=False):
+    """
+    Encode data as json. The text is written to the tables and files and scanned for measure usage, so it always
+    has the standard library layout (", " and ": " separators, non ascii characters escaped), which orjson cannot
+    produce.
+    :param data: data to encode
+    :param indent: indent of the json text, None for a single line
+    :param compact: True for the minified layout, without spaces after the separators
+    :return: json text
+    """
+    if compact:
+        return json.dumps(data, separators=(",", ":"))
+    return json.dumps(data, indent=indent)
+
+
+def encode(data):
+    """
+    Encode data as compact json bytes, with orjson when it is installed. Only for hashing and comparing, the layout
+    depends on the encoder (see dumps for the text written to the tables and files).
+    :param data: data to encode
+    :return: json bytes
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:  # e.g. integers above 64 bits
+            pass
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
@@ -4,15 +4,22 @@
 """
 
 import logging
+import multiprocessing
 import os
+import sqlite3
 import sys
 from tkinter import Tk
 
+from batchextractor import BatchExtractor, getTenantZips
 from commondatafuncs import CommonDataFunction
 from extractor_gui import ExtractorGUI
+from searchindex import TenantSearchIndex
+from tenantdiff import TenantDiff, parseDiffSource
+from unusedentities import UnusedEntities
 
 AppVersion = "v25.1"
-rootWindow = Tk()
+# Created in the main process only, batch worker processes import this module without a window.
+rootWindow = None
 
 
 def mainFunction(argv):
@@ -49,7 +56,19 @@ def mainFunction(argv):
         except:
             iconPath = os.path.join(os.path.dirname(__file__), r".\convert.ico")
         rootWindow.iconbitmap(iconPath)
-        guiOption = {"ui": True, "nonUIZippedJSON": "", "nonUIDestDir": ""}
+        guiOption = {
+            "ui": True,
+            "nonUIZippedJSON": "",
+            "nonUIDestDir": "",
+            "archive": "",
+            "outputs": [],
+            "warehouse": "",
+            "snapshot": "",
+            "profile": False,
+            "incremental": False,
+            "columnar": False,
+            "search": False,
+        }
         try:
             if (
                 argv[1] == "--SOURCE"
@@ -62,7 +81,23 @@ def mainFunction(argv):
                     "ui": False,
                     "nonUIZippedJSON": argv[2],
                     "nonUIDestDir": argv[4],
+                    "archive": "",
+                    "outputs": [],
+                    "warehouse": "",
+                    "snapshot": "",
+                    "profile": "--PROFILE" in argv,
+                    "incremental": "--INCREMENTAL" in argv,
+                    "columnar": "--COLUMNAR" in argv,
+                    "search": "--SEARCHINDEX" in argv,
                 }
+                if "--ARCHIVE" in argv:
+                    guiOption["archive"] = argv[argv.index("--ARCHIVE") + 1]
+                if "--OUTPUTS" in argv:
+                    guiOption["outputs"] = argv[argv.index("--OUTPUTS") + 1].split(",")
+                if "--WAREHOUSE" in argv:
+                    guiOption["warehouse"] = argv[argv.index("--WAREHOUSE") + 1]
+                if "--SNAPSHOT" in argv:
+                    guiOption["snapshot"] = argv[argv.index("--SNAPSHOT") + 1]
         except:
             pass
         ExtractorGUI(rootWindow, AppVersion, logFileName, guiOption)
@@ -76,6 +111,160 @@ def mainFunction(argv):
         sys.exit()
 
 
+def batchFunction(argv):
+    """
+    Batch Function. Extract all tenant zips of a directory or manifest file without GUI.
+    :param argv: arguments
+    :return: null
+    """
+    commonObj = CommonDataFunction()
+    commonObj.setLoggingFile()
+    logger = logging.getLogger("extractor-logger")
+    logger.info(f"Model Extractor {AppVersion} batch")
+    try:
+        source = argv[argv.index("--BATCH") + 1]
+        destDir = argv[argv.index("--DEST") + 1]
+    except (ValueError, IndexError):
+        print("Usage: main.py --BATCH <zip directory or manifest> --DEST <directory>")
+        sys.exit(1)
+    extractionOptions = {
+        "model": True,
+        "ui": True,
+        "dependencies": True,
+        "csv": False,
+        "xlsx": False,
+        # Same default as the GUI and the single tenant command line, the run signature depends on it.
+        "measureUsage": True,
+        "archive": "",
+        "outputs": [],
+        "warehouse": "",
+        "snapshot": "",
+        "profile": "--PROFILE" in argv,
+        "incremental": "--INCREMENTAL" in argv,
+        "columnar": "--COLUMNAR" in argv,
+        "search": "--SEARCHINDEX" in argv,
+    }
+    workers = None
+    if "--WORKERS" in argv:
+        workers = int(argv[argv.index("--WORKERS") + 1])
+    if "--ARCHIVE" in argv:
+        extractionOptions["archive"] = argv[argv.index("--ARCHIVE") + 1]
+        extractionOptions["csv"] = True
+    if "--OUTPUTS" in argv:
+        extractionOptions["outputs"] = argv[argv.index("--OUTPUTS") + 1].split(",")
+    if "--WAREHOUSE" in argv:
+        extractionOptions["warehouse"] = argv[argv.index("--WAREHOUSE") + 1]
+    if "--SNAPSHOT" in argv:
+        extractionOptions["snapshot"] = argv[argv.index("--SNAPSHOT") + 1]
+    BatchExtractor(getTenantZips(source), destDir, extractionOptions, workers).run()
+
+
+def diffFunction(argv):
+    """
+    Diff Function. Compare two extracted tenant databases, or two snapshots of a warehouse database, without GUI.
+    :param argv: arguments
+    :return: null
+    """
+    commonObj = CommonDataFunction()
+    commonObj.setLoggingFile()
+    logger = logging.getLogger("extractor-logger")
+    logger.info(f"Model Extractor {AppVersion} diff")
+    try:
+        oldSource = parseDiffSource(argv[argv.index("--DIFF") + 1])
+        newSource = parseDiffSource(argv[argv.index("--DIFF") + 2])
+    except (ValueError, IndexError):
+        print(
+            "Usage: main.py --DIFF <old db> <new db> [--OUT <report csv>], "
+            "a warehouse snapshot is given as <db>::<tenant>::<snapshot>"
+        )
+        sys.exit(1)
+    tenantDiff = TenantDiff(oldSource, newSource)
+    tenantDiff.run()
+    if "--OUT" in argv:
+        tenantDiff.writeReport(argv[argv.index("--OUT") + 1])
+    else:
+        tenantDiff.printReport()
+
+
+def searchFunction(argv):
+    """
+    Search Function. Search the code, formulas and configs of an extracted tenant database or a warehouse database
+    without GUI.
+    :param argv: arguments
+    :return: null
+    """
+    commonObj = CommonDataFunction()
+    commonObj.setLoggingFile()
+    logger = logging.getLogger("extractor-logger")
+    logger.info(f"Model Extractor {AppVersion} search")
+    try:
+        dbName = argv[argv.index("--SEARCH") + 1]
+        searchText = argv[argv.index("--SEARCH") + 2]
+    except (ValueError, IndexError):
+        print(
+            "Usage: main.py --SEARCH <db> <text> [--TENANT <name>] [--SNAPSHOT <name>] [--TABLES <table list>] "
+            "[--LIMIT <n>] [--FTS] [--OUT <report csv>]"
+        )
+        sys.exit(1)
+    searchOptions = {"ftsQuery": "--FTS" in argv}
+    if "--TENANT" in argv:
+        searchOptions["tenantName"] = argv[argv.index("--TENANT") + 1]
+    if "--SNAPSHOT" in argv:
+        searchOptions["snapshotName"] = argv[argv.index("--SNAPSHOT") + 1]
+    if "--TABLES" in argv:
+        searchOptions["tableNames"] = argv[argv.index("--TABLES") + 1].split(",")
+    if "--LIMIT" in argv:
+        searchOptions["limit"] = int(argv[argv.index("--LIMIT") + 1])
+    dbConnection = sqlite3.connect(dbName)
+    try:
+        searchIndex = TenantSearchIndex(dbConnection)
+        searchIndex.search(searchText, **searchOptions)
+    except (sqlite3.OperationalError, RuntimeError) as e:
+        print(f"Unable to search {dbName}: {e}")
+        logger.error(f"Unable to search {dbName}: {e}")
+        sys.exit(1)
+    finally:
+        dbConnection.close()
+    if "--OUT" in argv:
+        searchIndex.writeReport(argv[argv.index("--OUT") + 1])
+    else:
+        searchIndex.printReport()
+
+
+def unusedFunction(argv):
+    """
+    Unused Function. List the measures, plugins, procedures, named sets and rule files no workspace, view or excel
+    workbook depends on, in an extracted tenant database or a warehouse database, without GUI.
+    :param argv: arguments
+    :return: null
+    """
+    commonObj = CommonDataFunction()
+    commonObj.setLoggingFile()
+    logger = logging.getLogger("extractor-logger")
+    logger.info(f"Model Extractor {AppVersion} unused entities")
+    try:
+        dbName = argv[argv.index("--UNUSED") + 1]
+    except (ValueError, IndexError):
+        print("Usage: main.py --UNUSED <db> [--TENANT <name>] [--SNAPSHOT <name>] [--OUT <report csv>]")
+        sys.exit(1)
+    tenantName = argv[argv.index("--TENANT") + 1] if "--TENANT" in argv else None
+    snapshotName = argv[argv.index("--SNAPSHOT") + 1] if "--SNAPSHOT" in argv else None
+    dbConnection = sqlite3.connect(dbName)
+    try:
+        unusedEntities = UnusedEntities(dbConnection, tenantName, snapshotName)
+        unusedEntities.run()
+    except (ValueError, sqlite3.OperationalError) as e:
+        print(f"Unable to find the unused entities of {dbName}: {e}")
+        logger.error(f"Unable to find the unused entities of {dbName}: {e}")
+        sys.exit(1)
+    finally:
+        dbConnection.close()
+    if "--OUT" in argv:
+        unusedEntities.writeReport(argv[argv.index("--OUT") + 1])
+    else:
+        unusedEntities.printReport()
+
+
 def windowClose():
     """
     To close the GUI created.
@@ -87,6 +276,20 @@ def windowClose():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    if "--BATCH" in sys.argv:
+        batchFunction(sys.argv)
+        sys.exit()
+    if "--DIFF" in sys.argv:
+        diffFunction(sys.argv)
+        sys.exit()
+    if "--SEARCH" in sys.argv:
+        searchFunction(sys.argv)
+        sys.exit()
+    if "--UNUSED" in sys.argv:
+        unusedFunction(sys.argv)
+        sys.exit()
+    rootWindow = Tk()
     mainFunction(sys.argv)
     rootWindow.protocol("WM_DELETE_WINDOW", windowClose)
     # root.title('Weather App')
@@ -1,17 +1,98 @@
 import logging
 import re
 import sys
-import json
 from collections import Counter
 
+import jsonbackend
+from tablemapping import Computed, ContextValue, Field, OptionalField, TableMapping
+from tenantindex import TenantModelIndex
+from textstore import TextStore
+
+pickListValuesMapping = TableMapping(
+    "PickListValues",
+    "PickListValues",
+    [
+        ("TenantName", ContextValue("TenantName")),
+        ("PickListName", ContextValue("PickListName")),
+        ("Value", Field("Value")),
+        ("DisplayName", Field("DisplayName")),
+        ("DisplayPosition", Field("DisplayPosition")),
+    ],
+)
+
+measureGroupTableMappings = [
+    TableMapping(
+        "MeasureGroupTranslations",
+        "MeasureGroupTranslations",
+        [
+            ("TenantName", ContextValue("TenantName")),
+            ("PlanName", ContextValue("PlanName")),
+            ("MeasureGroupName", ContextValue("MeasureGroupName")),
+            ("MeasureGroupTranslationName", Field("MeasureGroupName")),
+            ("MeasureGroupTranslationDescription", Field("MeasureGroupDescription")),
+            ("Language", Field("Language")),
+        ],
+    ),
+    TableMapping(
+        "MeasureGrpExternalConfigs",
+        "MeasureGroupExternalConfigs",
+        [
+            ("TenantName", ContextValue("TenantName")),
+            ("PlanName", ContextValue("PlanName")),
+            ("MeasureGroupName", ContextValue("MeasureGroupName")),
+            ("NeedsRedeployment", Field("NeedsRedeployment")),
+            ("DeploymentStatus", Field("DeploymentStatus")),
+            ("MaintainLocalCache", Field("MaintainLocalCache")),
+            ("DeploymentStatusMessage", Field("DeploymentStatusMessage")),
+            (
+                "ExternalConfigJson",
+                Computed(
+                    lambda x, c: c["TextStore"].storeJson(x["ExternalConfigJson"])
+                ),
+            ),
+            ("DataSourceType", Field("DataSourceType")),
+        ],
+    ),
+    TableMapping(
+        "MeasureGrpGranularity",
+        "DimensionUsages",
+        [
+            ("TenantName", ContextValue("TenantName")),
+            ("PlanName", ContextValue("PlanName")),
+            ("MeasureGroupName", ContextValue("MeasureGroupName")),
+            ("DimensionName", Field("DimensionName")),
+            ("AttributeName", Field("AttributeName")),
+            ("SortOrder", Field("SortOrder")),
+        ],
+    ),
+]
+
+measureAggregatesMapping = TableMapping(
+    "MeasureAggregates",
+    "MeasureAggregates",
+    [
+        ("TenantName", ContextValue("TenantName")),
+        ("PlanName", ContextValue("PlanName")),
+        ("MeasureGroupName", ContextValue("MeasureGroupName")),
+        ("MeasureName", ContextValue("MeasureName")),
+        ("AggregateFunction", OptionalField("AggregateFunction")),
+        ("OrderNumber", OptionalField("Order")),
+        ("DimensionName", OptionalField("DimensionName")),
+    ],
+)
+
 
 class ModelExtractor:
-    def __init__(self, dbConnection, data, measureUsage):
+    def __init__(
+        self, dbConnection, data, measureUsage, tenantIndex=None, textStore=None
+    ):
         """
         ModelExtractor Constructor.
         :param dbConnection: database connection
         :param data: json data
         :param measureUsage: boolean to check if measure usage is to be extracted.
+        :param tenantIndex: TenantModelIndex of the json data, built here if not given
+        :param textStore: TextStore of the database the external configs are stored in
         """
         try:
             self.logger = logging.getLogger("extractor-logger")
@@ -24,18 +105,18 @@ class ModelExtractor:
         self.measureUsage = measureUsage
         # Get the tenantName
         self.tenantName = data["Tenant"]["Name"]
-        self.tenantAttributeIdToDimName = {}
-        self.tenantAttributeIdToAttrName = {}
+        self.tenantIndex = tenantIndex if tenantIndex else TenantModelIndex(data)
+        self.textStore = textStore if textStore else TextStore(dbConnection)
+        self.tenantAttributeIdToDimName = self.tenantIndex.attributeIdToDimName
+        self.tenantAttributeIdToAttrName = self.tenantIndex.attributeIdToAttrName
         self.measureAsIBPLCount = {}
         self.measureAsNotIBPLCount = {}
         if measureUsage:
-            measureAsIBPL = re.findall(
-                r"Measure\.\[.*?]", json.dumps(self.data), re.IGNORECASE
-            )
+            # The whole tenant is encoded once for both scans.
+            tenantJson = jsonbackend.dumps(self.data)
+            measureAsIBPL = re.findall(r"Measure\.\[.*?]", tenantJson, re.IGNORECASE)
             self.measureAsIBPLCount = dict(Counter(measureAsIBPL))
-            measureAsNotIBPL = re.findall(
-                r': ".*?"', json.dumps(self.data), re.IGNORECASE
-            )
+            measureAsNotIBPL = re.findall(r': ".*?"', tenantJson, re.IGNORECASE)
             self.measureAsNotIBPLCount = dict(Counter(measureAsNotIBPL))
 
     def createDimTablesInDB(self):
@@ -83,38 +164,14 @@ class ModelExtractor:
             print(e)
 
         for pickList in tenantPickLists:
-            pickListName = pickList["PickListName"]
-            finalTenantPickListValues = [
+            pickListValuesMapping.insert(
+                self.dbConnection,
+                pickList,
                 {
                     "TenantName": self.tenantName,
-                    "PickListName": pickListName,
-                    "Value": x["Value"],
-                    "DisplayName": x["DisplayName"],
-                    "DisplayPosition": x["DisplayPosition"],
-                }
-                for x in pickList["PickListValues"]
-            ]
-            tenantPickListValuesDataToDB = [
-                (
-                    i["TenantName"],
-                    i["PickListName"],
-                    i["Value"],
-                    i["DisplayName"],
-                    i["DisplayPosition"],
-                )
-                for i in finalTenantPickListValues
-            ]
-            try:
-                self.dbConnection.executemany(
-                    "INSERT INTO PickListValues (TenantName, PickListName, Value, DisplayName, DisplayPosition) "
-                    "VALUES (?, ?, ?, ?, ?)",
-                    tenantPickListValuesDataToDB,
-                )
-            except Exception as e:
-                self.logger.error(
-                    "Unable to insert data into PickListValues: " + str(e)
-                )
-                print(e)
+                    "PickListName": pickList["PickListName"],
+                },
+            )
 
         # Code for Dimension data
         allTenantDimensions = self.data["Dimensions"]
@@ -243,15 +300,6 @@ class ModelExtractor:
             for attributeTranslation in tenantAttributes:
                 curAttributeName = attributeTranslation["AttributeName"]
 
-                tenantAttributeIdToDimNameTemp = {
-                    attributeTranslation["Id"]: dimensionName
-                }
-                self.tenantAttributeIdToDimName.update(tenantAttributeIdToDimNameTemp)
-                tenantAttributeIdToAttrNameTemp = {
-                    attributeTranslation["Id"]: curAttributeName
-                }
-                self.tenantAttributeIdToAttrName.update(tenantAttributeIdToAttrNameTemp)
-
                 if (
                     dimensionName != "Algorithm"
                     and dimensionName != "Personnel"
@@ -699,117 +747,90 @@ class ModelExtractor:
                 self.logger.error("Unable to insert data" + str(e))
                 print(e)
 
+        # Sorted attribute ids of the from/to nodes -> (graph name, is tail node). The first graph wins, as the
+        # from nodes of a graph are checked before its to nodes.
+        graphNodePropertyMap = {}
+        for i in graphNodePropertyList:
+            graphNodePropertyMap.setdefault(
+                tuple(i["GraphFromNodeIds"]), (i["GraphName"], False)
+            )
+            graphNodePropertyMap.setdefault(
+                tuple(i["GraphToNodeIds"]), (i["GraphName"], True)
+            )
+
+        tenantGraphNodePropertiesDataToDB = []
+        tenantGraphNodePropAttributesDataToDB = []
         nodeProperties = self.data["MemberRelNodeProperties"]
         for curNodeProperty in nodeProperties:
             curNodePropertyId = curNodeProperty["Id"]
-            stringIDList = []
-            graphNodePropertyIds = []
-            curGraphName = ""
-            isTailNode = False
-            for x in curNodeProperty["MemberRelNodePropertyAttributes"]:
-                stringIDList.append(self.tenantAttributeIdToDimName[x])
-                graphNodePropertyIds.append(x)
-            stringIDList = sorted(stringIDList)
+            graphNodePropertyIds = curNodeProperty["MemberRelNodePropertyAttributes"]
+            stringIDList = sorted(
+                [self.tenantAttributeIdToDimName[x] for x in graphNodePropertyIds]
+            )
             stringIDList.append(curNodeProperty["PropertyName"])
             stringID = "-".join(stringIDList)
 
-            for i in graphNodePropertyList:
-                if i["GraphFromNodeIds"] == sorted(graphNodePropertyIds):
-                    curGraphName = i["GraphName"]
-                    isTailNode = False
-                    break
-                elif i["GraphToNodeIds"] == sorted(graphNodePropertyIds):
-                    curGraphName = i["GraphName"]
-                    isTailNode = True
-                    break
-
-            finalTenantGraphNodeProperties = {
-                "TenantName": self.tenantName,
-                "NodePropertyId": curNodeProperty["Id"],
-                "PropertyName": curNodeProperty["PropertyName"],
-                "RelationshipTypeName": curGraphName,
-                "PropertyDescription": curNodeProperty["PropertyDescription"],
-                "PropertyDataType": curNodeProperty["PropertyDataType"],
-                "PropertyDataSize": curNodeProperty["PropertyDataSize"],
-                "PropertyFormula": curNodeProperty["PropertyFormula"],
-                "IsTailNode": isTailNode,
-                "StringID": stringID,
-            }
-            try:
-                self.dbConnection.execute(
-                    "INSERT INTO NodeCombosConditionalFormats (TenantName, NodePropertyId, PropertyName, "
-                    "RelationshipTypeName, PropertyDescription, PropertyDataType, PropertyDataSize, PropertyFormula, "
-                    "IsTailNode, StringID) VALUES (?,?,?,?,?,?,?,?,?,?)",
-                    (
-                        finalTenantGraphNodeProperties["TenantName"],
-                        finalTenantGraphNodeProperties["NodePropertyId"],
-                        finalTenantGraphNodeProperties["PropertyName"],
-                        finalTenantGraphNodeProperties["RelationshipTypeName"],
-                        finalTenantGraphNodeProperties["PropertyDescription"],
-                        finalTenantGraphNodeProperties["PropertyDataType"],
-                        finalTenantGraphNodeProperties["PropertyDataSize"],
-                        finalTenantGraphNodeProperties["PropertyFormula"],
-                        finalTenantGraphNodeProperties["IsTailNode"],
-                        finalTenantGraphNodeProperties["StringID"],
-                    ),
+            curGraphName, isTailNode = graphNodePropertyMap.get(
+                tuple(sorted(graphNodePropertyIds)), ("", False)
+            )
+
+            tenantGraphNodePropertiesDataToDB.append(
+                (
+                    self.tenantName,
+                    curNodePropertyId,
+                    curNodeProperty["PropertyName"],
+                    curGraphName,
+                    curNodeProperty["PropertyDescription"],
+                    curNodeProperty["PropertyDataType"],
+                    curNodeProperty["PropertyDataSize"],
+                    curNodeProperty["PropertyFormula"],
+                    isTailNode,
+                    stringID,
                 )
-            except Exception as e:
-                self.logger.error(
-                    "Unable to insert data into NodeCombosConditionalFormats: " + str(e)
+            )
+
+            # Extract graph node property attributes for NodeCombos Tables
+            tenantGraphNodePropAttributesDataToDB.extend(
+                (
+                    self.tenantName,
+                    curNodePropertyId,
+                    self.tenantAttributeIdToDimName[curNodePropertyAttribute],
+                    self.tenantAttributeIdToAttrName[curNodePropertyAttribute],
+                    stringID,
                 )
-                print(e)
+                for curNodePropertyAttribute in graphNodePropertyIds
+            )
 
-            for curNodePropertyAttribute in curNodeProperty[
-                "MemberRelNodePropertyAttributes"
-            ]:
-                # Extract graph node property attributes and insert into NodeCombos Tables
-                finalTenantGraphNodePropAttributes = [
-                    {
-                        "TenantName": self.tenantName,
-                        "NodePropertyId": curNodePropertyId,
-                        "DimensionName": self.tenantAttributeIdToDimName[
-                            curNodePropertyAttribute
-                        ],
-                        "AttributeName": self.tenantAttributeIdToAttrName[
-                            curNodePropertyAttribute
-                        ],
-                        "StringID": stringID,
-                    }
-                ]
-                tenantGraphNodePropAttributesDataToDB = [
-                    (
-                        i["TenantName"],
-                        i["NodePropertyId"],
-                        i["DimensionName"],
-                        i["AttributeName"],
-                        i["StringID"],
-                    )
-                    for i in finalTenantGraphNodePropAttributes
-                ]
-                try:
-                    self.dbConnection.executemany(
-                        "INSERT INTO NodeCombos (TenantName, NodePropertyId, DimensionName, AttributeName, StringID) "
-                        " VALUES (?,?,?,?,?)",
-                        tenantGraphNodePropAttributesDataToDB,
-                    )
-                except Exception as e:
-                    self.logger.error(
-                        "Unable to insert data into NodeCombos: " + str(e)
-                    )
-                    print(e)
+        try:
+            self.dbConnection.executemany(
+                "INSERT INTO NodeCombosConditionalFormats (TenantName, NodePropertyId, PropertyName, "
+                "RelationshipTypeName, PropertyDescription, PropertyDataType, PropertyDataSize, PropertyFormula, "
+                "IsTailNode, StringID) VALUES (?,?,?,?,?,?,?,?,?,?)",
+                tenantGraphNodePropertiesDataToDB,
+            )
+        except Exception as e:
+            self.logger.error(
+                "Unable to insert data into NodeCombosConditionalFormats: " + str(e)
+            )
+            print(e)
+
+        try:
+            self.dbConnection.executemany(
+                "INSERT INTO NodeCombos (TenantName, NodePropertyId, DimensionName, AttributeName, StringID) "
+                " VALUES (?,?,?,?,?)",
+                tenantGraphNodePropAttributesDataToDB,
+            )
+        except Exception as e:
+            self.logger.error("Unable to insert data into NodeCombos: " + str(e))
+            print(e)
 
     def createPlanTablesInDB(self):
         """
         Insert corresponding data for all plans related tables.
         """
-        tenantPickListIdToName = {}
+        tenantPickListIdToName = self.tenantIndex.pickListIdToName
         finalMeasureStaticProperties = [] # To store extracted static properties
 
-        for curPickList in self.data["PickLists"]:
-            tenantPickListIdToNameTemp = {
-                curPickList["Id"]: curPickList["PickListName"]
-            }
-            tenantPickListIdToName.update(tenantPickListIdToNameTemp)
         allPlans = self.data["Plans"]
         jPlans = [x for x in allPlans if x["PlanName"] != "Algorithm Parameters"]
 
@@ -847,93 +868,16 @@ class ModelExtractor:
             curPlanMeasureGroups = []
             for curMeasureGroup in jMeasureGroups:
                 curMeasureGroupName = curMeasureGroup["MeasureGroupName"]
-                if (
-                    "MeasureGroupTranslations" in curMeasureGroup
-                    and len(curMeasureGroup["MeasureGroupTranslations"]) > 0
-                ):
-                    curMGTranslation = [
-                        {
-                            "TenantName": self.tenantName,
-                            "PlanName": curPlanName,
-                            "MeasureGroupName": curMeasureGroupName,
-                            "MeasureGroupTranslationName": i["MeasureGroupName"],
-                            "MeasureGroupTranslationDescription": i[
-                                "MeasureGroupDescription"
-                            ],
-                            "Language": i["Language"],
-                        }
-                        for i in curMeasureGroup["MeasureGroupTranslations"]
-                    ]
-                    MGTranslationToDB = [
-                        (
-                            i["TenantName"],
-                            i["PlanName"],
-                            i["MeasureGroupName"],
-                            i["MeasureGroupTranslationName"],
-                            i["MeasureGroupTranslationDescription"],
-                            i["Language"],
-                        )
-                        for i in curMGTranslation
-                    ]
-                    try:
-                        self.dbConnection.executemany(
-                            "INSERT INTO MeasureGroupTranslations (TenantName, PlanName, MeasureGroupName, "
-                            "MeasureGroupTranslationName, MeasureGroupTranslationDescription, Language) "
-                            "VALUES (?, ?, ?, ?, ?, ?)",
-                            MGTranslationToDB,
-                        )
-                    except Exception as ex:
-                        self.logger.error(
-                            "Unable to insert data into MeasureGroupTranslations: "
-                            + str(ex)
-                        )
-                        print(ex)
-
-                if (
-                    "MeasureGroupExternalConfigs" in curMeasureGroup
-                    and len(curMeasureGroup["MeasureGroupExternalConfigs"]) > 0
-                ):
-                    externalConfigMG = [
-                        {
-                            "TenantName": self.tenantName,
-                            "PlanName": curPlanName,
-                            "MeasureGroupName": curMeasureGroupName,
-                            "NeedsRedeployment": _x["NeedsRedeployment"],
-                            "DeploymentStatus": _x["DeploymentStatus"],
-                            "MaintainLocalCache": _x["MaintainLocalCache"],
-                            "DeploymentStatusMessage": _x["DeploymentStatusMessage"],
-                            "ExternalConfigJson": _x["ExternalConfigJson"],
-                            "DataSourceType": _x["DataSourceType"],
-                        }
-                        for _x in curMeasureGroup["MeasureGroupExternalConfigs"]
-                    ]
-                    externalConfigMGToDB = [
-                        (
-                            i["TenantName"],
-                            i["PlanName"],
-                            i["MeasureGroupName"],
-                            i["NeedsRedeployment"],
-                            i["DeploymentStatus"],
-                            i["MaintainLocalCache"],
-                            i["DeploymentStatusMessage"],
-                            i["ExternalConfigJson"],
-                            i["DataSourceType"],
-                        )
-                        for i in externalConfigMG
-                    ]
-                    try:
-                        self.dbConnection.executemany(
-                            "INSERT INTO MeasureGrpExternalConfigs (TenantName, PlanName, MeasureGroupName, "
-                            "NeedsRedeployment, DeploymentStatus, MaintainLocalCache, DeploymentStatusMessage, "
-                            "ExternalConfigJson, DataSourceType) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                            externalConfigMGToDB,
-                        )
-                    except Exception as ex:
-                        self.logger.error(
-                            "Unable to insert data into MeasureGrpExternalConfigs: "
-                            + str(ex)
-                        )
-                        print(ex)
+                measureGroupContext = {
+                    "TenantName": self.tenantName,
+                    "PlanName": curPlanName,
+                    "MeasureGroupName": curMeasureGroupName,
+                    "TextStore": self.textStore,
+                }
+                for tableMapping in measureGroupTableMappings:
+                    tableMapping.insert(
+                        self.dbConnection, curMeasureGroup, measureGroupContext
+                    )
 
                 granularity = curMeasureGroup["DimensionUsages"]
                 granularityList = []
@@ -953,40 +897,6 @@ class ModelExtractor:
                     }
                 ]
 
-                finalCurPlanMeasureGrpGranularity = [
-                    {
-                        "TenantName": self.tenantName,
-                        "PlanName": curPlanName,
-                        "MeasureGroupName": curMeasureGroupName,
-                        "DimensionName": x["DimensionName"],
-                        "AttributeName": x["AttributeName"],
-                        "SortOrder": x["SortOrder"],
-                    }
-                    for x in granularity
-                ]
-                planMeasureGrpGranularityDataToDB = [
-                    (
-                        i["TenantName"],
-                        i["PlanName"],
-                        i["MeasureGroupName"],
-                        i["DimensionName"],
-                        i["AttributeName"],
-                        i["SortOrder"],
-                    )
-                    for i in finalCurPlanMeasureGrpGranularity
-                ]
-                try:
-                    self.dbConnection.executemany(
-                        "INSERT INTO MeasureGrpGranularity (TenantName, PlanName, MeasureGroupName, DimensionName, "
-                        "AttributeName, SortOrder) VALUES (?, ?, ?, ?, ?, ?)",
-                        planMeasureGrpGranularityDataToDB,
-                    )
-                except Exception as ex:
-                    self.logger.error(
-                        "Unable to insert data into MeasureGrpGranularity: " + str(ex)
-                    )
-                    print(ex)
-
                 curPlanMGrpAsGraphGranularity = [
                     {
                         "TenantName": self.tenantName,
@@ -1078,50 +988,11 @@ class ModelExtractor:
                             if i["PropertyType"] == "Validation_Status":
                                 validationFormula = i["PropertyFormula"]
                                 validationTooltip = i["ToolTip"]
-                    if "MeasureAggregates" in x:
-                        measureAggregateData = [
-                            {
-                                "TenantName": self.tenantName,
-                                "PlanName": curPlanName,
-                                "MeasureGroupName": curMeasureGroupName,
-                                "MeasureName": x["MeasureName"],
-                                "AggregateFunction": (
-                                    i["AggregateFunction"]
-                                    if "AggregateFunction" in i
-                                    else None
-                                ),
-                                "OrderNumber": i["Order"] if "Order" in i else None,
-                                "DimensionName": (
-                                    i["DimensionName"] if "DimensionName" in i else None
-                                ),
-                            }
-                            for i in x["MeasureAggregates"]
-                        ]
-                        toDB = [
-                            (
-                                i["TenantName"],
-                                i["PlanName"],
-                                i["MeasureGroupName"],
-                                i["MeasureName"],
-                                i["AggregateFunction"],
-                                i["OrderNumber"],
-                                i["DimensionName"],
-                            )
-                            for i in measureAggregateData
-                        ]
-                        if len(toDB) > 0:
-                            try:
-                                self.dbConnection.executemany(
-                                    "INSERT INTO MeasureAggregates (TenantName, PlanName, MeasureGroupName, MeasureName, "
-                                    "AggregateFunction, OrderNumber, DimensionName) VALUES (?,?,?,?,?,?,?);",
-                                    toDB,
-                                )
-                            except Exception as e:
-                                self.logger.error(
-                                    "Unable to insert data into MeasureAggregates: "
-                                    + str(e)
-                                )
-                                print(e)
+                    measureAggregatesMapping.insert(
+                        self.dbConnection,
+                        x,
+                        dict(measureGroupContext, MeasureName=x["MeasureName"]),
+                    )
 
                     # Extract specific MeasureStaticProperties
                     if "MeasureStaticProperties" in x and isinstance(x["MeasureStaticProperties"], list):
@@ -0,0 +1,105 @@
+try:
+    import ahocorasick
+except ImportError:  # Optional, the python automaton is used without it.
+    ahocorasick = None
+
+
+class NameScanner:
+    # A name only counts when it is quoted or bracketed in the script, e.g. "Sales Qty", 'Sales Qty' or
+    # Measure.[Sales Qty], so short names do not match inside variable names or words.
+    openingDelimiters = frozenset("\"'[")
+    closingDelimiters = frozenset("\"']")
+
+    def __init__(self, names):
+        """
+        NameScanner Constructor. Aho-Corasick automaton of a set of names, built once and used to find all of them
+        in a text in one pass, whatever the number of names. Uses pyahocorasick when installed.
+        :param names: iterable of names, e.g. all measure and edge names of a tenant
+        """
+        self.names = {x for x in names if x}
+        self.automaton = None
+        if ahocorasick is not None:
+            self.automaton = ahocorasick.Automaton()
+            for name in self.names:
+                self.automaton.add_word(name, name)
+            if self.names:
+                self.automaton.make_automaton()
+        else:
+            self.buildAutomaton()
+
+    def buildAutomaton(self):
+        """
+        Build the python automaton: the trie of the names as goto dicts, the failure link and the names ending in
+        every state.
+        :return: null
+        """
+        self.goto = [{}]
+        self.fail = [0]
+        self.matches = [()]
+        for name in self.names:
+            state = 0
+            for char in name:
+                nextState = self.goto[state].get(char)
+                if nextState is None:
+                    nextState = len(self.goto)
+                    self.goto[state][char] = nextState
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.matches.append(())
+                state = nextState
+            self.matches[state] = (name,)
+        # Breadth first, so the failure state of every state is complete before it is used.
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, nextState in self.goto[state].items():
+                queue.append(nextState)
+                failState = self.fail[state]
+                while failState and char not in self.goto[failState]:
+                    failState = self.fail[failState]
+                failState = self.goto[failState].get(char, 0)
+                self.fail[nextState] = failState
+                self.matches[nextState] = (
+                    self.matches[nextState] + self.matches[failState]
+                )
+
+    def iterMatches(self, text):
+        """
+        Find all occurrences of the names in a text, overlapping ones included.
+        :param text: text to scan
+        :return: generator of tuples of the end index (inclusive) and the name
+        """
+        if self.automaton is not None:
+            if self.names:
+                yield from self.automaton.iter(text)
+            return
+        goto = self.goto
+        fail = self.fail
+        matches = self.matches
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for name in matches[state]:
+                yield index, name
+
+    def findNames(self, text):
+        """
+        Find the names quoted or bracketed in a text.
+        :param text: text to scan, e.g. a plugin script
+        :return: set of names found
+        """
+        foundNames = set()
+        if not text:
+            return foundNames
+        textLength = len(text)
+        for endIndex, name in self.iterMatches(text):
+            startIndex = endIndex - len(name) + 1
+            if (
+                startIndex > 0
+                and endIndex + 1 < textLength
+                and text[startIndex - 1] in self.openingDelimiters
+                and text[endIndex + 1] in self.closingDelimiters
+            ):
+                foundNames.add(name)
+        return foundNames
@@ -1,15 +1,20 @@
 import logging
 import sys
-import json
 from re import findall, IGNORECASE
 
+import jsonbackend
+from tenantindex import TenantModelIndex
+from textstore import TextStore
+
 
 class RuleExtractor:
-    def __init__(self, data, dbConnection):
+    def __init__(self, data, dbConnection, tenantIndex=None, textStore=None):
         """
         RuleExtractor Constructor.
         :param data:
         :param dbConnection:
+        :param tenantIndex: TenantModelIndex of the json data, built here if not given
+        :param textStore: TextStore of the database the scripts and procedure codes are stored in
         """
         try:
             self.logger = logging.getLogger("extractor-logger")
@@ -18,13 +23,15 @@ class RuleExtractor:
             sys.exit()
         self.data = data
         self.dbConnection = dbConnection
+        self.tenantIndex = tenantIndex if tenantIndex else TenantModelIndex(data)
+        self.textStore = textStore if textStore else TextStore(dbConnection)
         self.TENANT_NAME = "TenantName"
         self.PLUGIN_NAME = "PluginName"
         self.CONFIG_JSON = "ConfigJson"
         self.SCRIPT_PARAM = "ScriptParams"
         self.DIM_NAME = "DimensionName"
         self.ruleFile = []
-        self.scopeLabels = []
+        self.scopeLabels = {}
         self.tenantName = self.data["Tenant"]["Name"]
         self.ruleFilePositionList = []
 
@@ -394,7 +401,9 @@ class RuleExtractor:
                             rGenPluginScriptsDataToDB = (
                                 rGenPluginScriptsData[self.TENANT_NAME],
                                 rGenPluginScriptsData[self.PLUGIN_NAME],
-                                rGenPluginScriptsData["ScriptCode"],
+                                self.textStore.storeText(
+                                    rGenPluginScriptsData["ScriptCode"]
+                                ),
                             )
                             try:
                                 self.dbConnection.execute(
@@ -548,7 +557,9 @@ class RuleExtractor:
                             rTimePluginScriptsDataToDB = (
                                 rTimePluginScriptsData[self.TENANT_NAME],
                                 rTimePluginScriptsData[self.PLUGIN_NAME],
-                                rTimePluginScriptsData["ScriptCode"],
+                                self.textStore.storeText(
+                                    rTimePluginScriptsData["ScriptCode"]
+                                ),
                             )
                             try:
                                 self.dbConnection.execute(
@@ -808,7 +819,9 @@ class RuleExtractor:
                                     (
                                         pythonPluginScriptsData[self.TENANT_NAME],
                                         pythonPluginScriptsData[self.PLUGIN_NAME],
-                                        pythonPluginScriptsData["ScriptCode"],
+                                        self.textStore.storeText(
+                                            pythonPluginScriptsData["ScriptCode"]
+                                        ),
                                     ),
                                 )
                             except Exception as e:
@@ -1079,7 +1092,9 @@ class RuleExtractor:
                                     (
                                         pythonPluginScriptsData[self.TENANT_NAME],
                                         pythonPluginScriptsData[self.PLUGIN_NAME],
-                                        pythonPluginScriptsData["ScriptCode"],
+                                        self.textStore.storeText(
+                                            pythonPluginScriptsData["ScriptCode"]
+                                        ),
                                     ),
                                 )
                             except Exception as e:
@@ -1190,11 +1205,7 @@ class RuleExtractor:
             self.logger.error("Unable to insert data into ProcFiles: " + str(e))
             print("Unable to insert data into ProcFiles: " + str(e))
         matchingProcedureGroups = sorted(
-            (
-                x
-                for x in self.data["RuleGroups"]
-                if (x["RuleGroupLabelId"] == procedureRuleFile["RuleGroupLabelId"])
-            ),
+            self.tenantIndex.getRuleGroups(procedureRuleFile["RuleGroupLabelId"]),
             key=lambda x: x["RuleGroupLabelPosition"],
         )
         procedurePosition = 0
@@ -1285,7 +1296,7 @@ class RuleExtractor:
                         (
                             procCodeData[self.TENANT_NAME],
                             procCodeData["ProcName"],
-                            procCodeData["ProcCode"],
+                            self.textStore.storeText(procCodeData["ProcCode"]),
                         ),
                     )
                 except Exception as e:
@@ -1298,11 +1309,7 @@ class RuleExtractor:
         :param namedSetRuleFile: namedset file name
         """
         matchingRuleGroups = sorted(
-            (
-                x
-                for x in self.data["RuleGroups"]
-                if (x["RuleGroupLabelId"] == namedSetRuleFile["RuleGroupLabelId"])
-            ),
+            self.tenantIndex.getRuleGroups(namedSetRuleFile["RuleGroupLabelId"]),
             key=lambda x: x["RuleGroupName"],
         )
         finalNamedSet = [
@@ -1340,18 +1347,14 @@ class RuleExtractor:
         Insert all active rules related data to active rule tables.
         :param activeRuleFile: active rule file name
         """
-        matchingScopeLabels = filter(
-            lambda x: (x["RuleGroupLabelId"] == activeRuleFile["RuleGroupLabelId"]),
-            self.scopeLabels,
-        )
+        matchingScopeLabels = [
+            self.scopeLabels[x["Id"]]
+            for x in self.tenantIndex.getScopeLabels(activeRuleFile["RuleGroupLabelId"])
+        ]
 
         pluginRuleGroups = filter(
-            lambda x: (
-                x["RuleGroupLabelId"] == activeRuleFile["RuleGroupLabelId"]
-                and x["ScopeLabelId"] == 0
-                and x["RuleGroupType"] == "Plugin"
-            ),
-            self.data["RuleGroups"],
+            lambda x: (x["ScopeLabelId"] == 0 and x["RuleGroupType"] == "Plugin"),
+            self.tenantIndex.getRuleGroups(activeRuleFile["RuleGroupLabelId"]),
         )
 
         sortedMatchingScopeLabels = sorted(
@@ -1612,7 +1615,11 @@ class RuleExtractor:
                     "PluginText": self.constructPluginString(x),
                     self.PLUGIN_NAME: x["RuleGroupContent"]["PluginInstanceName"],
                     "ScopeGrain": scopeGrain.strip("[").strip("]"),
-                    "ArgsJSON": json.dumps(x["RuleGroupContent"]["PluginArguments"]),
+                    "ArgsJSON": self.textStore.storeText(
+                        jsonbackend.dumps(
+                            x["RuleGroupContent"]["PluginArguments"], compact=True
+                        )
+                    ),
                     "JSONPluginPosition": x["RuleGroupLabelPosition"],
                 }
             ]
@@ -1777,11 +1784,8 @@ class RuleExtractor:
         :param scopePosition: scope position
         """
         matchingRuleGroups = filter(
-            lambda x: (
-                x["RuleGroupLabelId"] == ruleGroupLabelId
-                and x["ScopeLabelId"] == scopeLabelId
-            ),
-            self.data["RuleGroups"],
+            lambda x: x["ScopeLabelId"] == scopeLabelId,
+            self.tenantIndex.getRuleGroups(ruleGroupLabelId),
         )
 
         sortedMatchingRuleGroup = sorted(
@@ -1876,7 +1880,9 @@ class RuleExtractor:
                 pluginString
                 + "  "
                 + "arguments"
-                + json.dumps(pluginRuleGroup["RuleGroupContent"]["PluginArguments"])
+                + jsonbackend.dumps(
+                    pluginRuleGroup["RuleGroupContent"]["PluginArguments"]
+                )
                 + "\n"
             )
 
@@ -1903,8 +1909,8 @@ class RuleExtractor:
         """
         Create scope labels.
         """
-        self.scopeLabels = [
-            {
+        self.scopeLabels = {
+            x["Id"]: {
                 "ScopeLabelId": x["Id"],
                 "RuleGroupLabelId": x["RuleGroupLabelId"],
                 "RuleGroupType": x["RuleGroupType"],
@@ -1914,8 +1920,8 @@ class RuleExtractor:
                 "ScopePosition": x["Position"],
             }
             for x in self.data["RuleGroupScopeLabels"]
-        ]
-        for curScopeLabel in self.scopeLabels:
+        }
+        for curScopeLabel in self.scopeLabels.values():
             if (
                 curScopeLabel["RuleGroupType"] == "Cartesian"
                 or curScopeLabel["RuleGroupType"] == "EvaluateMember"
@@ -0,0 +1,238 @@
+import csv
+import logging
+import time
+
+from textstore import getColumnExpression
+
+# Indexed tables: the columns identifying the entity of a row and the code, formula or config columns searched.
+searchSources = {
+    "MeasureFormulae": (
+        ("PlanName", "MeasureGroupName", "MeasureName"),
+        ("MeasureFormula",),
+    ),
+    "Measures": (
+        ("PlanName", "MeasureGroupName", "MeasureName"),
+        ("ValidationFormula", "ConversionFormula"),
+    ),
+    "MeasureConditionalFormats": (
+        ("PlanName", "MeasureGroupName", "MeasureName"),
+        ("BgColorFormula", "FgColorFormula", "TrendFormula"),
+    ),
+    "MeasureGrpExternalConfigs": (
+        ("PlanName", "MeasureGroupName"),
+        ("ExternalConfigJson",),
+    ),
+    "NodeCombosConditionalFormats": (
+        ("RelationshipTypeName", "PropertyName"),
+        ("PropertyFormula",),
+    ),
+    "ActiveRuleScopeLists": (("RuleFileName", "ScopePosition"), ("ScopeString",)),
+    "ActiveRuleFormulae": (
+        ("RuleFileName", "ScopePosition", "FormulaPosition"),
+        ("FormulaStatement",),
+    ),
+    "ActivePluginDetails": (
+        ("RuleFileName", "ScopePosition", "PluginPosition"),
+        ("PluginText",),
+    ),
+    "NamedSets": (("RuleFileName", "SetName"), ("Definition",)),
+    "ProcCodes": (("ProcName",), ("ProcCode",)),
+    "NonRPluginParams": (("PluginName", "ParamName"), ("ParamValue",)),
+    "RGenPluginScripts": (("PluginName",), ("ScriptCode",)),
+    "RGenPluginInputQueries": (("PluginName", "VariableName"), ("Query",)),
+    "RTimePluginScripts": (("PluginName",), ("ScriptCode",)),
+    "PythonPluginScripts": (("PluginName",), ("ScriptCode",)),
+    "PySparkPluginScripts": (("PluginName",), ("ScriptCode",)),
+    "DataSecurityIBPLRules": (("DataSecurityRuleName",), ("ScriptCode",)),
+    "ActionButtonDetails": (("ActionButtonName",), ("ConfigJson",)),
+    "ActionButtonRules": (("ActionButtonName", "IBPLRulePosition"), ("IBPLRule",)),
+    "WidgetDefinitionProperties": (("WidgetName", "PropertyName"), ("PropertyValue",)),
+    "WidgetMeasuresList": (("WidgetName", "MeasureName"), ("Formula",)),
+}
+
+
+class TenantSearchIndex:
+    indexTableName = "SearchIndex"
+    reportColumns = [
+        "TenantName",
+        "SnapshotName",
+        "TableName",
+        "ColumnName",
+        "EntityKey",
+        "Snippet",
+        "Rank",
+    ]
+    # The trigram tokenizer matches any substring of 3 characters or more, like grep on the exported files. It needs
+    # sqlite 3.34, older versions index words.
+    tokenizers = ("trigram", "unicode61")
+
+    def __init__(self, dbConnection):
+        """
+        TenantSearchIndex Constructor. Full text index (sqlite FTS5) over the code, formula and config columns of an
+        extracted tenant database or of a warehouse database, one index row per entity and column.
+        :param dbConnection: database connection
+        """
+        self.logger = logging.getLogger("extractor-logger")
+        self.dbConnection = dbConnection
+        self.hits = []
+
+    def createIndexTable(self):
+        """
+        Create the index table if it does not exist yet.
+        :return: null
+        """
+        for tokenizer in self.tokenizers:
+            try:
+                self.dbConnection.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.indexTableName} USING fts5(TenantName UNINDEXED, "
+                    f"SnapshotName UNINDEXED, TableName UNINDEXED, ColumnName UNINDEXED, EntityKey UNINDEXED, "
+                    f'Content, tokenize="{tokenizer}");'
+                )
+                return
+            except Exception as e:
+                self.logger.info(f"FTS5 tokenizer {tokenizer} not available: {e}")
+        raise RuntimeError("sqlite FTS5 is not available, no search index created")
+
+    def buildSearchIndex(self, tenantName=None, snapshotName=None):
+        """
+        Index the searched columns of all the extracted tables, in the transaction of the caller. In a warehouse
+        database only the rows of the tenant and snapshot are replaced.
+        :param tenantName: tenant name, None for a tenant database
+        :param snapshotName: snapshot name, None for a tenant database
+        :return: number of indexed rows
+        """
+        startTime = time.perf_counter()
+        self.createIndexTable()
+        filterClause = ""
+        parameters = ()
+        if tenantName is not None:
+            filterClause = " AND TenantName=? AND SnapshotName=?"
+            parameters = (tenantName, snapshotName)
+            self.dbConnection.execute(
+                f"DELETE FROM {self.indexTableName} WHERE TenantName=? AND SnapshotName=?;",
+                parameters,
+            )
+        existingTables = {
+            x[0]
+            for x in self.dbConnection.execute(
+                'SELECT name FROM sqlite_master WHERE type="table";'
+            )
+        }
+        rowCount = 0
+        for tableName, (keyColumns, textColumns) in searchSources.items():
+            if tableName not in existingTables:
+                continue
+            entityKey = " || ' | ' || ".join(
+                f"""ifnull("{x}", '')""" for x in keyColumns
+            )
+            for columnName in textColumns:
+                rowCount += self.dbConnection.execute(
+                    f"INSERT INTO {self.indexTableName} (TenantName, SnapshotName, TableName, ColumnName, EntityKey, "
+                    f"Content) SELECT TenantName, {'SnapshotName' if tenantName is not None else 'NULL'}, ?, ?, "
+                    f"""{entityKey}, {getColumnExpression(tableName, columnName)} FROM "{tableName}" """
+                    f"""WHERE "{columnName}" IS NOT NULL AND "{columnName}" != ''{filterClause};""",
+                    (tableName, columnName) + parameters,
+                ).rowcount
+        self.logger.info(
+            f"Search index built with {rowCount} rows in {time.perf_counter() - startTime:.2f}s"
+        )
+        return rowCount
+
+    def search(
+        self,
+        searchText,
+        tenantName=None,
+        snapshotName=None,
+        tableNames=None,
+        limit=50,
+        ftsQuery=False,
+    ):
+        """
+        Search the index, best matches first.
+        :param searchText: text searched as is, e.g. a measure or plugin name, or an FTS5 query with ftsQuery
+        :param tenantName: only search this tenant of a warehouse database
+        :param snapshotName: only search this snapshot of a warehouse database
+        :param tableNames: only search these tables
+        :param limit: maximum number of hits, None for all
+        :param ftsQuery: True if searchText is in the FTS5 query syntax, e.g. '"Revenue" NOT "Forecast"'
+        :return: list of hit dicts with reportColumns as keys
+        """
+        if (
+            self.dbConnection.execute(
+                'SELECT 1 FROM sqlite_master WHERE type="table" AND name=?;',
+                (self.indexTableName,),
+            ).fetchone()
+            is None
+        ):
+            raise RuntimeError(
+                "no search index, extract the tenant with --SEARCHINDEX (or the GUI option) to build it"
+            )
+        conditions = []
+        parameters = []
+        if ftsQuery or len(searchText) >= 3:
+            # Trigram tokens are about one character long, the snippet is the longest fts5 allows.
+            snippetColumn = f"snippet({self.indexTableName}, 5, '[', ']', '...', 64)"
+            conditions.append(f"{self.indexTableName} MATCH ?")
+            parameters.append(
+                searchText if ftsQuery else '"' + searchText.replace('"', '""') + '"'
+            )
+            orderBy = "rank"
+        else:
+            # Too short for the trigrams, scanned instead.
+            snippetColumn = (
+                "substr(Content, max(instr(lower(Content), lower(?)) - 30, 1), 80)"
+            )
+            conditions.append("instr(lower(Content), lower(?)) > 0")
+            parameters.extend([searchText, searchText])
+            orderBy = "TableName, EntityKey"
+        for columnName, value in (
+            ("TenantName", tenantName),
+            ("SnapshotName", snapshotName),
+        ):
+            if value is not None:
+                conditions.append(f"{columnName}=?")
+                parameters.append(value)
+        if tableNames:
+            conditions.append(f"TableName IN ({', '.join('?' * len(tableNames))})")
+            parameters.extend(tableNames)
+        query = (
+            f"SELECT TenantName, SnapshotName, TableName, ColumnName, EntityKey, "
+            f"{snippetColumn} AS Snippet, round(rank, 3) AS Rank "
+            f"FROM {self.indexTableName} WHERE {' AND '.join(conditions)} ORDER BY {orderBy}"
+        )
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        startTime = time.perf_counter()
+        self.hits = [
+            dict(zip(self.reportColumns, x))
+            for x in self.dbConnection.execute(query + ";", parameters)
+        ]
+        self.logger.info(
+            f"Search for {searchText}: {len(self.hits)} hits in {(time.perf_counter() - startTime) * 1000:.1f}ms"
+        )
+        return self.hits
+
+    def writeReport(self, reportPath):
+        """
+        Write the hits of the last search to a csv file.
+        :param reportPath: report file location
+        :return: null
+        """
+        with open(reportPath, "w", newline="", encoding="utf-8") as reportFile:
+            fileWriter = csv.DictWriter(reportFile, fieldnames=self.reportColumns)
+            fileWriter.writeheader()
+            fileWriter.writerows(self.hits)
+        print("Search report written to " + reportPath)
+
+    def printReport(self):
+        """
+        Print the hits of the last search.
+        :return: null
+        """
+        for hit in self.hits:
+            location = f"{hit['TableName']}.{hit['ColumnName']} [{hit['EntityKey']}]"
+            if hit["TenantName"] is not None and hit["SnapshotName"] is not None:
+                location = f"{hit['TenantName']}::{hit['SnapshotName']} {location}"
+            print(location)
+            print("  " + " ".join(hit["Snippet"].split()))
+        print(f"{len(self.hits)} hits")
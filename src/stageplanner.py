@@ -0,0 +1,709 @@
+import copy
+import re
+
+from dependency_extractor import DependencyExtractor
+from searchindex import searchSources
+from tables import tablesData
+
+
+class Stage:
+    def __init__(
+        self,
+        name,
+        extractor,
+        method,
+        tables=(),
+        reads=(),
+        after=(),
+        message=None,
+        steps=(),
+        sections=(),
+    ):
+        """
+        One step of the extraction: a method of an extractor (or of DBToFiles for the file exports), the tables it
+        fills and the tables it reads.
+        :param name: stage name
+        :param extractor: "model", "rules", "ui", "dependencies", "search" or "files"
+        :param method: extractor method running the stage
+        :param tables: tables filled by the stage
+        :param reads: tables read by the stage, their stages are run first
+        :param after: stages the extractor state of this stage is built by, e.g. widget usage counts
+        :param message: progress message logged before the stage runs
+        :param steps: extractor methods run one after the other instead of method, recorded separately in the run
+        report
+        :param sections: top level json sections read by the stage, "Layout.<key>" for a key of Layout, the stage is
+        run again in an incremental extraction when one of them changed
+        """
+        self.name = name
+        self.extractor = extractor
+        self.method = method
+        self.tables = tables
+        self.reads = reads
+        self.after = after
+        self.message = message
+        self.steps = steps
+        self.sections = sections
+
+
+# Stages in execution order.
+stages = [
+    Stage(
+        "dimensions",
+        "model",
+        "createDimTablesInDB",
+        tables=(
+            "Dimensions",
+            "DimAttributes",
+            "DimAttrProperties",
+            "DimAttrTranslations",
+            "DimAttrPropTranslations",
+            "DimHierarchies",
+            "DimHierLevels",
+            "DimAliases",
+            "DimAttrAliases",
+            "Picklists",
+            "PickListValues",
+        ),
+        message="Extracting Dimensions Data",
+        sections=("Dimensions", "PickLists"),
+    ),
+    Stage(
+        "graphs",
+        "model",
+        "createGraphTablesInDB",
+        tables=(
+            "Graphs",
+            "GraphEdges",
+            "GraphEdgeTranslations",
+            "GraphFromNodes",
+            "GraphToNodes",
+            "GraphNodeTranslations",
+            "NodeCombos",
+            "NodeCombosConditionalFormats",
+        ),
+        message="Extracting Graph Data",
+        sections=("MemberRelationshipTypes", "MemberRelNodeProperties", "Dimensions"),
+    ),
+    Stage(
+        "plans",
+        "model",
+        "createPlanTablesInDB",
+        tables=(
+            "Plans",
+            "MeasureGroups",
+            "MeasureGroupTranslations",
+            "MeasureGrpExternalConfigs",
+            "MeasureGrpGranularity",
+            "MeasureGroupAsGraphGranularities",
+            "Measures",
+            "MeasureTranslations",
+            "MeasureAggregates",
+            "MeasurePickLists",
+            "MeasureFormulae",
+            "MeasureSpreads",
+            "MeasureTwins",
+            "MeasureConditionalFormats",
+            "MeasureStaticPropertiesInfo",
+        ),
+        message="Extracting Plans Data",
+        sections=("Plans", "Dimensions", "PickLists"),
+    ),
+    Stage(
+        "rules",
+        "rules",
+        "extractRules",
+        tables=(
+            "ActiveRuleFiles",
+            "ActiveRuleScopeLists",
+            "ActiveRuleScopeGrains",
+            "ActiveRuleGraphGrains",
+            "ActiveRuleFormulae",
+            "ActivePluginDetails",
+            "NamedSets",
+            "ProcFiles",
+            "Procedures",
+            "ProcParams",
+            "ProcCodes",
+            "Plugins",
+            "TenantPluginDetails",
+            "NonRPluginParams",
+            "RGenPluginScripts",
+            "RGenPluginParams",
+            "RGenPluginInputQueries",
+            "RGenPluginInputTables",
+            "RGenPluginOutputTables",
+            "RGenPluginSliceTables",
+            "RTimePluginScripts",
+            "RTimePluginParams",
+            "RTimePluginInputs",
+            "RTimePluginOutputs",
+            "RTimeSeriesParams",
+            "PythonPluginScripts",
+            "PythonPluginParams",
+            "PythonPluginInputTables",
+            "PythonPluginOutputTables",
+            "PythonPluginOutputMeasures",
+            "PythonPluginSliceKeyTables",
+            "PySparkPluginScripts",
+            "PySparkPluginParams",
+            "PySparkPluginInputTables",
+            "PySparkPluginOutputTables",
+            "PySparkPluginSliceKeys",
+        ),
+        message="Extracting Rules Data",
+        sections=(
+            "RuleGroupLabels",
+            "RuleGroupScopeLabels",
+            "RuleGroups",
+            "TenantPlugIns",
+            "GlobalPlugIns",
+        ),
+    ),
+    Stage(
+        "dataSecurityRules",
+        "rules",
+        "extractIBPLRules",
+        tables=("DataSecurityIBPLRules",),
+        sections=("IbplRules",),
+    ),
+    Stage(
+        "widgets",
+        "ui",
+        "createWidgetTablesInDB",
+        tables=(
+            "WidgetDefinitionProperties",
+            "WidgetMeasuresList",
+            "WidgetMeasureFilters",
+            "WidgetInterDependentMeasures",
+            "WidgetAssociationMeasures",
+            "WidgetLevelAttributes",
+            "WidgetLevelAttrFilters",
+            "WidgetGraphEdgesList",
+            "WidgetNamedSets",
+            "ActionButtonBindingsForWidget",
+            "ExcelActionButtonsForWidget",
+        ),
+        message="Extracting Widgets Data",
+        sections=("Layout.WidgetDefinitions", "Layout.WidgetModels"),
+    ),
+    Stage(
+        "webLayout",
+        "ui",
+        "createWebLayoutTablesInDB",
+        tables=(
+            "Workspaces",
+            "PageGroups",
+            "Pages",
+            "Views",
+            "WebLayoutPageWidgets",
+            "WebLayoutViewWidgets",
+            "WidgetFilterSharings",
+            "WidgetFilterLinkings",
+            "WidgetInfoContext",
+            "WidgetNavigationViews",
+            "ActionButtonBindingsForWeb",
+        ),
+        after=("widgets",),
+        message="Extracting Web Widgets Data",
+        sections=("Layout.Workspaces", "Layout.WidgetDefinitions"),
+    ),
+    Stage(
+        "excelLayout",
+        "ui",
+        "createExcelLayoutTablesInDB",
+        tables=(
+            "ExcelFolders",
+            "ExcelWorkbooksInFolders",
+            "ExcelLayoutWidgets",
+            "ActionButtonBindingsForExcel",
+            "Widgets",
+        ),
+        after=("widgets", "webLayout"),
+        message="Extracting Excel Widgets Data",
+        sections=(
+            "XLFolders",
+            "XLWorkbooks",
+            "XLWorkbookInFolders",
+            "XLWidgetInWorkbooks",
+            "Users",
+            "Layout.WidgetDefinitions",
+        ),
+    ),
+    Stage(
+        "translations",
+        "ui",
+        "createTranslationTablesInDB",
+        tables=(
+            "WorkspaceTranslations",
+            "PageGroupTranslations",
+            "PageTranslations",
+            "ViewTranslations",
+            "PageWidgetTranslations",
+            "ViewWidgetTranslations",
+        ),
+        message="Extracting Translation Data",
+        sections=("Translations", "Layout.Workspaces"),
+    ),
+    Stage(
+        "actionButtons",
+        "ui",
+        "createActionButtonTableInDB",
+        tables=(
+            "ActionButtonDetails",
+            "ActionButtonDataSources",
+            "ActionButtonFieldBindings",
+            "ActionButtonRules",
+            "ActionButtonJSRules",
+        ),
+        message="Extracting Action button Data",
+        sections=("Layout.ActionButtons",),
+    ),
+    Stage(
+        "modelDependencies",
+        "dependencies",
+        "extractModelDependencies",
+        tables=(
+            "ModelDependencies",
+            "UIDependencies",
+            "PluginInvocation",
+            "ProcInvocation",
+            "PluginOutParameterListing",
+            "TEMPModelDependencies",
+            "TEMPUIDependencies",
+        ),
+        reads=(
+            "Measures",
+            "MeasureFormulae",
+            "MeasureSpreads",
+            "MeasureTwins",
+            "MeasureConditionalFormats",
+            "GraphEdges",
+            "ActiveRuleFormulae",
+            "NamedSets",
+            "Procedures",
+            "ProcCodes",
+            "TenantPluginDetails",
+            "NonRPluginParams",
+            "RGenPluginInputQueries",
+            "RGenPluginInputTables",
+            "RGenPluginOutputTables",
+            "PythonPluginInputTables",
+            "PythonPluginOutputMeasures",
+            "RGenPluginScripts",
+            "RTimePluginScripts",
+            "PythonPluginScripts",
+            "PySparkPluginScripts",
+            "ActionButtonRules",
+            "ActionButtonJSRules",
+        ),
+        message="Extracting Model Dependencies",
+        steps=DependencyExtractor.modelDependencySteps,
+    ),
+    Stage(
+        "widgetDependencies",
+        "dependencies",
+        "processWidgetDependencies",
+        tables=("UIDependencies", "TEMPModelDependencies", "TEMPUIDependencies"),
+        reads=(
+            "Measures",
+            "WidgetMeasuresList",
+            "WidgetMeasureFilters",
+            "WidgetInterDependentMeasures",
+            "WidgetAssociationMeasures",
+        ),
+        message="Extracting UI Dependencies",
+    ),
+    Stage(
+        "measureXRef",
+        "dependencies",
+        "createMeasureXRef",
+        tables=("MeasureXRef",),
+        reads=(
+            "ModelDependencies",
+            "UIDependencies",
+            "PythonPluginOutputMeasures",
+            "RTimePluginInputs",
+            "RTimePluginOutputs",
+            "WidgetGraphEdgesList",
+        ),
+        message="Extracting Measure Cross Reference",
+    ),
+    Stage(
+        "searchIndex",
+        "search",
+        "buildSearchIndex",
+        tables=("SearchIndex",),
+        reads=tuple(searchSources),
+        message="Building Search Index",
+    ),
+    Stage(
+        "dimensionFiles",
+        "files",
+        "createDimCSVArrays",
+        reads=(
+            "Dimensions",
+            "DimAttributes",
+            "DimAttrProperties",
+            "DimAttrTranslations",
+            "DimAttrPropTranslations",
+            "DimHierarchies",
+            "DimHierLevels",
+            "DimAliases",
+            "DimAttrAliases",
+            "Picklists",
+            "PickListValues",
+        ),
+    ),
+    Stage(
+        "graphFiles",
+        "files",
+        "createGraphCSVArrays",
+        reads=(
+            "Graphs",
+            "GraphEdges",
+            "GraphEdgeTranslations",
+            "GraphFromNodes",
+            "GraphToNodes",
+            "GraphNodeTranslations",
+            "NodeCombos",
+            "NodeCombosConditionalFormats",
+        ),
+    ),
+    Stage(
+        "planFiles",
+        "files",
+        "createPlanCSVArrays",
+        reads=(
+            "Plans",
+            "MeasureGroups",
+            "MeasureGroupTranslations",
+            "MeasureGrpExternalConfigs",
+            "MeasureGrpGranularity",
+            "MeasureGroupAsGraphGranularities",
+            "Measures",
+            "MeasureTranslations",
+            "MeasureAggregates",
+            "MeasurePickLists",
+            "MeasureFormulae",
+            "MeasureSpreads",
+            "MeasureTwins",
+            "MeasureConditionalFormats",
+        ),
+    ),
+    Stage(
+        "actionButtonFiles",
+        "files",
+        "createActionButtonCSVArrays",
+        reads=(
+            "ActionButtonDetails",
+            "ActionButtonDataSources",
+            "ActionButtonFieldBindings",
+            "ActionButtonRules",
+            "ActionButtonJSRules",
+            "ActionButtonBindingsForWidget",
+            "ActionButtonBindingsForWeb",
+            "ActionButtonBindingsForExcel",
+            "ExcelActionButtonsForWidget",
+        ),
+    ),
+    Stage(
+        "ruleFiles",
+        "files",
+        "createRuleFilesArray",
+        reads=(
+            "ActiveRuleFiles",
+            "ActiveRuleScopeLists",
+            "ActiveRuleFormulae",
+            "ActivePluginDetails",
+            "NamedSets",
+        ),
+    ),
+    Stage(
+        "pluginFiles",
+        "files",
+        "createPluginsCSVArrays",
+        reads=(
+            "Plugins",
+            "TenantPluginDetails",
+            "NonRPluginParams",
+            "RGenPluginScripts",
+            "RGenPluginParams",
+            "RGenPluginInputQueries",
+            "RGenPluginInputTables",
+            "RGenPluginOutputTables",
+            "RGenPluginSliceTables",
+            "RTimePluginScripts",
+            "RTimePluginParams",
+            "RTimePluginInputs",
+            "RTimePluginOutputs",
+            "RTimeSeriesParams",
+            "PythonPluginScripts",
+            "PythonPluginParams",
+            "PythonPluginInputTables",
+            "PythonPluginOutputTables",
+            "PythonPluginSliceKeyTables",
+            "PySparkPluginScripts",
+            "PySparkPluginParams",
+            "PySparkPluginInputTables",
+            "PySparkPluginOutputTables",
+            "PySparkPluginSliceKeys",
+        ),
+    ),
+    Stage(
+        "procedureFiles",
+        "files",
+        "createProceduresFilesArray",
+        reads=("Procedures", "ProcParams", "ProcCodes"),
+    ),
+    Stage(
+        "uiFiles",
+        "files",
+        "createUIFilesArray",
+        reads=(
+            "Widgets",
+            "WidgetDefinitionProperties",
+            "WidgetMeasuresList",
+            "WidgetMeasureFilters",
+            "WidgetInterDependentMeasures",
+            "WidgetAssociationMeasures",
+            "WidgetLevelAttributes",
+            "WidgetLevelAttrFilters",
+            "WidgetGraphEdgesList",
+            "WidgetNamedSets",
+            "Workspaces",
+            "PageGroups",
+            "Pages",
+            "Views",
+            "WebLayoutPageWidgets",
+            "WebLayoutViewWidgets",
+            "WidgetFilterSharings",
+            "WidgetFilterLinkings",
+            "WidgetInfoContext",
+            "WidgetNavigationViews",
+        ),
+    ),
+    Stage(
+        "translationFiles",
+        "files",
+        "createTranslationFileArray",
+        reads=(
+            "WorkspaceTranslations",
+            "PageGroupTranslations",
+            "PageTranslations",
+            "ViewTranslations",
+            "PageWidgetTranslations",
+            "ViewWidgetTranslations",
+        ),
+    ),
+    Stage(
+        "excelFiles",
+        "files",
+        "createExcelFilesArray",
+        reads=(
+            "ExcelFolders",
+            "ExcelWorkbooksInFolders",
+            "ExcelLayoutWidgets",
+            "WidgetMeasuresList",
+            "WidgetGraphEdgesList",
+        ),
+    ),
+    Stage(
+        "dependencyFiles",
+        "files",
+        "createDependenciesCSVArray",
+        reads=(
+            "ModelDependencies",
+            "UIDependencies",
+            "PluginInvocation",
+            "ProcInvocation",
+            "MeasureXRef",
+        ),
+    ),
+    Stage(
+        "dataSecurityRuleFile",
+        "files",
+        "createDSRulesFile",
+        reads=("DataSecurityIBPLRules",),
+    ),
+    # Every table as one sorted csv file, in its own <Tenant>_TableCSV folder. Reads all the extracted tables, see
+    # below.
+    Stage("tableFiles", "files", "createTableCSVFiles"),
+]
+
+stagesByName = {x.name: x for x in stages}
+
+# Named outputs, as selected in the GUI.
+outputs = {
+    "Model": ("dimensions", "graphs", "plans", "rules", "dataSecurityRules"),
+    "UI": ("widgets", "webLayout", "excelLayout", "translations", "actionButtons"),
+    "Dependencies": ("modelDependencies", "widgetDependencies", "measureXRef"),
+    "Search": ("searchIndex",),
+    "ModelCSV": (
+        "dimensionFiles",
+        "graphFiles",
+        "planFiles",
+        "ruleFiles",
+        "pluginFiles",
+        "procedureFiles",
+        "dataSecurityRuleFile",
+    ),
+    "UICSV": ("actionButtonFiles", "uiFiles", "translationFiles", "excelFiles"),
+    "DependenciesCSV": ("dependencyFiles",),
+    "TablesCSV": ("tableFiles",),
+}
+
+tableNames = re.findall(r"CREATE TABLE (\w+)", tablesData)
+
+# Statements of tablesData, split once per process.
+tableStatements = [
+    x.strip()
+    for x in tablesData.split(";")
+    if x.strip().startswith("DROP") or x.strip().startswith("CREATE TABLE")
+]
+
+
+def getTableProducers():
+    """
+    Get the stages filling each table.
+    :return: dict of lower case table name to list of stage names
+    """
+    tableProducers = {}
+    for stage in stages:
+        for tableName in stage.tables:
+            tableProducers.setdefault(tableName.lower(), []).append(stage.name)
+    return tableProducers
+
+
+tableProducers = getTableProducers()
+# The table files read every table a stage fills.
+stagesByName["tableFiles"].reads = tuple(
+    x for x in tableNames if x.lower() in tableProducers
+)
+
+
+class StagePlan:
+    def __init__(self, requestedOutputs):
+        """
+        StagePlan Constructor. Resolves the requested outputs to the minimal set of stages producing them, following
+        the tables each stage reads back to the stages filling them.
+        :param requestedOutputs: output names (see outputs), stage names or table names, e.g. ["UICSV"] or
+        ["ModelDependencies"]
+        """
+        plannedStageNames = set()
+        pendingStageNames = []
+        for output in requestedOutputs:
+            pendingStageNames.extend(self.resolveOutput(output))
+        while pendingStageNames:
+            stageName = pendingStageNames.pop()
+            if stageName in plannedStageNames:
+                continue
+            plannedStageNames.add(stageName)
+            stage = stagesByName[stageName]
+            pendingStageNames.extend(stage.after)
+            for tableName in stage.reads:
+                pendingStageNames.extend(tableProducers[tableName.lower()])
+
+        self.stages = [x for x in stages if x.name in plannedStageNames]
+        self.extractionStages = [x for x in self.stages if x.extractor != "files"]
+        self.fileStages = [x for x in self.stages if x.extractor == "files"]
+        self.extractors = {x.extractor for x in self.extractionStages}
+        plannedTables = {i.lower() for x in self.stages for i in x.tables + x.reads}
+        self.tables = [x for x in tableNames if x.lower() in plannedTables]
+        # Stale files are only removed when every file of the output folders is produced. The table files have a
+        # folder of their own.
+        self.allFiles = all(
+            x.name in plannedStageNames
+            for x in stages
+            if x.extractor == "files" and x.name != "tableFiles"
+        )
+        # An incremental plan only replaces its own tables in the database of an earlier run.
+        self.incremental = False
+
+    @staticmethod
+    def resolveOutput(output):
+        """
+        Get the stages directly producing an output.
+        :param output: output name, stage name or table name
+        :return: list of stage names
+        """
+        if output in outputs:
+            return list(outputs[output])
+        if output in stagesByName:
+            return [output]
+        if output.lower() in tableProducers:
+            return list(tableProducers[output.lower()])
+        raise ValueError("Unknown output " + output)
+
+    def getIncrementalPlan(self, changedSections, changedStageNames=()):
+        """
+        Get the plan extracting again, into the database of an earlier run of this plan, only what depends on the
+        changed json sections: the stages reading a changed section, the stages reading or sharing the tables of
+        these and so on, with the stages they are run after. The file stages all run as soon as one extraction
+        stage runs, the csv export only rewrites the files whose content changed.
+        :param changedSections: names of the changed json sections, "Layout.<key>" for a key of Layout
+        :param changedStageNames: stages to run again whatever their sections, e.g. the stage counting measure usage
+        over the whole json
+        :return: StagePlan
+        """
+        rerunStageNames = {
+            x.name
+            for x in self.extractionStages
+            if x.name in changedStageNames
+            or any(i in changedSections for i in x.sections)
+        }
+        pendingStageNames = list(rerunStageNames)
+        while pendingStageNames:
+            stage = stagesByName[pendingStageNames.pop()]
+            rerunTables = {x.lower() for x in stage.tables}
+            for otherStage in self.extractionStages:
+                if otherStage.name in rerunStageNames:
+                    continue
+                # Stages sharing extractor state, e.g. the widget usage counts, run together.
+                isSharingState = (
+                    otherStage.name in stage.after or stage.name in otherStage.after
+                )
+                if isSharingState or any(
+                    x.lower() in rerunTables
+                    for x in otherStage.tables + otherStage.reads
+                ):
+                    rerunStageNames.add(otherStage.name)
+                    pendingStageNames.append(otherStage.name)
+        if rerunStageNames:
+            rerunStageNames.update(x.name for x in self.fileStages)
+
+        incrementalPlan = copy.copy(self)
+        incrementalPlan.stages = [x for x in self.stages if x.name in rerunStageNames]
+        incrementalPlan.extractionStages = [
+            x for x in incrementalPlan.stages if x.extractor != "files"
+        ]
+        incrementalPlan.fileStages = [
+            x for x in incrementalPlan.stages if x.extractor == "files"
+        ]
+        incrementalPlan.extractors = {
+            x.extractor for x in incrementalPlan.extractionStages
+        }
+        replacedTables = {i.lower() for x in incrementalPlan.stages for i in x.tables}
+        incrementalPlan.tables = [x for x in tableNames if x.lower() in replacedTables]
+        incrementalPlan.incremental = True
+        return incrementalPlan
+
+    def getCreateStatements(self):
+        """
+        Get the statements dropping every table of an earlier run and creating the tables of the plan. An
+        incremental plan only drops and creates its own tables.
+        :return: list of sql statements
+        """
+        plannedTables = {x.lower() for x in self.tables}
+        # Tables filled by the stages, the search index included.
+        replacedTables = {i.lower() for x in self.stages for i in x.tables}
+        statements = []
+        for table in tableStatements:
+            if table.startswith("DROP"):
+                tableName = re.match(r"DROP TABLE IF EXISTS (\w+)", table).group(1)
+                if not self.incremental or tableName.lower() in replacedTables:
+                    statements.append(table)
+            elif table.startswith("CREATE TABLE"):
+                tableName = re.match(r"CREATE TABLE (\w+)", table).group(1)
+                if tableName.lower() in plannedTables:
+                    statements.append(table)
+        return statements
@@ -0,0 +1,135 @@
+import logging
+from itertools import repeat
+
+
+class Field:
+    def __init__(self, *path):
+        """
+        Column taken from the source item, e.g. Field("MeasureName") or Field("Config", "Name") for nested keys.
+        A missing key is an error, like x["MeasureName"].
+        :param path: keys from the source item to the value
+        """
+        self.path = path
+
+    def expression(self, index, namespace):
+        return "x" + "".join(f"[{i!r}]" for i in self.path)
+
+
+class OptionalField:
+    def __init__(self, key, default=None):
+        """
+        Column taken from the source item, with a default when the key is missing, like
+        x["key"] if "key" in x else default.
+        :param key: key in the source item
+        :param default: value used when the key is missing
+        """
+        self.key = key
+        self.default = default
+
+    def expression(self, index, namespace):
+        if self.default is None:
+            return f"x.get({self.key!r})"
+        namespace[f"_default{index}"] = self.default
+        return f"x.get({self.key!r}, _default{index})"
+
+
+class ContextValue:
+    def __init__(self, key):
+        """
+        Column taken from the context of the parent entities, e.g. TenantName, PlanName.
+        :param key: key in the context dict
+        """
+        self.key = key
+
+    def expression(self, index, namespace):
+        return f"c[{self.key!r}]"
+
+
+class Computed:
+    def __init__(self, function):
+        """
+        Column computed from the source item and the context.
+        :param function: function(item, context) returning the column value
+        """
+        self.function = function
+
+    def expression(self, index, namespace):
+        namespace[f"_function{index}"] = self.function
+        return f"_function{index}(x, c)"
+
+
+class TableMapping:
+    def __init__(self, tableName, source, columns, where=None):
+        """
+        Declarative mapping of a list in the tenant json to the rows of a table. The column expressions are compiled
+        once into a single function building the row tuple, which feeds executemany directly.
+        :param tableName: table the rows are inserted into
+        :param source: keys from the parent entity to the list of source items
+        :param columns: list of (column name, Field/OptionalField/ContextValue/Computed)
+        :param where: optional filter function(item) for the source items
+        """
+        self.logger = logging.getLogger("extractor-logger")
+        self.tableName = tableName
+        self.source = (source,) if isinstance(source, str) else tuple(source)
+        self.columns = columns
+        self.where = where
+        self.insertQuery = (
+            f"INSERT INTO {tableName} ({', '.join(i[0] for i in columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})"
+        )
+        self.rowFunction = self.compileRowFunction()
+
+    def compileRowFunction(self):
+        """
+        Compile the column expressions into one function(item, context) returning the row tuple.
+        :return: row function
+        """
+        namespace = {}
+        expressions = [
+            expression.expression(index, namespace)
+            for index, (columnName, expression) in enumerate(self.columns)
+        ]
+        return eval("lambda x, c: (" + ", ".join(expressions) + ",)", namespace)
+
+    def getSourceItems(self, parent):
+        """
+        Get the source items below the parent entity. A missing key gives no items.
+        :param parent: parent entity dict
+        :return: iterable of source items
+        """
+        items = parent
+        for key in self.source:
+            items = items.get(key) if isinstance(items, dict) else None
+            if items is None:
+                return []
+        if self.where is not None:
+            return filter(self.where, items)
+        return items
+
+    def getRows(self, parent, context):
+        """
+        Generate the row tuples for the source items below the parent entity.
+        :param parent: parent entity dict
+        :param context: dict of the values from the parent entities
+        :return: iterator of row tuples
+        """
+        return map(self.rowFunction, self.getSourceItems(parent), repeat(context))
+
+    def insert(self, dbConnection, parent, context):
+        """
+        Insert the rows for the source items below the parent entity.
+        :param dbConnection: database connection
+        :param parent: parent entity dict
+        :param context: dict of the values from the parent entities
+        :return: number of rows inserted
+        """
+        try:
+            return dbConnection.executemany(
+                self.insertQuery, self.getRows(parent, context)
+            ).rowcount
+        except Exception as e:
+            self.logger.error(
+                "Unable to insert data into " + self.tableName + ": " + str(e)
+            )
+            print("Unable to insert data into " + self.tableName + ": " + str(e))
+            return 0
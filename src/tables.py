@@ -258,6 +258,12 @@ tablesData = """
     DROP TABLE IF EXISTS MeasureGroupTranslations;    
     CREATE TABLE MeasureGroupTranslations (TenantName TEXT, PlanName TEXT, MeasureGroupName TEXT, 
     MeasureGroupTranslationName TEXT, MeasureGroupTranslationDescription TEXT, Language TEXT);
+    DROP TABLE IF EXISTS MeasureXRef;
+    CREATE TABLE MeasureXRef (TenantName TEXT, MeasureName TEXT, MeasureType TEXT, EntityType TEXT, EntityName TEXT, 
+    Role TEXT, SourceTable TEXT);
+    DROP TABLE IF EXISTS SearchIndex;
+    DROP TABLE IF EXISTS ExtractionFingerprints;
+    DROP TABLE IF EXISTS StoredTexts;
 """
 
 
@@ -0,0 +1,405 @@
+import csv
+import hashlib
+import logging
+import sqlite3
+import time
+from collections import Counter
+from itertools import groupby
+
+from textstore import (
+    getJsonDigest,
+    getTextDigest,
+    storedJsonColumns,
+    storedTextColumns,
+)
+
+# Natural key of the entity tables. Tables not listed here are keyed on all their columns, so a modified row is
+# reported as one removed and one added row.
+tableKeys = {
+    "Dimensions": ("DimensionName",),
+    "DimAttributes": ("DimensionName", "AttributeName"),
+    "DimAttrProperties": ("DimensionName", "AttributeName", "PropertyName"),
+    "DimAttrAliases": ("DimensionName", "AttributeName", "AliasName"),
+    "DimAliases": ("DimensionName", "AliasName"),
+    "DimHierarchies": ("DimensionName", "HierarchyName"),
+    "DimHierLevels": ("DimensionName", "HierarchyName", "LevelName"),
+    "Graphs": ("RelationshipTypeName",),
+    "GraphEdges": ("RelationshipTypeName", "PropertyName"),
+    "Picklists": ("PickListName",),
+    "PickListValues": ("PickListName", "Value"),
+    "Plans": ("PlanName",),
+    "NamedSets": ("RuleFileName", "SetName"),
+    "MeasureGroups": ("PlanName", "MeasureGroupName"),
+    "MeasureGrpGranularity": (
+        "PlanName",
+        "MeasureGroupName",
+        "DimensionName",
+        "AttributeName",
+    ),
+    "MeasureGrpExternalConfigs": ("PlanName", "MeasureGroupName"),
+    "Measures": ("PlanName", "MeasureGroupName", "MeasureName"),
+    "MeasureConditionalFormats": ("PlanName", "MeasureGroupName", "MeasureName"),
+    "MeasurePickLists": ("PlanName", "MeasureGroupName", "MeasureName"),
+    "MeasureFormulae": ("PlanName", "MeasureGroupName", "MeasureName"),
+    "MeasureSpreads": ("PlanName", "MeasureGroupName", "MeasureName"),
+    "MeasureTranslations": ("PlanName", "MeasureGroupName", "MeasureName", "LCID"),
+    "MeasureStaticPropertiesInfo": (
+        "PlanName",
+        "MeasureGroupName",
+        "MeasureName",
+        "PropertyName",
+    ),
+    "ActiveRuleFiles": ("RuleFileName",),
+    "ActiveRuleScopeLists": ("RuleFileName", "ScopePosition"),
+    "ActiveRuleFormulae": ("RuleFileName", "ScopePosition", "FormulaPosition"),
+    "ActivePluginDetails": ("RuleFileName", "ScopePosition", "PluginPosition"),
+    "Plugins": ("PluginName",),
+    "TenantPluginDetails": ("PluginName",),
+    "RGenPluginScripts": ("PluginName",),
+    "PythonPluginScripts": ("PluginName",),
+    "PySparkPluginScripts": ("PluginName",),
+    "RTimePluginScripts": ("PluginName",),
+    "ProcFiles": ("ProcFile",),
+    "Procedures": ("ProcFile", "ProcName"),
+    "ProcParams": ("ProcName", "ParamName"),
+    "ProcCodes": ("ProcName",),
+    "Workspaces": ("WorkspaceName",),
+    "PageGroups": ("WorkspaceName", "PageGroupName"),
+    "Pages": ("WorkspaceName", "PageGroupName", "PageName"),
+    "Views": ("WorkspaceName", "PageGroupName", "PageName", "ViewName"),
+    "Widgets": ("WidgetName",),
+    "WidgetDefinitionProperties": ("WidgetName", "PropertyName"),
+    "ActionButtonDetails": ("ActionButtonName",),
+    "ExcelFolders": ("FolderName",),
+    "ExcelWorkbooksInFolders": ("XLFolder", "XLWorkbook"),
+    "DataSecurityIBPLRules": ("DataSecurityRuleName",),
+}
+
+# Columns identifying the tenant or snapshot a row was loaded from, never compared.
+ignoredColumns = ("TenantName", "SnapshotName")
+
+
+def sqliteSortKey(value):
+    """
+    Sort key ordering python values like sqlite orders them in ORDER BY: NULL, numbers, text, then blobs. Text is
+    compared by code point, which is the order of the default BINARY collation on UTF-8.
+    :param value: column value
+    :return: sort key
+    """
+    if value is None:
+        return 0, 0
+    if isinstance(value, (int, float)):
+        return 1, value
+    if isinstance(value, str):
+        return 2, value
+    return 3, value
+
+
+def parseDiffSource(source):
+    """
+    Parse a diff source of the command line.
+    :param source: "<tenant db>" or "<warehouse db>::<tenant name>::<snapshot name>"
+    :return: tuple of database location, tenant name and snapshot name, the names are None for a tenant db
+    """
+    parts = source.split("::")
+    if len(parts) == 3:
+        return parts[0], parts[1], parts[2]
+    return source, None, None
+
+
+class TenantDiff:
+    reportColumns = ["TableName", "Change", "Key", "Columns"]
+
+    def __init__(self, oldSource, newSource):
+        """
+        TenantDiff Constructor. Compares two extracted tenants table by table, sort-merging the rows of both on the
+        natural key of the table and comparing the content hashes of rows with the same key.
+        :param oldSource: tuple of database location, tenant name and snapshot name of the old tenant, the names are
+        None for a tenant database and set for a snapshot in a warehouse database
+        :param newSource: same as oldSource for the new tenant
+        """
+        self.logger = logging.getLogger("extractor-logger")
+        self.oldSource = oldSource
+        self.newSource = newSource
+        self.differences = []
+        self.summary = {}
+
+    def run(self):
+        """
+        Compare all the tables of the two tenants.
+        :return: list of difference dicts with reportColumns as keys
+        """
+        startTime = time.perf_counter()
+        # Both databases are attached to one connection, two snapshots of one warehouse are attached twice.
+        diffConnection = sqlite3.connect(":memory:")
+        # Long texts are compared on their digest, and json minified, so a database written before the texts were
+        # stored compares equal to a stored one.
+        diffConnection.create_function(
+            "textdigest", 1, getTextDigest, deterministic=True
+        )
+        diffConnection.create_function(
+            "jsondigest", 1, getJsonDigest, deterministic=True
+        )
+        try:
+            diffConnection.execute("ATTACH DATABASE ? AS old;", (self.oldSource[0],))
+            diffConnection.execute("ATTACH DATABASE ? AS new;", (self.newSource[0],))
+            oldTables = self.getTableNames(diffConnection, "old")
+            newTables = self.getTableNames(diffConnection, "new")
+            for tableName in sorted(oldTables | newTables, key=str.lower):
+                if tableName not in newTables:
+                    self.addDifference(tableName, "TableRemoved")
+                elif tableName not in oldTables:
+                    self.addDifference(tableName, "TableAdded")
+                else:
+                    self.diffTable(diffConnection, tableName)
+        finally:
+            diffConnection.close()
+
+        changeCounts = Counter(x["Change"] for x in self.differences)
+        summary = (
+            f"Diff completed in {time.perf_counter() - startTime:.2f}s: "
+            f"{changeCounts['Added']} added, {changeCounts['Removed']} removed, "
+            f"{changeCounts['Changed']} changed rows"
+        )
+        self.logger.info(summary)
+        print(summary)
+        return self.differences
+
+    def diffTable(self, diffConnection, tableName):
+        """
+        Compare one table present in both tenants.
+        :param diffConnection: connection with the old and new databases attached
+        :param tableName: table name
+        :return: null
+        """
+        oldColumns = self.getTableColumns(diffConnection, "old", tableName)
+        newColumns = self.getTableColumns(diffConnection, "new", tableName)
+        if [x for x in oldColumns if x not in newColumns]:
+            self.addDifference(
+                tableName,
+                "ColumnsRemoved",
+                columns=[x for x in oldColumns if x not in newColumns],
+            )
+        if [x for x in newColumns if x not in oldColumns]:
+            self.addDifference(
+                tableName,
+                "ColumnsAdded",
+                columns=[x for x in newColumns if x not in oldColumns],
+            )
+        columns = [x for x in oldColumns if x in newColumns]
+        keyColumns = list(tableKeys.get(tableName, ()))
+        if not keyColumns or [x for x in keyColumns if x not in columns]:
+            keyColumns = columns
+        valueColumns = [x for x in columns if x not in keyColumns]
+        keyCount = len(keyColumns)
+
+        oldGroups = self.readKeyGroups(
+            diffConnection, "old", tableName, keyColumns, valueColumns, self.oldSource
+        )
+        newGroups = self.readKeyGroups(
+            diffConnection, "new", tableName, keyColumns, valueColumns, self.newSource
+        )
+        counts = Counter()
+        oldGroup = next(oldGroups, None)
+        newGroup = next(newGroups, None)
+        while oldGroup is not None or newGroup is not None:
+            if newGroup is None or (oldGroup is not None and oldGroup[0] < newGroup[0]):
+                for row in oldGroup[1]:
+                    self.addDifference(tableName, "Removed", row[:keyCount])
+                counts["Removed"] += len(oldGroup[1])
+                oldGroup = next(oldGroups, None)
+            elif oldGroup is None or newGroup[0] < oldGroup[0]:
+                for row in newGroup[1]:
+                    self.addDifference(tableName, "Added", row[:keyCount])
+                counts["Added"] += len(newGroup[1])
+                newGroup = next(newGroups, None)
+            else:
+                self.diffKeyGroup(
+                    tableName, oldGroup[1], newGroup[1], keyCount, valueColumns, counts
+                )
+                oldGroup = next(oldGroups, None)
+                newGroup = next(newGroups, None)
+        if counts:
+            self.summary[tableName] = counts
+            self.logger.info(
+                f"{tableName}: {counts['Added']} added, {counts['Removed']} removed, {counts['Changed']} changed"
+            )
+
+    def diffKeyGroup(self, tableName, oldRows, newRows, keyCount, valueColumns, counts):
+        """
+        Compare the rows of both tenants with the same key. Rows with equal content hashes are unchanged, the other
+        rows are paired up as changed and the remaining ones are added or removed.
+        :param tableName: table name
+        :param oldRows: old rows, key values followed by the other values
+        :param newRows: new rows, key values followed by the other values
+        :param keyCount: number of key columns
+        :param valueColumns: names of the columns after the key columns
+        :param counts: Counter of the changes of the table
+        :return: null
+        """
+        if len(oldRows) == 1 and len(newRows) == 1:
+            # Most keys are unique, comparing the two rows directly is cheaper than hashing them.
+            if oldRows[0] == newRows[0]:
+                return
+        else:
+            unchangedHashes = Counter(map(self.rowHash, oldRows)) & Counter(
+                map(self.rowHash, newRows)
+            )
+            oldRows = self.removeRows(oldRows, unchangedHashes.copy())
+            newRows = self.removeRows(newRows, unchangedHashes)
+        for oldRow, newRow in zip(oldRows, newRows):
+            changedColumns = [
+                columnName
+                for columnName, oldValue, newValue in zip(
+                    valueColumns, oldRow[keyCount:], newRow[keyCount:]
+                )
+                if oldValue != newValue
+            ]
+            self.addDifference(tableName, "Changed", oldRow[:keyCount], changedColumns)
+            counts["Changed"] += 1
+        for row in oldRows[len(newRows) :]:
+            self.addDifference(tableName, "Removed", row[:keyCount])
+            counts["Removed"] += 1
+        for row in newRows[len(oldRows) :]:
+            self.addDifference(tableName, "Added", row[:keyCount])
+            counts["Added"] += 1
+
+    def removeRows(self, rows, hashes):
+        """
+        Remove rows by content hash, each hash as many times as counted.
+        :param rows: list of rows
+        :param hashes: Counter of content hashes to remove, updated in place
+        :return: remaining rows
+        """
+        remainingRows = []
+        for row in rows:
+            rowHash = self.rowHash(row)
+            if hashes[rowHash] > 0:
+                hashes[rowHash] -= 1
+            else:
+                remainingRows.append(row)
+        return remainingRows
+
+    @staticmethod
+    def rowHash(row):
+        """
+        Content hash of a row.
+        :param row: tuple of column values
+        :return: hash digest
+        """
+        return hashlib.blake2b(repr(row).encode("utf-8"), digest_size=16).digest()
+
+    def readKeyGroups(
+        self, diffConnection, schemaName, tableName, keyColumns, valueColumns, source
+    ):
+        """
+        Read the rows of a table sorted on the key columns, grouped by key.
+        :param diffConnection: connection with the old and new databases attached
+        :param schemaName: "old" or "new"
+        :param tableName: table name
+        :param keyColumns: key column names
+        :param valueColumns: other column names
+        :param source: tuple of database location, tenant name and snapshot name
+        :return: generator of tuples of the sort key and the list of rows of one key
+        """
+        digestFunctions = {
+            x: "textdigest" for x in storedTextColumns.get(tableName, ())
+        }
+        digestFunctions.update(
+            {x: "jsondigest" for x in storedJsonColumns.get(tableName, ())}
+        )
+        columnList = ", ".join(
+            f'{digestFunctions[x]}("{x}")' if x in digestFunctions else f'"{x}"'
+            for x in keyColumns + valueColumns
+        )
+        orderList = ", ".join(f'"{x}"' for x in keyColumns)
+        query = f'SELECT {columnList} FROM {schemaName}."{tableName}"'
+        parameters = ()
+        if source[1] is not None:
+            query += " WHERE TenantName=? AND SnapshotName=?"
+            parameters = (source[1], source[2])
+        keyCount = len(keyColumns)
+        cursor = diffConnection.execute(query + f" ORDER BY {orderList};", parameters)
+        for sortKey, rows in groupby(
+            cursor, key=lambda x: tuple(map(sqliteSortKey, x[:keyCount]))
+        ):
+            yield sortKey, list(rows)
+
+    def addDifference(self, tableName, change, key=(), columns=()):
+        """
+        Add a difference to the report.
+        :param tableName: table name
+        :param change: "Added", "Removed", "Changed", "TableAdded", "TableRemoved", "ColumnsAdded" or "ColumnsRemoved"
+        :param key: key values of the row
+        :param columns: changed, added or removed column names
+        :return: null
+        """
+        self.differences.append(
+            {
+                "TableName": tableName,
+                "Change": change,
+                "Key": " | ".join("" if x is None else str(x) for x in key),
+                "Columns": ", ".join(columns),
+            }
+        )
+
+    def writeReport(self, reportPath):
+        """
+        Write the differences to a csv file.
+        :param reportPath: report file location
+        :return: null
+        """
+        with open(reportPath, "w", newline="", encoding="utf-8") as reportFile:
+            fileWriter = csv.DictWriter(reportFile, fieldnames=self.reportColumns)
+            fileWriter.writeheader()
+            fileWriter.writerows(self.differences)
+        print("Diff report written to " + reportPath)
+
+    def printReport(self):
+        """
+        Print the differences, grouped by table.
+        :return: null
+        """
+        for tableName, differences in groupby(
+            self.differences, key=lambda x: x["TableName"]
+        ):
+            print(tableName)
+            for difference in differences:
+                line = f"  {difference['Change']}: {difference['Key']}"
+                if difference["Columns"]:
+                    line += f" ({difference['Columns']})"
+                print(line)
+
+    @staticmethod
+    def getTableNames(connection, schemaName):
+        """
+        Get the extracted tables of a database.
+        :param connection: database connection
+        :param schemaName: "old" or "new"
+        :return: set of table names
+        """
+        return {
+            x[0]
+            for x in connection.execute(
+                f'SELECT name FROM {schemaName}.sqlite_master WHERE type="table" '
+                f'AND name NOT LIKE "sqlite_%" AND name != "WarehouseSnapshots" AND name NOT LIKE "SearchIndex%" '
+                f'AND name != "ExtractionFingerprints" AND name != "StoredTexts";'
+            )
+        }
+
+    @staticmethod
+    def getTableColumns(connection, schemaName, tableName):
+        """
+        Get the compared columns of a table.
+        :param connection: database connection
+        :param schemaName: "old" or "new"
+        :param tableName: table name
+        :return: list of column names
+        """
+        return [
+            x[1]
+            for x in connection.execute(
+                f'PRAGMA {schemaName}.table_info("{tableName}");'
+            )
+            if x[1] not in ignoredColumns
+        ]
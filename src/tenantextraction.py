@@ -0,0 +1,332 @@
+import errno
+import hashlib
+import logging
+import os
+import sqlite3
+
+import jsonbackend
+from columnarexport import ColumnarExport
+from dbtofile import DBToFiles
+from dependency_extractor import DependencyExtractor
+from filesinks import createFileSink
+from instrumentation import StageRecorder
+from modelextractor import ModelExtractor
+from ruleextractor import RuleExtractor
+from searchindex import TenantSearchIndex
+from stageplanner import StagePlan
+from tables import tablesData
+from tenantfingerprints import TenantFingerprints
+from tenantindex import TenantModelIndex
+from textstore import TextStore
+from uiextractor import UIExtractor
+from warehouse import TenantWarehouse
+
+
+class TenantExtraction:
+    def __init__(self, extractionOptions, stagePlan=None, recorder=None):
+        """
+        TenantExtraction Constructor. Runs the extraction of one tenant without any GUI.
+        :param extractionOptions: dict with the booleans model, ui, dependencies, csv, xlsx, columnar, search and
+        measureUsage, the archive format ("" for plain files), the outputs list, which replaces the
+        model/ui/dependencies/csv/search selection when not empty, optionally the warehouse database and snapshot name
+        the tenant is loaded into, and optionally incremental, True to only extract again what changed since the last
+        run into the same database
+        :param stagePlan: StagePlan to run, built from the options if not given
+        :param recorder: StageRecorder of the run, e.g. already holding the json load stage
+        """
+        self.logger = logging.getLogger("extractor-logger")
+        self.extractionOptions = extractionOptions
+        self.stagePlan = (
+            stagePlan if stagePlan else self.createStagePlan(extractionOptions)
+        )
+        self.recorder = recorder if recorder else StageRecorder()
+        self.tenantDataDBName = None
+        self.zipHash = None
+
+    @staticmethod
+    def createStagePlan(extractionOptions):
+        """
+        Create the StagePlan of the selected outputs.
+        :param extractionOptions: extraction options dict
+        :return: StagePlan
+        """
+        requestedOutputs = extractionOptions.get("outputs")
+        if not requestedOutputs:
+            requestedOutputs = []
+            for optionName, output in (
+                ("model", "Model"),
+                ("ui", "UI"),
+                ("dependencies", "Dependencies"),
+            ):
+                if extractionOptions[optionName]:
+                    requestedOutputs.append(output)
+                    if extractionOptions["csv"]:
+                        requestedOutputs.append(output + "CSV")
+            # The search index covers model and ui tables and is about as big as the texts it indexes, it is only
+            # built on request.
+            if (
+                extractionOptions.get("search")
+                and extractionOptions["model"]
+                and extractionOptions["ui"]
+            ):
+                requestedOutputs.append("Search")
+        return StagePlan(requestedOutputs)
+
+    def getSignature(self):
+        """
+        Get the extraction options the extracted tables and files depend on. A tenant extracted with other options,
+        or by a version with other tables, is extracted again in full by an incremental run.
+        :return: signature string
+        """
+        return jsonbackend.dumps(
+            {
+                "Stages": [x.name for x in self.stagePlan.stages],
+                "MeasureUsage": bool(self.extractionOptions["measureUsage"]),
+                "Xlsx": bool(self.extractionOptions["xlsx"]),
+                "Columnar": bool(self.extractionOptions.get("columnar")),
+                "Archive": self.extractionOptions["archive"],
+                "Tables": hashlib.sha1(tablesData.encode("utf-8")).hexdigest(),
+                "JsonBackend": jsonbackend.defaultDecoder,
+            }
+        )
+
+    def skipUnchangedTenant(self, zipFile, location):
+        """
+        Check, before the json is read, if the zip was already extracted into the destination directory with the
+        same options. The database of an unchanged tenant is only loaded into the warehouse, if one is given.
+        :param zipFile: tenant zip file location
+        :param location: destination location for the database
+        :return: tenant name if the tenant is unchanged and was skipped, else None
+        """
+        self.zipHash = TenantFingerprints.getZipHash(zipFile)
+        extractedZip = TenantFingerprints.findExtractedZip(
+            location, self.zipHash, self.getSignature()
+        )
+        if extractedZip is None:
+            return None
+        self.tenantDataDBName, tenantName = extractedZip
+        self.logger.info(
+            f"{zipFile} is unchanged since the extraction into {self.tenantDataDBName}, skipped"
+        )
+        print(f"{tenantName} is unchanged, extraction skipped")
+        if self.extractionOptions.get("warehouse"):
+            with self.recorder.stage("warehouse"):
+                TenantWarehouse(self.extractionOptions["warehouse"]).loadTenant(
+                    self.tenantDataDBName,
+                    tenantName,
+                    self.extractionOptions.get("snapshot"),
+                )
+        return tenantName
+
+    def getIncrementalPlan(self, fingerprints):
+        """
+        Get the plan extracting again what changed since the run which stored its fingerprints in the database.
+        :param fingerprints: TenantFingerprints of the json data
+        :return: StagePlan, the full plan if the database has no fingerprints of a run with the same options
+        """
+        previous = TenantFingerprints.load(self.tenantDataDBName)
+        if previous is None or previous.signature != fingerprints.signature:
+            self.logger.info(
+                "No fingerprints of an earlier run with the same options, full extraction"
+            )
+            return self.stagePlan
+        changedSections, changedEntities = fingerprints.getChanges(previous)
+        self.recorder.runInfo["ChangedSections"] = sorted(changedSections)
+        self.recorder.runInfo["ChangedEntities"] = [
+            {"Section": x[0], "Entity": x[1], "Change": x[2]} for x in changedEntities
+        ]
+        self.logger.info("Changed json sections: " + ", ".join(sorted(changedSections)))
+        for sectionName, entityName, change in changedEntities:
+            self.logger.info(f"{sectionName} {entityName}: {change}")
+        changedStageNames = ()
+        if self.extractionOptions["measureUsage"] and changedSections:
+            # The measure usage counts of the plans are counted over the whole json.
+            changedStageNames = ("plans",)
+        return self.stagePlan.getIncrementalPlan(changedSections, changedStageNames)
+
+    def extract(
+        self, location, data, destDir, uiDestDir, tenantIndex=None, zipFile=None
+    ):
+        """
+        Create the database, all the tables in the database and Extract the model, ui and dependencies data.
+        :param location: destination location for the database
+        :param data: json data as dict
+        :param destDir: destination directory of the model files
+        :param uiDestDir: destination directory of the ui files
+        :param tenantIndex: TenantModelIndex of the json data, built here if not given
+        :param zipFile: tenant zip file location, its hash is kept with the fingerprints of an incremental run
+        :return: True if the extraction completed
+        """
+        stagePlan = self.stagePlan
+        recorder = self.recorder
+        self.tenantDataDBName = os.path.join(location, data["Tenant"]["Name"] + ".db")
+        fingerprints = None
+        if self.extractionOptions.get("incremental"):
+            with recorder.stage("fingerprints"):
+                if self.zipHash is None and zipFile:
+                    self.zipHash = TenantFingerprints.getZipHash(zipFile)
+                fingerprints = TenantFingerprints(
+                    data, self.zipHash, self.getSignature()
+                )
+                stagePlan = self.getIncrementalPlan(fingerprints)
+        if not os.path.exists(os.path.dirname(self.tenantDataDBName)):
+            try:
+                os.makedirs(os.path.dirname(self.tenantDataDBName))
+            except OSError as exc:  # Guard against race condition
+                if exc.errno != errno.EEXIST:
+                    raise
+        self.logger.info(
+            "Extraction stages: "
+            + ", ".join(x.name for x in stagePlan.stages)
+            + f" ({len(stagePlan.tables)} tables)"
+        )
+
+        try:
+            # creating a connection
+            tenantDataDBConnection = sqlite3.connect(self.tenantDataDBName)
+            tenantDataDBConnection.isolation_level = (
+                "DEFERRED"  # Set None for auto-commit.
+            )
+            tenantDataDBConnection.row_factory = sqlite3.Row  # faster access to data
+            # tenantDataDBconnection.set_trace_callback(print)  # To debug all sqlite callback
+            # tenantDataDBconnection = tenantDataDBconnection.cursor()
+            self.logger.info(
+                "Tenant Database created successfully at " + self.tenantDataDBName
+            )
+            # Tables are dropped and created outside of a transaction, the fingerprints of the earlier run must be
+            # gone first.
+            TenantFingerprints.clear(tenantDataDBConnection)
+            for table in stagePlan.getCreateStatements():
+                try:
+                    tenantDataDBConnection.execute(table)
+                except Exception as e:
+                    print("Cannot create table: " + str(e))
+                    self.logger.error("Cannot create table: " + str(e))
+            textStore = TextStore(tenantDataDBConnection)
+            textStore.createTable()
+            self.logger.info("All Tables added in the database.")
+
+        except Exception as e:
+            self.logger.error("Error creating Tenant Database " + str(e))
+            print("Error creating Tenant Database " + str(e))
+            return False
+
+        recorder.runInfo["TenantName"] = data["Tenant"]["Name"]
+        recorder.runInfo["PlannedStages"] = [x.name for x in stagePlan.stages]
+        isSelectDependencies = any(
+            x.extractor == "dependencies" for x in stagePlan.extractionStages
+        )
+        recorder.stageCount = (
+            recorder.completedCount
+            + len(stagePlan.stages)
+            + isSelectDependencies
+            + bool(self.extractionOptions["xlsx"])
+            + bool(self.extractionOptions.get("columnar"))
+            + bool(self.extractionOptions.get("warehouse"))
+        )
+        recorder.attach(tenantDataDBConnection)
+
+        # Parse and insert data in the table
+        if tenantIndex is None:
+            tenantIndex = TenantModelIndex(data)
+        extractors = {}
+        for stage in stagePlan.extractionStages:
+            with recorder.stage(stage.name, stage.tables):
+                if stage.extractor not in extractors:
+                    extractors[stage.extractor] = self.createExtractor(
+                        stage.extractor,
+                        tenantDataDBConnection,
+                        data,
+                        tenantIndex,
+                        textStore,
+                    )
+                if stage.message:
+                    self.logger.info(stage.message)
+                    print(stage.message)
+                if stage.steps:
+                    for step in stage.steps:
+                        with recorder.stage(step, parent=stage.name):
+                            getattr(extractors[stage.extractor], step)()
+                else:
+                    getattr(extractors[stage.extractor], stage.method)()
+        if isSelectDependencies:
+            with recorder.stage(
+                "cleanDependencies", ("ModelDependencies", "UIDependencies")
+            ):
+                extractors["dependencies"].cleanDependenciesTable()
+            self.logger.info("Done with Dependencies table")
+
+        isSelectCSV = len(stagePlan.fileStages) > 0
+        fileSink = None
+        if isSelectCSV:
+            fileSink = createFileSink(
+                self.extractionOptions["archive"], location, data["Tenant"]["Name"]
+            )
+        dbToFiles = DBToFiles(tenantDataDBConnection, destDir, uiDestDir, fileSink)
+        if isSelectCSV:
+            self.logger.info("Creating CSV Files.")
+            print("Creating CSV Files.")
+            for stage in stagePlan.fileStages:
+                with recorder.stage(stage.name):
+                    getattr(dbToFiles, stage.method)()
+            dbToFiles.close(stagePlan.allFiles)
+        if self.extractionOptions["xlsx"]:
+            with recorder.stage("excelExport"):
+                dbToFiles.createExcelFromDB()
+        if self.extractionOptions.get("columnar"):
+            with recorder.stage("columnarExport"):
+                ColumnarExport(
+                    tenantDataDBConnection, location, data["Tenant"]["Name"]
+                ).exportTables()
+        self.logger.info("Completed Extraction")
+        print("Completed Extraction")
+        try:
+            if stagePlan.incremental:
+                textStore.removeUnusedTexts()
+            if fingerprints is not None:
+                fingerprints.save(tenantDataDBConnection)
+            tenantDataDBConnection.commit()
+            recorder.detach()
+            tenantDataDBConnection.close()
+        except Exception as e:
+            self.logger.error("Unable to Close DB connection " + str(e))
+            print("Unable to Close DB connection " + str(e))
+        if self.extractionOptions.get("warehouse"):
+            with recorder.stage("warehouse"):
+                TenantWarehouse(self.extractionOptions["warehouse"]).loadTenant(
+                    self.tenantDataDBName,
+                    data["Tenant"]["Name"],
+                    self.extractionOptions.get("snapshot"),
+                )
+        recorder.writeReport(
+            os.path.join(location, data["Tenant"]["Name"] + "_RunReport.json")
+        )
+        return True
+
+    def createExtractor(
+        self, extractorName, dbConnection, data, tenantIndex, textStore
+    ):
+        """
+        Create the extractor running the stages of a StagePlan.
+        :param extractorName: "model", "rules", "ui", "dependencies" or "search"
+        :param dbConnection: database connection
+        :param data: json data as dict
+        :param tenantIndex: TenantModelIndex of the json data
+        :param textStore: TextStore of the database
+        :return: extractor instance
+        """
+        if extractorName == "model":
+            return ModelExtractor(
+                dbConnection,
+                data,
+                self.extractionOptions["measureUsage"],
+                tenantIndex,
+                textStore,
+            )
+        if extractorName == "rules":
+            return RuleExtractor(data, dbConnection, tenantIndex, textStore)
+        if extractorName == "ui":
+            return UIExtractor(data, dbConnection, tenantIndex, textStore)
+        if extractorName == "search":
+            return TenantSearchIndex(dbConnection)
+        return DependencyExtractor(dbConnection, tenantIndex, extractAll=False)
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import sqlite3
+
+import jsonbackend
+
+
+class TenantFingerprints:
+    tableName = "ExtractionFingerprints"
+    # Sections holding a dict of entity lists, fingerprinted per key, so e.g. a changed workspace does not change the
+    # fingerprint of the action buttons.
+    nestedSections = ("Layout",)
+    # Name of the major entities of a section, fingerprinted one by one to report which of them changed.
+    entityNameKeys = {
+        "Dimensions": "DimensionName",
+        "Plans": "PlanName",
+        "RuleGroupLabels": "LabelName",
+        "RuleGroups": "RuleGroupName",
+        "TenantPlugIns": "ModuleName",
+        "GlobalPlugIns": "ModuleName",
+        "IbplRules": "Name",
+        "Layout.Workspaces": "Name",
+        "Layout.WidgetDefinitions": "Name",
+        "Layout.ActionButtons": "Name",
+        "XLWorkbooks": "WorkbookName",
+    }
+
+    def __init__(self, data=None, zipHash=None, signature=None):
+        """
+        TenantFingerprints Constructor. Content hashes of the top level sections and major entities of a tenant json,
+        kept in the tenant database so the next run only extracts again what changed.
+        :param data: json data, None for fingerprints loaded from a database
+        :param zipHash: hash of the tenant zip (see getZipHash)
+        :param signature: extraction options the extracted tables depend on
+        """
+        self.zipHash = zipHash
+        self.signature = signature
+        self.sections = {}
+        self.entities = {}
+        if data is not None:
+            for sectionName, section in data.items():
+                if sectionName in self.nestedSections and isinstance(section, dict):
+                    for key, value in section.items():
+                        self.addSection(f"{sectionName}.{key}", value)
+                else:
+                    self.addSection(sectionName, section)
+
+    def addSection(self, sectionName, section):
+        """
+        Fingerprint one section. The fingerprint of a section with major entities is built from the fingerprints of
+        its entities, so the json is only encoded once.
+        :param sectionName: section name
+        :param section: json data of the section
+        :return: null
+        """
+        nameKey = self.entityNameKeys.get(sectionName)
+        if nameKey is None or not isinstance(section, list):
+            self.sections[sectionName] = hashlib.sha1(
+                jsonbackend.encode(section)
+            ).hexdigest()
+            return
+        sectionHash = hashlib.sha1()
+        entityHashes = {}
+        for entity in section:
+            entityDigest = hashlib.sha1(jsonbackend.encode(entity)).digest()
+            sectionHash.update(entityDigest)
+            # Entities of the same name share one fingerprint.
+            entityName = entity.get(nameKey) if isinstance(entity, dict) else None
+            entityHashes.setdefault(str(entityName), hashlib.sha1()).update(
+                entityDigest
+            )
+        self.sections[sectionName] = sectionHash.hexdigest()
+        for entityName, entityHash in entityHashes.items():
+            self.entities[(sectionName, entityName)] = entityHash.hexdigest()
+
+    @staticmethod
+    def getZipHash(zipFile):
+        """
+        Hash of the content of a tenant zip.
+        :param zipFile: zip file location
+        :return: hex digest
+        """
+        zipHash = hashlib.sha1()
+        with open(zipFile, "rb") as inputFile:
+            for chunk in iter(lambda: inputFile.read(1024 * 1024), b""):
+                zipHash.update(chunk)
+        return zipHash.hexdigest()
+
+    def getChanges(self, previous):
+        """
+        Compare with the fingerprints of an earlier run.
+        :param previous: TenantFingerprints of the earlier run
+        :return: tuple of the set of changed section names and the list of (section, entity, change) tuples of the
+        changed entities, change being "added", "removed" or "changed"
+        """
+        changedSections = {
+            x
+            for x in self.sections.keys() | previous.sections.keys()
+            if self.sections.get(x) != previous.sections.get(x)
+        }
+        changedEntities = []
+        for entityKey in sorted(self.entities.keys() | previous.entities.keys()):
+            if entityKey not in previous.entities:
+                changedEntities.append(entityKey + ("added",))
+            elif entityKey not in self.entities:
+                changedEntities.append(entityKey + ("removed",))
+            elif self.entities[entityKey] != previous.entities[entityKey]:
+                changedEntities.append(entityKey + ("changed",))
+        return changedSections, changedEntities
+
+    @classmethod
+    def clear(cls, dbConnection):
+        """
+        Delete the fingerprints stored in a tenant database and commit, before any table of the database is replaced.
+        A run stopped halfway then leaves no fingerprints behind, and the next run extracts the tenant in full instead
+        of skipping it as unchanged.
+        :param dbConnection: tenant database connection
+        :return: null
+        """
+        dbConnection.execute(f"DROP TABLE IF EXISTS {cls.tableName};")
+        dbConnection.commit()
+
+    def save(self, dbConnection):
+        """
+        Replace the fingerprints stored in a tenant database, in the transaction of the caller.
+        :param dbConnection: tenant database connection
+        :return: null
+        """
+        dbConnection.execute(f"DROP TABLE IF EXISTS {self.tableName};")
+        dbConnection.execute(
+            f"CREATE TABLE {self.tableName} (Scope TEXT, SectionName TEXT, EntityName TEXT, Fingerprint TEXT);"
+        )
+        rows = [
+            ("signature", None, None, self.signature),
+            ("zip", None, None, self.zipHash),
+        ]
+        rows.extend(("section", k, None, v) for k, v in self.sections.items())
+        rows.extend(("entity", k[0], k[1], v) for k, v in self.entities.items())
+        dbConnection.executemany(
+            f"INSERT INTO {self.tableName} (Scope, SectionName, EntityName, Fingerprint) VALUES (?,?,?,?);",
+            rows,
+        )
+
+    @classmethod
+    def load(cls, dbName):
+        """
+        Read the fingerprints stored in a tenant database.
+        :param dbName: tenant database location
+        :return: TenantFingerprints, None if the database does not exist or has no fingerprints
+        """
+        if not os.path.isfile(dbName):
+            return None
+        fingerprints = cls()
+        try:
+            dbConnection = sqlite3.connect(dbName)
+            try:
+                rows = dbConnection.execute(
+                    f"SELECT Scope, SectionName, EntityName, Fingerprint FROM {cls.tableName};"
+                ).fetchall()
+            finally:
+                dbConnection.close()
+        except sqlite3.Error:
+            return None
+        for scope, sectionName, entityName, fingerprint in rows:
+            if scope == "signature":
+                fingerprints.signature = fingerprint
+            elif scope == "zip":
+                fingerprints.zipHash = fingerprint
+            elif scope == "section":
+                fingerprints.sections[sectionName] = fingerprint
+            elif scope == "entity":
+                fingerprints.entities[(sectionName, entityName)] = fingerprint
+        return fingerprints
+
+    @classmethod
+    def findExtractedZip(cls, location, zipHash, signature):
+        """
+        Find the tenant database of an earlier run on the same zip with the same options.
+        :param location: destination directory of the tenant databases
+        :param zipHash: hash of the tenant zip
+        :param signature: extraction options the extracted tables depend on
+        :return: tuple of the database location and the tenant name, None if the zip was not extracted yet
+        """
+        if not os.path.isdir(location):
+            return None
+        for fileName in sorted(os.listdir(location)):
+            if not fileName.endswith(".db"):
+                continue
+            dbName = os.path.join(location, fileName)
+            previous = cls.load(dbName)
+            if (
+                previous is not None
+                and previous.zipHash == zipHash
+                and previous.signature == signature
+            ):
+                return dbName, fileName[: -len(".db")]
+        return None
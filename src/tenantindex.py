@@ -0,0 +1,203 @@
+from types import MappingProxyType
+
+
+class TenantModelIndex:
+    skippedDimensions = ("_SchemaPlan", "_SchemaDimension", "_SchemaRelationship")
+    skippedPlans = ("Algorithm", "DimPlugin")
+
+    def __init__(self, data):
+        """
+        TenantModelIndex Constructor. Symbol table of the tenant json built in one pass right after the json is
+        loaded, shared read only by all the extractors for O(1) id and name lookups.
+        :param data: json data
+        """
+        attributeIdToDimName = {}
+        attributeIdToAttrName = {}
+        for dimension in data.get("Dimensions", []):
+            if dimension["DimensionName"] in self.skippedDimensions:
+                continue
+            for attribute in dimension["DimensionAttributes"]:
+                attributeIdToDimName[attribute["Id"]] = dimension["DimensionName"]
+                attributeIdToAttrName[attribute["Id"]] = attribute["AttributeName"]
+
+        pickListIdToName = {
+            x["Id"]: x["PickListName"] for x in data.get("PickLists", [])
+        }
+
+        measureNameToPlanGroup = {}
+        for plan in data.get("Plans", []):
+            if plan["PlanName"] in self.skippedPlans:
+                continue
+            for measureGroup in plan.get("MeasureGroups", []):
+                for measure in measureGroup.get("Measures", []):
+                    measureNameToPlanGroup.setdefault(
+                        measure["MeasureName"],
+                        (plan["PlanName"], measureGroup["MeasureGroupName"]),
+                    )
+
+        widgetIdToName = {}
+        widgetModelIdToModel = {}
+        # Page group ids are only unique within a workspace.
+        pageGroupNamesByWorkspaceId = {}
+        viewIdToView = {}
+        # Global ids of the layout entities, the ids the translations refer to.
+        layoutGIdToName = {
+            "Workspace": {},
+            "PageGroup": {},
+            "Page": {},
+            "PageWidgetDefinitions": {},
+            "View": {},
+            "ViewWidgetDefinition": {},
+        }
+        if "Layout" in data:
+            layout = data["Layout"]
+            for widget in layout.get("WidgetDefinitions", []):
+                widgetIdToName[widget["Id"]] = widget.get("Name")
+            for widgetModel in layout.get("WidgetModels", []):
+                widgetModelIdToModel.setdefault(widgetModel["Id"], widgetModel)
+            for workspace in layout.get("Workspaces", []):
+                layoutGIdToName["Workspace"][workspace.get("WorkspaceId")] = workspace[
+                    "Title"
+                ]
+                workspacePageGroups = pageGroupNamesByWorkspaceId.setdefault(
+                    workspace.get("Id"), {}
+                )
+                for pageGroup in workspace["PageGroups"]:
+                    layoutGIdToName["PageGroup"][pageGroup.get("PageGroupId")] = (
+                        pageGroup["Title"]
+                    )
+                    workspacePageGroups.setdefault(pageGroup["Id"], []).append(
+                        pageGroup["Name"]
+                    )
+                for page in workspace["Pages"]:
+                    layoutGIdToName["Page"][page.get("PageId")] = page["Title"]
+                    for pageWidget in page.get("PageWidgetDefinitions", []):
+                        layoutGIdToName["PageWidgetDefinitions"][
+                            pageWidget.get("PageWidgetDefinitionId")
+                        ] = pageWidget.get("Name")
+                    pageGroupName = self.joinPageGroupNames(
+                        workspacePageGroups.get(page["PageGroupId"], [])
+                    )
+                    for view in page["Views"]:
+                        layoutGIdToName["View"][view["ViewId"]] = view["Title"]
+                        for viewWidget in view["ViewWidgetDefinitions"]:
+                            layoutGIdToName["ViewWidgetDefinition"][
+                                viewWidget.get("ViewWidgetDefinitionId")
+                            ] = viewWidget.get("Name")
+                        viewIdToView.setdefault(
+                            view["ViewId"],
+                            MappingProxyType(
+                                {
+                                    "ViewId": view["ViewId"],
+                                    "ViewName": view["Name"],
+                                    "WorkspaceName": workspace["Title"],
+                                    "PageGroupName": pageGroupName,
+                                    "PageName": page["Title"],
+                                }
+                            ),
+                        )
+
+        xlWorkbookIdToName = {}
+        xlWorkbookIdToWorkbook = {}
+        for workbook in data.get("XLWorkbooks", []):
+            xlWorkbookIdToName[workbook["Id"]] = workbook["WorkbookName"]
+            xlWorkbookIdToWorkbook.setdefault(workbook["Id"], workbook)
+        xlWorkbooksByFolderId = {}
+        for workbook in data.get("XLWorkbookInFolders", []):
+            xlWorkbooksByFolderId.setdefault(workbook["XLFolderId"], []).append(
+                workbook
+            )
+        xlWidgetsByWorkbookId = {}
+        for widget in data.get("XLWidgetInWorkbooks", []):
+            xlWidgetsByWorkbookId.setdefault(widget["XLWorkbookId"], []).append(widget)
+
+        translationsByEntityType = {}
+        for translation in data.get("Translations", []):
+            translationsByEntityType.setdefault(translation["EntityType"], []).append(
+                translation
+            )
+
+        scopeLabelsByLabelId = {}
+        for scopeLabel in data.get("RuleGroupScopeLabels", []):
+            scopeLabelsByLabelId.setdefault(scopeLabel["RuleGroupLabelId"], []).append(
+                scopeLabel
+            )
+        ruleGroupsByLabelId = {}
+        for ruleGroup in data.get("RuleGroups", []):
+            ruleGroupsByLabelId.setdefault(ruleGroup["RuleGroupLabelId"], []).append(
+                ruleGroup
+            )
+
+        self.attributeIdToDimName = MappingProxyType(attributeIdToDimName)
+        self.attributeIdToAttrName = MappingProxyType(attributeIdToAttrName)
+        self.pickListIdToName = MappingProxyType(pickListIdToName)
+        self.measureNameToPlanGroup = MappingProxyType(measureNameToPlanGroup)
+        self.widgetIdToName = MappingProxyType(widgetIdToName)
+        self.widgetModelIdToModel = MappingProxyType(widgetModelIdToModel)
+        self.pageGroupNamesByWorkspaceId = MappingProxyType(
+            {
+                k: MappingProxyType({g: tuple(n) for g, n in v.items()})
+                for k, v in pageGroupNamesByWorkspaceId.items()
+            }
+        )
+        self.viewIdToView = MappingProxyType(viewIdToView)
+        self.layoutGIdToName = MappingProxyType(
+            {k: MappingProxyType(v) for k, v in layoutGIdToName.items()}
+        )
+        self.xlWorkbookIdToName = MappingProxyType(xlWorkbookIdToName)
+        self.xlWorkbookIdToWorkbook = MappingProxyType(xlWorkbookIdToWorkbook)
+        self.xlWorkbooksByFolderId = MappingProxyType(
+            {k: tuple(v) for k, v in xlWorkbooksByFolderId.items()}
+        )
+        self.xlWidgetsByWorkbookId = MappingProxyType(
+            {k: tuple(v) for k, v in xlWidgetsByWorkbookId.items()}
+        )
+        self.translationsByEntityType = MappingProxyType(
+            {k: tuple(v) for k, v in translationsByEntityType.items()}
+        )
+        self.scopeLabelsByLabelId = MappingProxyType(
+            {k: tuple(v) for k, v in scopeLabelsByLabelId.items()}
+        )
+        self.ruleGroupsByLabelId = MappingProxyType(
+            {k: tuple(v) for k, v in ruleGroupsByLabelId.items()}
+        )
+
+    def getPageGroupName(self, workspaceId, pageGroupId):
+        """
+        Page group name of a page, as shown in the layout tables.
+        :param workspaceId: id of the workspace of the page
+        :param pageGroupId: page group id of the page
+        :return: page group name
+        """
+        return self.joinPageGroupNames(
+            self.pageGroupNamesByWorkspaceId.get(workspaceId, {}).get(pageGroupId, ())
+        )
+
+    @staticmethod
+    def joinPageGroupNames(pageGroupNames):
+        """
+        Page group name shown for the names of the page groups of a workspace sharing one page group id.
+        :param pageGroupNames: names of the page groups of the workspace matching the page group id of the page
+        :return: page group name
+        """
+        if len(pageGroupNames) == 1:
+            return pageGroupNames[0]
+        if len(pageGroupNames) > 1:
+            return "-MultiplePageGroup-"
+        return "-NoPageGroup-"
+
+    def getScopeLabels(self, ruleGroupLabelId):
+        """
+        Scope labels of a rule group label, in json order.
+        :param ruleGroupLabelId: rule group label id
+        :return: tuple of scope labels
+        """
+        return self.scopeLabelsByLabelId.get(ruleGroupLabelId, ())
+
+    def getRuleGroups(self, ruleGroupLabelId):
+        """
+        Rule groups of a rule group label, in json order.
+        :param ruleGroupLabelId: rule group label id
+        :return: tuple of rule groups
+        """
+        return self.ruleGroupsByLabelId.get(ruleGroupLabelId, ())
@@ -0,0 +1,293 @@
+import hashlib
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # Optional, the texts are compressed with zlib without it.
+    zstandard = None
+
+import jsonbackend
+
+# Code and json columns stored through the TextStore. Their long values are replaced by the digest of the text
+# (a blob), the compressed text is kept once in the StoredTexts table.
+storedTextColumns = {
+    "ActionButtonDetails": ("ConfigJson",),
+    "MeasureGrpExternalConfigs": ("ExternalConfigJson",),
+    "ActivePluginDetails": ("ArgsJSON",),
+    "RGenPluginScripts": ("ScriptCode",),
+    "RTimePluginScripts": ("ScriptCode",),
+    "PythonPluginScripts": ("ScriptCode",),
+    "PySparkPluginScripts": ("ScriptCode",),
+    "ProcCodes": ("ProcCode",),
+}
+
+# The stored text columns holding json, written minified (see storeJson), and the indent the json is read back with
+# (None for a single line), the layout of the csv and xlsx files before the json was minified.
+storedJsonColumns = {
+    "ActionButtonDetails": {"ConfigJson": 4},
+    "MeasureGrpExternalConfigs": {"ExternalConfigJson": None},
+    "ActivePluginDetails": {"ArgsJSON": None},
+}
+
+
+def getColumnExpression(tableName, columnName):
+    """
+    Get the select expression of a column, reading the text of a stored text column, json in its readable layout.
+    :param tableName: table name
+    :param columnName: column name
+    :return: sql expression
+    """
+    jsonColumns = storedJsonColumns.get(tableName, {})
+    if columnName in jsonColumns:
+        indent = jsonColumns[columnName]
+        return f'{TextStore.jsonFunctionName}("{columnName}", {"NULL" if indent is None else indent})'
+    if columnName in storedTextColumns.get(tableName, ()):
+        return f'{TextStore.functionName}("{columnName}")'
+    return f'"{columnName}"'
+
+
+def getTextDigest(text):
+    """
+    Get the value a text is written as to a stored text column, without storing it. Used to compare the columns of
+    a database written before the texts were stored with the stored ones.
+    :param text: column value
+    :return: the digest of a long text, other values as they are
+    """
+    if not isinstance(text, str) or len(text) < TextStore.minimumLength:
+        return text
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+
+def getJsonDigest(text):
+    """
+    Get the value a json text is written as to a stored json column, without storing it: the json is minified first,
+    so json written with another layout, e.g. indented by an earlier version, compares equal.
+    :param text: column value
+    :return: the digest of a long json text, other values as getTextDigest
+    """
+    if isinstance(text, str):
+        try:
+            text = jsonbackend.dumps(jsonbackend.loads(text), compact=True)
+        except ValueError:  # Not json, stored as it is.
+            pass
+    return getTextDigest(text)
+
+
+class TextStore:
+    tableName = "StoredTexts"
+    functionName = "storedtext"
+    jsonFunctionName = "storedjson"
+    # Shorter texts are kept in the column as they are, compressing them saves next to nothing.
+    minimumLength = 256
+    cacheSize = 256
+
+    def __init__(self, dbConnection, schemaName="main"):
+        """
+        TextStore Constructor. Content addressed store of the long code and json texts of a tenant or warehouse
+        database: a text is compressed (zstd if installed, else zlib) and kept once, whatever the number of rows,
+        tenants or snapshots using it. Registers the storedtext() sql function reading the texts back, so they are
+        only decompressed when a query reads them.
+        :param dbConnection: database connection
+        :param schemaName: schema of the StoredTexts table
+        """
+        self.dbConnection = dbConnection
+        self.schemaName = schemaName
+        self.storedDigests = set()
+        self.textCache = {}
+        self.codec = "zstd" if zstandard is not None else "zlib"
+        self.compressor = zstandard.ZstdCompressor() if zstandard is not None else None
+        self.decompressor = (
+            zstandard.ZstdDecompressor() if zstandard is not None else None
+        )
+        dbConnection.create_function(
+            self.functionName, 1, self.getText, deterministic=True
+        )
+        dbConnection.create_function(
+            self.jsonFunctionName, 2, self.getJson, deterministic=True
+        )
+
+    def createTable(self):
+        """
+        Create the StoredTexts table if it does not exist yet.
+        :return: null
+        """
+        self.dbConnection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.schemaName}.{self.tableName} "
+            f"(TextHash BLOB PRIMARY KEY, Codec TEXT, TextLength INTEGER, Content BLOB);"
+        )
+
+    def storeText(self, text):
+        """
+        Store a text, in the transaction of the caller.
+        :param text: text, e.g. a plugin script
+        :return: value written to the column: the digest of a long text, else the text itself
+        """
+        if not isinstance(text, str) or len(text) < self.minimumLength:
+            return text
+        encodedText = text.encode("utf-8")
+        digest = hashlib.sha1(encodedText).digest()
+        if digest not in self.storedDigests:
+            if self.compressor is not None:
+                content = self.compressor.compress(encodedText)
+            else:
+                content = zlib.compress(encodedText)
+            self.dbConnection.execute(
+                f"INSERT OR IGNORE INTO {self.schemaName}.{self.tableName} (TextHash, Codec, TextLength, Content) "
+                f"VALUES (?,?,?,?);",
+                (digest, self.codec, len(encodedText), content),
+            )
+            self.storedDigests.add(digest)
+        return digest
+
+    def storeJson(self, data):
+        """
+        Store json minified.
+        :param data: decoded data, or json text
+        :return: value written to the column, see storeText
+        """
+        if data is None:
+            return None
+        if isinstance(data, str):
+            try:
+                data = jsonbackend.loads(data)
+            except ValueError:  # Not json, stored as it is.
+                return self.storeText(data)
+        return self.storeText(jsonbackend.dumps(data, compact=True))
+
+    def getText(self, value):
+        """
+        Read back a stored text. Used as the storedtext() sql function.
+        :param value: column value
+        :return: text of a digest, other values as they are
+        """
+        if not isinstance(value, bytes):
+            return value
+        text = self.textCache.get(value)
+        if text is not None:
+            return text
+        row = self.dbConnection.execute(
+            f"SELECT Codec, Content FROM {self.schemaName}.{self.tableName} WHERE TextHash=?;",
+            (value,),
+        ).fetchone()
+        if row is None:
+            return None
+        codec, content = row[0], row[1]
+        if codec == "zstd":
+            if self.decompressor is None:
+                raise RuntimeError(
+                    "Reading zstd compressed texts needs the zstandard module - pip install zstandard"
+                )
+            text = self.decompressor.decompress(content).decode("utf-8")
+        else:
+            text = zlib.decompress(content).decode("utf-8")
+        # Rows of one entity are usually read one after the other, a small cache is enough.
+        if len(self.textCache) >= self.cacheSize:
+            self.textCache.clear()
+        self.textCache[value] = text
+        return text
+
+    def getJson(self, value, indent):
+        """
+        Read back a stored json text in the layout of the exported files. Used as the storedjson() sql function.
+        :param value: column value
+        :param indent: json indent, None for a single line
+        :return: json text, other values as getText
+        """
+        text = self.getText(value)
+        if not isinstance(text, str):
+            return text
+        try:
+            return jsonbackend.dumps(jsonbackend.loads(text), indent=indent)
+        except ValueError:  # Not json, stored as it is.
+            return text
+
+    def copyTexts(self, sourceSchemaName):
+        """
+        Copy the stored texts of an attached database, keeping the texts already stored once.
+        :param sourceSchemaName: schema of the attached database
+        :return: number of texts copied
+        """
+        self.createTable()
+        return self.dbConnection.execute(
+            f"INSERT OR IGNORE INTO {self.schemaName}.{self.tableName} (TextHash, Codec, TextLength, Content) "
+            f"SELECT TextHash, Codec, TextLength, Content FROM {sourceSchemaName}.{self.tableName};"
+        ).rowcount
+
+    def getUsedDigests(self, tableName, whereClause="1", parameters=()):
+        """
+        Get the digests the stored text columns of some rows of a table refer to.
+        :param tableName: table name
+        :param whereClause: sql condition selecting the rows
+        :param parameters: parameters of the condition
+        :return: set of digests
+        """
+        usedDigests = set()
+        for columnName in storedTextColumns.get(tableName, ()):
+            usedDigests.update(
+                x[0]
+                for x in self.dbConnection.execute(
+                    f'SELECT DISTINCT "{columnName}" FROM {self.schemaName}."{tableName}" '
+                    f"WHERE ({whereClause}) AND typeof(\"{columnName}\")='blob';",
+                    parameters,
+                )
+            )
+        return usedDigests
+
+    def removeTexts(self, digests):
+        """
+        Delete the given texts if no row uses them anymore. Only looks the digests up, so unlike removeUnusedTexts the
+        cost does not grow with the size of the database when the stored text columns are indexed.
+        :param digests: digests of the texts, e.g. used by rows that were deleted
+        :return: number of texts deleted
+        """
+        tableNames = {
+            x[0]
+            for x in self.dbConnection.execute(
+                f'SELECT name FROM {self.schemaName}.sqlite_master WHERE type="table";'
+            )
+        }
+        if not digests or self.tableName not in tableNames:
+            return 0
+        usedChecks = [
+            f'NOT EXISTS (SELECT 1 FROM {self.schemaName}."{tableName}" WHERE "{columnName}"=:digest)'
+            for tableName, columnNames in storedTextColumns.items()
+            if tableName in tableNames
+            for columnName in columnNames
+        ]
+        query = f"DELETE FROM {self.schemaName}.{self.tableName} WHERE TextHash=:digest"
+        if usedChecks:
+            query += " AND " + " AND ".join(usedChecks)
+        cursor = self.dbConnection.executemany(
+            query + ";", ({"digest": x} for x in digests)
+        )
+        self.storedDigests.difference_update(digests)
+        for digest in digests:
+            self.textCache.pop(digest, None)
+        return cursor.rowcount
+
+    def removeUnusedTexts(self):
+        """
+        Delete the texts not used by any row anymore, e.g. after tables were replaced.
+        :return: number of texts deleted
+        """
+        tableNames = {
+            x[0]
+            for x in self.dbConnection.execute(
+                f'SELECT name FROM {self.schemaName}.sqlite_master WHERE type="table";'
+            )
+        }
+        usedDigests = [
+            f"""SELECT "{columnName}" FROM {self.schemaName}."{tableName}" WHERE typeof("{columnName}")='blob'"""
+            for tableName, columnNames in storedTextColumns.items()
+            if tableName in tableNames
+            for columnName in columnNames
+        ]
+        if self.tableName not in tableNames:
+            return 0
+        query = f"DELETE FROM {self.schemaName}.{self.tableName}"
+        if usedDigests:
+            query += f" WHERE TextHash NOT IN ({' UNION '.join(usedDigests)})"
+        rowCount = self.dbConnection.execute(query + ";").rowcount
+        self.storedDigests.clear()
+        self.textCache.clear()
+        return rowCount
@@ -1,15 +1,20 @@
 import logging
 import sys
-import json
+
+import jsonbackend
+from tenantindex import TenantModelIndex
+from textstore import TextStore
 
 
 class UIExtractor:
 
-    def __init__(self, data, dbConnection):
+    def __init__(self, data, dbConnection, tenantIndex=None, textStore=None):
         """
         UIExtractor Constructor.
         :param data: json data
         :param dbConnection: database connection
+        :param tenantIndex: TenantModelIndex of the json data, built here if not given
+        :param textStore: TextStore of the database the action button configs are stored in
         """
         try:
             self.logger = logging.getLogger("extractor-logger")
@@ -18,8 +23,12 @@ class UIExtractor:
             sys.exit()
         self.data = data
         self.dbConnection = dbConnection
+        self.tenantIndex = tenantIndex if tenantIndex else TenantModelIndex(data)
+        self.textStore = textStore if textStore else TextStore(dbConnection)
         self.finalTenantWidgetsArray = []
-        self.tenantWidgetIdToName = {}
+        # Widget row of finalTenantWidgetsArray by widget id, the usage counters are counted on it.
+        self.widgetIdToUsage = {}
+        self.tenantWidgetIdToName = self.tenantIndex.widgetIdToName
         self.tenantName = self.data["Tenant"]["Name"]
 
     def createWidgetTablesInDB(self):
@@ -29,11 +38,6 @@ class UIExtractor:
         if "Layout" in self.data:
             tenantWidgetsArray = self.data["Layout"]["WidgetDefinitions"]
             for widget in tenantWidgetsArray:
-                tenantWidgetIdToNameTemp = {
-                    widget["Id"]: widget["Name"] if "Name" in widget else None
-                }
-                self.tenantWidgetIdToName.update(tenantWidgetIdToNameTemp)
-
                 widgetMeasuresVisibilityList = []
                 if (
                     "ConfigJson" in widget
@@ -119,12 +123,9 @@ class UIExtractor:
                             print(ex)
 
                 measureData = []
-                matchingWidgetModel = list(
-                    filter(
-                        lambda x: x["Id"] == widget["WidgetModelId"],
-                        self.data["Layout"]["WidgetModels"],
-                    )
-                )[0]
+                matchingWidgetModel = self.tenantIndex.widgetModelIdToModel[
+                    widget["WidgetModelId"]
+                ]
 
                 if "ConfigJson" in widget and "Presentation" in widget["ConfigJson"]:
                     widgetDefinitionPresentationData = [
@@ -634,22 +635,18 @@ class UIExtractor:
                 }
                 for x in tenantWidgetsArray
             ]
+            for x in self.finalTenantWidgetsArray:
+                self.widgetIdToUsage.setdefault(x["WidgetID"], x)
 
     def createWebLayoutTablesInDB(self):
         """
         Insert data in the web layout tables in the database.
         """
         if "Layout" in self.data:
-            tenantWorkspaceIdToName = {}
-            tenantPageGroupIdToName = {}
-            tenantPageIdToName = {}
             tenantWorkspacesArray = self.data["Layout"]["Workspaces"]
-            viewListWithId = []
             workspacePosition = 0
             for workspace in tenantWorkspacesArray:
                 workspacePosition = workspacePosition + 1
-                tenantWorkspaceIdToNameTemp = {workspace["Id"]: workspace["Title"]}
-                tenantWorkspaceIdToName.update(tenantWorkspaceIdToNameTemp)
                 wsRoles = ""
                 if "Roles" in workspace:
                     wsRoles = ", ".join(workspace["Roles"])
@@ -673,10 +670,24 @@ class UIExtractor:
                     )
                     print(e)
 
-                for pageGroup in workspace["PageGroups"]:
-                    tenantPageGroupIdToNameTemp = {pageGroup["Id"]: pageGroup["Name"]}
-                    tenantPageGroupIdToName.update(tenantPageGroupIdToNameTemp)
+                if "ActionButtonBindings" in workspace:
+                    for actionButtonInWS in workspace["ActionButtonBindings"]:
+                        self.dbConnection.execute(
+                            "INSERT INTO ActionButtonBindingsForWeb (TenantName, WorkSpaceName, PageGroupName, PageName, "
+                            "ViewName, WidgetName, WidgetTitle, ActionButtonName) VALUES (?,?,?,?,?,?,?,?)",
+                            (
+                                self.tenantName,
+                                workspace["Title"],
+                                None,
+                                None,
+                                None,
+                                None,
+                                None,
+                                actionButtonInWS["ActionButtonName"],
+                            ),
+                        )
 
+                for pageGroup in workspace["PageGroups"]:
                     try:
                         self.dbConnection.execute(
                             "INSERT INTO PageGroups (TenantName, WorkspaceName, PageGroupName, PageGroupTitle, "
@@ -696,19 +707,9 @@ class UIExtractor:
                         print(e)
 
                 for page in workspace["Pages"]:
-                    tenantPageIdToNameTemp = {page["Id"]: page["Title"]}
-                    tenantPageIdToName.update(tenantPageIdToNameTemp)
-                    pgNameList = list(
-                        filter(
-                            lambda x: x["Id"] == page["PageGroupId"],
-                            workspace["PageGroups"],
-                        )
+                    pgName = self.tenantIndex.getPageGroupName(
+                        workspace.get("Id"), page["PageGroupId"]
                     )
-                    pgName = "-NoPageGroup-"
-                    if len(pgNameList) == 1:
-                        pgName = pgNameList[0]["Name"]
-                    if len(pgNameList) > 1:
-                        pgName = "-MultiplePageGroup-"
                     try:
                         self.dbConnection.execute(
                             "INSERT INTO Pages (TenantName, WorkspaceName, PageGroupName, PageName, PageTitle, "
@@ -727,6 +728,23 @@ class UIExtractor:
                         self.logger.error("Unable to insert data into Pages: " + str(e))
                         print(e)
 
+                    if "ActionButtonBindings" in page:
+                        for actionButtonInPage in page["ActionButtonBindings"]:
+                            self.dbConnection.execute(
+                                "INSERT INTO ActionButtonBindingsForWeb (TenantName, WorkSpaceName, PageGroupName, "
+                                "PageName, ViewName, WidgetName, WidgetTitle, ActionButtonName) VALUES (?,?,?,?,?,?,?,?)",
+                                (
+                                    self.tenantName,
+                                    workspace["Title"],
+                                    pgName,
+                                    page["Title"],
+                                    None,
+                                    None,
+                                    None,
+                                    actionButtonInPage["ActionButtonName"],
+                                ),
+                            )
+
                     sortedPageWidgetList = sorted(
                         (
                             x
@@ -770,17 +788,6 @@ class UIExtractor:
                             "Unable to insert data into WebLayoutPageWidgets: " + str(e)
                         )
                         print(e)
-                    for view in page["Views"]:
-                        viewListWithId.append(
-                            {
-                                "ViewId": view["ViewId"],
-                                "ViewName": view["Name"],
-                                "WorkspaceName": workspace["Title"],
-                                "PageGroupName": pgName,
-                                "PageName": page["Title"],
-                            }
-                        )
-
                     for view in page["Views"]:
                         viewRoles = ""
                         if "Roles" in view:
@@ -807,14 +814,28 @@ class UIExtractor:
                             )
                             print(e)
 
-                        for viewWidget in view["ViewWidgetDefinitions"]:
-                            matchingViewWidget = list(
-                                filter(
-                                    lambda y: y["WidgetID"]
-                                    == viewWidget["WidgetDefinitionId"],
-                                    self.finalTenantWidgetsArray,
+                        if "ActionButtonBindings" in view:
+                            for actionButtonInView in view["ActionButtonBindings"]:
+                                self.dbConnection.execute(
+                                    "INSERT INTO ActionButtonBindingsForWeb (TenantName, WorkSpaceName, PageGroupName, "
+                                    "PageName, ViewName, WidgetName, WidgetTitle, ActionButtonName) "
+                                    "VALUES (?,?,?,?,?,?,?,?)",
+                                    (
+                                        self.tenantName,
+                                        workspace["Title"],
+                                        pgName,
+                                        page["Title"],
+                                        view["Title"],
+                                        None,
+                                        None,
+                                        actionButtonInView["ActionButtonName"],
+                                    ),
                                 )
-                            )[0]
+
+                        for viewWidget in view["ViewWidgetDefinitions"]:
+                            matchingViewWidget = self.widgetIdToUsage[
+                                viewWidget["WidgetDefinitionId"]
+                            ]
                             matchingViewWidget["ViewUsageCount"] = (
                                 matchingViewWidget["ViewUsageCount"] + 1
                             )
@@ -1139,19 +1160,6 @@ class UIExtractor:
                                         + str(e)
                                     )
 
-            for workspace in tenantWorkspacesArray:
-                for page in workspace["Pages"]:
-                    pgNameList = list(
-                        filter(
-                            lambda x: x["Id"] == page["PageGroupId"],
-                            workspace["PageGroups"],
-                        )
-                    )
-                    pgName = "-NoPageGroup-"
-                    if len(pgNameList) == 1:
-                        pgName = pgNameList[0]["Name"]
-                    for view in page["Views"]:
-                        for viewWidget in view["ViewWidgetDefinitions"]:
                             if (
                                 "ConfigJson" in viewWidget
                                 and "Navigations" in viewWidget["ConfigJson"]
@@ -1161,14 +1169,10 @@ class UIExtractor:
                                 for navigation in viewWidget["ConfigJson"][
                                     "Navigations"
                                 ]["RowNavigationList"]["Views"]:
-                                    navigationList = list(
-                                        filter(
-                                            lambda x: x["ViewId"]
-                                            == navigation["ViewId"],
-                                            viewListWithId,
-                                        )
+                                    navigationView = self.tenantIndex.viewIdToView.get(
+                                        navigation["ViewId"]
                                     )
-                                    if len(navigationList) > 0:
+                                    if navigationView is not None:
                                         self.dbConnection.execute(
                                             "INSERT INTO WidgetNavigationViews (TenantName, Workspace, PageGroup, Page, "
                                             "View, WidgetName, NavTargetWorkSpaceName, NavTargetPageGroupName, "
@@ -1183,89 +1187,21 @@ class UIExtractor:
                                                 self.tenantWidgetIdToName[
                                                     viewWidget["WidgetDefinitionId"]
                                                 ],
-                                                navigationList[0]["WorkspaceName"],
-                                                navigationList[0]["PageGroupName"],
-                                                navigationList[0]["PageName"],
-                                                navigationList[0]["ViewName"],
+                                                navigationView["WorkspaceName"],
+                                                navigationView["PageGroupName"],
+                                                navigationView["PageName"],
+                                                navigationView["ViewName"],
                                             ),
                                         )
 
-            for workSpace in tenantWorkspacesArray:
-                if "ActionButtonBindings" in workSpace:
-                    for actionButtonInWS in workSpace["ActionButtonBindings"]:
-                        self.dbConnection.execute(
-                            "INSERT INTO ActionButtonBindingsForWeb (TenantName, WorkSpaceName, PageGroupName, PageName, "
-                            "ViewName, WidgetName, WidgetTitle, ActionButtonName) VALUES (?,?,?,?,?,?,?,?)",
-                            (
-                                self.tenantName,
-                                workSpace["Title"],
-                                None,
-                                None,
-                                None,
-                                None,
-                                None,
-                                actionButtonInWS["ActionButtonName"],
-                            ),
-                        )
-                for page in workSpace["Pages"]:
-                    pgNameList = list(
-                        filter(
-                            lambda x: x["Id"] == page["PageGroupId"],
-                            workSpace["PageGroups"],
-                        )
-                    )
-                    pgName = "-NoPageGroup-"
-                    if len(pgNameList) > 0:
-                        pgName = pgNameList[0]["Name"]
-                    if "ActionButtonBindings" in page:
-                        for actionButtonInPage in page["ActionButtonBindings"]:
-                            self.dbConnection.execute(
-                                "INSERT INTO ActionButtonBindingsForWeb (TenantName, WorkSpaceName, PageGroupName, "
-                                "PageName, ViewName, WidgetName, WidgetTitle, ActionButtonName) VALUES (?,?,?,?,?,?,?,?)",
-                                (
-                                    self.tenantName,
-                                    workSpace["Title"],
-                                    pgName,
-                                    page["Title"],
-                                    None,
-                                    None,
-                                    None,
-                                    actionButtonInPage["ActionButtonName"],
-                                ),
+                            widgetName = self.tenantWidgetIdToName.get(
+                                viewWidget["WidgetDefinitionId"]
                             )
-                    for view in page["Views"]:
-                        if "ActionButtonBindings" in view:
-                            for actionButtonInView in view["ActionButtonBindings"]:
-                                self.dbConnection.execute(
-                                    "INSERT INTO ActionButtonBindingsForWeb (TenantName, WorkSpaceName, PageGroupName, "
-                                    "PageName, ViewName, WidgetName, WidgetTitle, ActionButtonName) "
-                                    "VALUES (?,?,?,?,?,?,?,?)",
-                                    (
-                                        self.tenantName,
-                                        workSpace["Title"],
-                                        pgName,
-                                        page["Title"],
-                                        view["Title"],
-                                        None,
-                                        None,
-                                        actionButtonInView["ActionButtonName"],
-                                    ),
-                                )
-                        for widget in view["ViewWidgetDefinitions"]:
-                            widgetNameList = list(
-                                filter(
-                                    lambda x: x["Id"] == widget["WidgetDefinitionId"],
-                                    self.data["Layout"]["WidgetDefinitions"],
-                                )
-                            )
-                            widgetName = None
-                            if len(widgetNameList) > 0:
-                                widgetName = widgetNameList[0]["Name"]
                             if (
-                                "ConfigJson" in widget
-                                and "ActionButtonBindings" in widget["ConfigJson"]
+                                "ConfigJson" in viewWidget
+                                and "ActionButtonBindings" in viewWidget["ConfigJson"]
                             ):
-                                for actionButtonInWidget in widget["ConfigJson"][
+                                for actionButtonInWidget in viewWidget["ConfigJson"][
                                     "ActionButtonBindings"
                                 ]:
                                     self.dbConnection.execute(
@@ -1274,12 +1210,12 @@ class UIExtractor:
                                         "VALUES (?,?,?,?,?,?,?,?)",
                                         (
                                             self.tenantName,
-                                            workSpace["Title"],
+                                            workspace["Title"],
                                             pgName,
                                             page["Title"],
                                             view["Title"],
                                             widgetName,
-                                            widget["Name"],
+                                            viewWidget["Name"],
                                             actionButtonInWidget["ActionButtonName"],
                                         ),
                                     )
@@ -1288,14 +1224,7 @@ class UIExtractor:
         """
         Insert data in the excel layout tables in the database.
         """
-        tenantXLWorkbookIdToName = {}
-
-        if "XLWorkbooks" in self.data:
-            for workbook in self.data["XLWorkbooks"]:
-                tenantXLWorkbookIdToNameTemp = {
-                    workbook["Id"]: workbook["WorkbookName"]
-                }
-                tenantXLWorkbookIdToName.update(tenantXLWorkbookIdToNameTemp)
+        tenantXLWorkbookIdToName = self.tenantIndex.xlWorkbookIdToName
 
         if "XLFolders" in self.data:
             for folder in self.data["XLFolders"]:
@@ -1351,12 +1280,8 @@ class UIExtractor:
                                 + str(ex)
                             )
 
-                workbooksInFolders = list(
-                    (
-                        widget
-                        for widget in self.data["XLWorkbookInFolders"]
-                        if (widget["XLFolderId"] == folder["Id"])
-                    )
+                workbooksInFolders = self.tenantIndex.xlWorkbooksByFolderId.get(
+                    folder["Id"], ()
                 )
                 for workbook in workbooksInFolders:
                     curWorkBookName = tenantXLWorkbookIdToName[workbook["XLWorkbookId"]]
@@ -1381,12 +1306,9 @@ class UIExtractor:
                             "Unable to insert data into ExcelWorkbooksInFolders: "
                             + str(e)
                         )
-                    workbookDef = list(
-                        filter(
-                            lambda x: x["Id"] == workbook["XLWorkbookId"],
-                            self.data["XLWorkbooks"],
-                        )
-                    )[0]
+                    workbookDef = self.tenantIndex.xlWorkbookIdToWorkbook[
+                        workbook["XLWorkbookId"]
+                    ]
                     if (
                         "ConfigJson" in workbookDef
                         and "ActionButtonBindings" in workbookDef["ConfigJson"]
@@ -1419,20 +1341,13 @@ class UIExtractor:
                                     + str(ex)
                                 )
 
-                    xlWidgetList = list(
-                        (
-                            widget
-                            for widget in self.data["XLWidgetInWorkbooks"]
-                            if (widget["XLWorkbookId"] == workbook["XLWorkbookId"])
-                        )
+                    xlWidgetList = self.tenantIndex.xlWidgetsByWorkbookId.get(
+                        workbook["XLWorkbookId"], ()
                     )
                     for widget in xlWidgetList:
-                        matchingXLWidget = list(
-                            filter(
-                                lambda y: y["WidgetID"] == widget["WidgetDefinitionId"],
-                                self.finalTenantWidgetsArray,
-                            )
-                        )[0]
+                        matchingXLWidget = self.widgetIdToUsage[
+                            widget["WidgetDefinitionId"]
+                        ]
                         matchingXLWidget["ExcelUsageCount"] = (
                             matchingXLWidget["ExcelUsageCount"] + 1
                         )
@@ -1504,121 +1419,51 @@ class UIExtractor:
         Insert data in the translation tables in the database.
         :return:
         """
-        entityTypes = []
-        WorkspaceGIdToName = {}
-        PageGroupGIdToName = {}
-        PageGIdToName = {}
-        PageWidgetDefinitionsGIdToName = {}
-        ViewGIdToName = {}
-        ViewWidgetDefinitionGIdToName = {}
-
         if "Translations" in self.data and "Layout" in self.data:
-            for obj in self.data["Translations"]:
-                entityTypes.append(obj["EntityType"])
-
-            uniEntityTypes = list(set(entityTypes))
+            translationsByEntityType = self.tenantIndex.translationsByEntityType
             self.logger.info(
                 "\nentity types for which translations are given in the tenant are:"
             )
-            self.logger.info(uniEntityTypes)
-
-            for workspace in self.data["Layout"]["Workspaces"]:
-                WorkspaceGIdToNameTemp = {workspace["WorkspaceId"]: workspace["Title"]}
-                WorkspaceGIdToName.update(WorkspaceGIdToNameTemp)
-
-                for pagegroup in workspace["PageGroups"]:
-                    PageGroupGIdToNameTemp = {
-                        pagegroup["PageGroupId"]: pagegroup["Title"]
-                    }
-                    PageGroupGIdToName.update(PageGroupGIdToNameTemp)
-
-                for page in workspace["Pages"]:
-                    PageGIdToNameTemp = {page["PageId"]: page["Title"]}
-                    PageGIdToName.update(PageGIdToNameTemp)
-
-                    for PageWidgetDefinition in page["PageWidgetDefinitions"]:
-                        PageWidgetDefinitionsGIdtToNameTemp = {
-                            PageWidgetDefinition[
-                                "PageWidgetDefinitionId"
-                            ]: PageWidgetDefinition["Name"]
-                        }
-                        PageWidgetDefinitionsGIdToName.update(
-                            PageWidgetDefinitionsGIdtToNameTemp
-                        )
-
-                    for view in page["Views"]:
-                        ViewGIdToNameTemp = {view["ViewId"]: view["Title"]}
-                        ViewGIdToName.update(ViewGIdToNameTemp)
-
-                        for ViewWidgetDefinition in view["ViewWidgetDefinitions"]:
-                            ViewWidgetDefinitionGIdToNameTemp = {
-                                ViewWidgetDefinition[
-                                    "ViewWidgetDefinitionId"
-                                ]: ViewWidgetDefinition["Name"]
-                            }
-                            ViewWidgetDefinitionGIdToName.update(
-                                ViewWidgetDefinitionGIdToNameTemp
-                            )
-
-            WorkspaceEntities = list(
-                filter(
-                    lambda y: (
-                        y["EntityType"] == "Workspace"
-                        and y["EntityId"] in WorkspaceGIdToName.keys()
-                    ),
-                    self.data["Translations"],
-                )
-            )
+            self.logger.info(list(translationsByEntityType))
 
-            PageGroupEntities = list(
-                filter(
-                    lambda y: (
-                        y["EntityType"] == "PageGroup"
-                        and y["EntityId"] in PageGroupGIdToName.keys()
-                    ),
-                    self.data["Translations"],
-                )
-            )
-
-            PageEntities = list(
-                filter(
-                    lambda y: (
-                        y["EntityType"] == "Page"
-                        and y["EntityId"] in PageGIdToName.keys()
-                    ),
-                    self.data["Translations"],
-                )
-            )
+            layoutGIdToName = self.tenantIndex.layoutGIdToName
+            WorkspaceGIdToName = layoutGIdToName["Workspace"]
+            PageGroupGIdToName = layoutGIdToName["PageGroup"]
+            PageGIdToName = layoutGIdToName["Page"]
+            PageWidgetDefinitionsGIdToName = layoutGIdToName["PageWidgetDefinitions"]
+            ViewGIdToName = layoutGIdToName["View"]
+            ViewWidgetDefinitionGIdToName = layoutGIdToName["ViewWidgetDefinition"]
 
-            ViewEntities = list(
-                filter(
-                    lambda y: (
-                        y["EntityType"] == "View"
-                        and y["EntityId"] in ViewGIdToName.keys()
-                    ),
-                    self.data["Translations"],
-                )
-            )
-
-            ViewWidgetDefinitionEntities = list(
-                filter(
-                    lambda y: (
-                        y["EntityType"] == "ViewWidgetDefinition"
-                        and y["EntityId"] in ViewWidgetDefinitionGIdToName.keys()
-                    ),
-                    self.data["Translations"],
-                )
-            )
-
-            PageWidgetDefinitionEntities = list(
-                filter(
-                    lambda y: (
-                        y["EntityType"] == "PageWidgetDefinitions"
-                        and y["EntityId"] in PageWidgetDefinitionsGIdToName.keys()
-                    ),
-                    self.data["Translations"],
-                )
-            )
+            WorkspaceEntities = [
+                x
+                for x in translationsByEntityType.get("Workspace", ())
+                if x["EntityId"] in WorkspaceGIdToName
+            ]
+            PageGroupEntities = [
+                x
+                for x in translationsByEntityType.get("PageGroup", ())
+                if x["EntityId"] in PageGroupGIdToName
+            ]
+            PageEntities = [
+                x
+                for x in translationsByEntityType.get("Page", ())
+                if x["EntityId"] in PageGIdToName
+            ]
+            ViewEntities = [
+                x
+                for x in translationsByEntityType.get("View", ())
+                if x["EntityId"] in ViewGIdToName
+            ]
+            ViewWidgetDefinitionEntities = [
+                x
+                for x in translationsByEntityType.get("ViewWidgetDefinition", ())
+                if x["EntityId"] in ViewWidgetDefinitionGIdToName
+            ]
+            PageWidgetDefinitionEntities = [
+                x
+                for x in translationsByEntityType.get("PageWidgetDefinitions", ())
+                if x["EntityId"] in PageWidgetDefinitionsGIdToName
+            ]
 
             WorkspaceEntityArray = list(
                 [
@@ -1813,7 +1658,9 @@ class UIExtractor:
                         "Alignment": actionButton["Alignment"],
                         "IsPopOver": actionButton["IsPopOver"],
                         "IsGlobal": actionButton["IsGlobal"],
-                        "ConfigJson": json.dumps(actionButton["ConfigJson"], indent=4),
+                        "ConfigJson": self.textStore.storeText(
+                            jsonbackend.dumps(actionButton["ConfigJson"], compact=True)
+                        ),
                     }
                     self.dbConnection.execute(
                         "INSERT INTO ActionButtonDetails (TenantName, ActionButtonName, Tooltip, "
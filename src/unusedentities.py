@@ -0,0 +1,403 @@
+import csv
+import logging
+import re
+import time
+from itertools import groupby
+
+from warehouse import TenantWarehouse
+
+# Entity types of the dependency tables whose entity is not a node of its own: the rows only link the measures.
+measureEntityTypes = {
+    "Measure": "Measure",
+    "ConditionalFormats": "Measure",
+    "Spreading": "Measure",
+    "ComputedAggregation": None,
+    "MeasureTwins": None,
+}
+# Entity types of the dependency tables mapped to node types, all the other ones are plugin classes.
+entityNodeTypes = {
+    "Widget": "Widget",
+    "ActiveRule": "RuleFile",
+    "Procedures": "Procedure",
+    "ActionButton": "ActionButton",
+}
+# Entities running as a whole once used: everything they read or write is used too. A rule file is not one of them,
+# only the rules writing a used measure are.
+runnableNodeTypes = ("Procedure", "ActionButton", "Plugin")
+# Entities reported when unreachable, with the query of all of them: name and location columns.
+reportedEntities = {
+    "Measure": (("Measures", "MeasureName", "PlanName || ' | ' || MeasureGroupName"),),
+    "Plugin": (
+        ("Plugins", "PluginName", "PluginClass"),
+        ("TenantPluginDetails", "PluginName", "PluginClass"),
+    ),
+    "Procedure": (("Procedures", "ProcName", "ProcFile"),),
+    "NamedSet": (("NamedSets", "SetName", "RuleFileName"),),
+    "RuleFile": (("ActiveRuleFiles", "RuleFileName", "NULL"),),
+}
+namedSetPattern = re.compile(r"&([^\s,;()\[\]]+)")
+
+
+class UnusedEntities:
+    reportColumns = ["EntityType", "EntityName", "Location"]
+
+    def __init__(self, dbConnection, tenantName=None, snapshotName=None):
+        """
+        UnusedEntities Constructor. Finds the measures, plugins, procedures, named sets and rule files no UI entity
+        depends on: one graph is built from the layout, action button bindings and dependency tables, and walked
+        from the workspaces, views and excel workbooks. Whatever the walk does not reach is unused.
+        :param dbConnection: extracted tenant or warehouse database connection
+        :param tenantName: tenant name, required for a warehouse database
+        :param snapshotName: snapshot name of a warehouse database, "current" if not given
+        """
+        self.logger = logging.getLogger("extractor-logger")
+        self.dbConnection = dbConnection
+        self.tenantName = tenantName
+        self.snapshotName = snapshotName
+        self.nodeIds = {}
+        self.edges = []
+        self.rootIds = []
+        self.unusedEntities = []
+        self.summary = {}
+
+    def run(self):
+        """
+        Build the dependency graph and find the unreachable entities.
+        :return: list of unused entity dicts with reportColumns as keys
+        """
+        startTime = time.perf_counter()
+        self.tableNames = {
+            x[0]
+            for x in self.dbConnection.execute(
+                'SELECT name FROM sqlite_master WHERE type="table";'
+            )
+        }
+        if "WarehouseSnapshots" in self.tableNames:
+            if self.tenantName is None:
+                raise ValueError("A warehouse database needs a tenant name")
+            self.snapshotName = self.snapshotName or TenantWarehouse.defaultSnapshotName
+            if not self.dbConnection.execute(
+                "SELECT 1 FROM WarehouseSnapshots WHERE TenantName=? AND SnapshotName=?;",
+                (self.tenantName, self.snapshotName),
+            ).fetchone():
+                raise ValueError(
+                    f"Unknown tenant/snapshot {self.tenantName}::{self.snapshotName}, it was not loaded into the "
+                    "warehouse"
+                )
+        elif self.snapshotName is not None:
+            raise ValueError("A snapshot name needs a warehouse database")
+        self.addLayoutEdges()
+        self.addActionButtonEdges()
+        self.addDependencyEdges()
+        if not self.rootIds:
+            raise ValueError(
+                "No workspaces or excel workbooks found, the UI was not extracted"
+            )
+        reached = self.findReachable()
+        self.unusedEntities = []
+        self.summary = {}
+        for entityType, sources in reportedEntities.items():
+            entityNames = {}
+            for tableName, nameColumn, locationColumn in sources:
+                for entityName, location in self.readRows(
+                    tableName, (nameColumn, locationColumn)
+                ):
+                    if entityName:
+                        entityNames.setdefault(entityName, location)
+            unusedCount = 0
+            for entityName, location in sorted(entityNames.items()):
+                nodeId = self.nodeIds.get((entityType, entityName.casefold()))
+                if nodeId is None or not reached[nodeId]:
+                    unusedCount += 1
+                    self.unusedEntities.append(
+                        {
+                            "EntityType": entityType,
+                            "EntityName": entityName,
+                            "Location": location,
+                        }
+                    )
+            self.summary[entityType] = (unusedCount, len(entityNames))
+        summary = (
+            f"Unused entities found in {time.perf_counter() - startTime:.2f}s "
+            f"({len(self.nodeIds)} nodes, {len(self.edges)} edges): "
+            + ", ".join(
+                f"{x[0]} of {x[1]} {k}s" for k, x in self.summary.items() if x[1]
+            )
+        )
+        self.logger.info(summary)
+        print(summary)
+        return self.unusedEntities
+
+    def readRows(self, tableName, columns):
+        """
+        Read columns of a table, only the rows of the tenant and snapshot in a warehouse database.
+        :param tableName: table name
+        :param columns: column names or sql expressions
+        :return: list of rows, empty if the table was not extracted
+        """
+        if tableName not in self.tableNames:
+            return []
+        query = f'SELECT {", ".join(columns)} FROM "{tableName}"'
+        parameters = ()
+        if self.tenantName is not None:
+            query += " WHERE TenantName=?"
+            parameters = (self.tenantName,)
+            if self.snapshotName is not None:
+                query += " AND SnapshotName=?"
+                parameters += (self.snapshotName,)
+        return self.dbConnection.execute(query + ";", parameters).fetchall()
+
+    def getNodeId(self, nodeType, name):
+        """
+        Get the id of a node, added on first use. Names are matched case insensitive, like IBPL does.
+        :param nodeType: node type, e.g. Measure or Widget
+        :param name: entity name
+        :return: node id
+        """
+        nodeKey = (nodeType, name.casefold())
+        nodeId = self.nodeIds.get(nodeKey)
+        if nodeId is None:
+            nodeId = self.nodeIds[nodeKey] = len(self.nodeIds)
+        return nodeId
+
+    def addEdge(self, sourceType, sourceName, targetType, targetName):
+        """
+        Add an edge from an entity to an entity it uses, skipping incomplete rows.
+        :param sourceType: node type of the using entity
+        :param sourceName: name of the using entity
+        :param targetType: node type of the used entity
+        :param targetName: name of the used entity
+        :return: null
+        """
+        if sourceName and targetName and sourceType and targetType:
+            self.edges.append(
+                (
+                    self.getNodeId(sourceType, sourceName),
+                    self.getNodeId(targetType, targetName),
+                )
+            )
+
+    @staticmethod
+    def getViewName(*names):
+        """
+        Get the name of a view node, unique over all workspaces.
+        :param names: workspace, page group, page and view names
+        :return: node name
+        """
+        return " | ".join("" if x is None else x for x in names)
+
+    def addLayoutEdges(self):
+        """
+        Add the roots, workspaces, views and excel workbooks, and the widgets they show.
+        :return: null
+        """
+        # The layout tables name a workspace by its title.
+        for (workspaceName,) in self.readRows(
+            "Workspaces", ("ifnull(WorkspaceTitle, WorkspaceName)",)
+        ):
+            if workspaceName:
+                self.rootIds.append(self.getNodeId("Workspace", workspaceName))
+        for row in self.readRows(
+            "Views", ("WorkspaceName", "PageGroupName", "PageName", "ViewName")
+        ):
+            viewName = self.getViewName(*row)
+            self.rootIds.append(self.getNodeId("View", viewName))
+            self.addEdge("Workspace", row[0], "View", viewName)
+        for row in self.readRows(
+            "WebLayoutViewWidgets",
+            ("Workspace", "Pagegroup", "Page", "View", "WidgetName"),
+        ):
+            self.addEdge("View", self.getViewName(*row[:4]), "Widget", row[4])
+        for workspaceName, widgetName in self.readRows(
+            "WebLayoutPageWidgets", ("WorkspaceName", "Widget")
+        ):
+            self.addEdge("Workspace", workspaceName, "Widget", widgetName)
+        for folderName, workbookName in self.readRows(
+            "ExcelWorkbooksInFolders", ("XLFolder", "XLWorkbook")
+        ):
+            self.rootIds.append(
+                self.getNodeId("Workbook", self.getViewName(folderName, workbookName))
+            )
+        for folderName, workbookName, widgetName in self.readRows(
+            "ExcelLayoutWidgets", ("XLFolder", "XLWorkbook", "Widget")
+        ):
+            self.addEdge(
+                "Workbook",
+                self.getViewName(folderName, workbookName),
+                "Widget",
+                widgetName,
+            )
+
+    def addActionButtonEdges(self):
+        """
+        Add the action buttons bound to workspaces, views, workbooks and widgets.
+        :return: null
+        """
+        for row in self.readRows(
+            "ActionButtonBindingsForWeb",
+            (
+                "WorkspaceName",
+                "PageGroupName",
+                "PageName",
+                "ViewName",
+                "ActionButtonName",
+            ),
+        ):
+            if row[3]:
+                self.addEdge("View", self.getViewName(*row[:4]), "ActionButton", row[4])
+            else:
+                self.addEdge("Workspace", row[0], "ActionButton", row[4])
+        workbookNames = {}
+        for folderName, workbookName in self.readRows(
+            "ExcelWorkbooksInFolders", ("XLFolder", "XLWorkbook")
+        ):
+            workbookNames.setdefault(folderName, []).append(workbookName)
+        for folderName, workbookName, actionButtonName in self.readRows(
+            "ActionButtonBindingsForExcel",
+            ("XLFolder", "XLWorkbook", "ActionButtonName"),
+        ):
+            # A button bound to a folder is on all its workbooks.
+            for name in (
+                [workbookName] if workbookName else workbookNames.get(folderName, [])
+            ):
+                self.addEdge(
+                    "Workbook",
+                    self.getViewName(folderName, name),
+                    "ActionButton",
+                    actionButtonName,
+                )
+        for tableName in (
+            "ActionButtonBindingsForWidget",
+            "ExcelActionButtonsForWidget",
+        ):
+            for widgetName, actionButtonName in self.readRows(
+                tableName, ("WidgetName", "ActionButtonName")
+            ):
+                self.addEdge("Widget", widgetName, "ActionButton", actionButtonName)
+
+    @staticmethod
+    def getEntityNodeType(entityType):
+        """
+        Get the node type of the entity of a dependency row.
+        :param entityType: EntityType column value
+        :return: node type, None if the entity is no node
+        """
+        if entityType in measureEntityTypes:
+            return measureEntityTypes[entityType]
+        return entityNodeTypes.get(entityType, "Plugin")
+
+    def addDependencyEdges(self):
+        """
+        Add the measures used by widgets and the model dependencies: the measures read by the rules writing a
+        measure, the rule files, procedures, plugins and action buttons writing a measure, and everything read or
+        invoked by the procedures, plugins and action buttons.
+        :return: null
+        """
+        for rhsType, rhs, entityType, entityName in self.readRows(
+            "UIDependencies", ("RHSType", "RHS", "EntityType", "EntityName")
+        ):
+            self.addEdge(self.getEntityNodeType(entityType), entityName, rhsType, rhs)
+        for row in self.readRows(
+            "ModelDependencies",
+            (
+                "LHSType",
+                "LHS",
+                "RHSType",
+                "RHS",
+                "EntityType",
+                "EntityName",
+                "NamedSets",
+            ),
+        ):
+            lhsType, lhs, rhsType, rhs, entityType, entityName, namedSets = row
+            nodeType = self.getEntityNodeType(entityType)
+            self.addEdge(lhsType, lhs, rhsType, rhs)
+            if nodeType is None or not entityName:
+                continue
+            if nodeType == "Measure":
+                if not lhs:
+                    self.addEdge(nodeType, entityName, rhsType, rhs)
+                continue
+            self.addEdge(lhsType, lhs, nodeType, entityName)
+            if nodeType in runnableNodeTypes:
+                self.addEdge(nodeType, entityName, lhsType, lhs)
+                self.addEdge(nodeType, entityName, rhsType, rhs)
+            for setName in namedSetPattern.findall(namedSets or ""):
+                if lhs and nodeType not in runnableNodeTypes:
+                    self.addEdge(lhsType, lhs, "NamedSet", setName)
+                else:
+                    self.addEdge(nodeType, entityName, "NamedSet", setName)
+        for entityType, entityName, pluginName in self.readRows(
+            "PluginInvocation", ("EntityType", "EntityName", "PluginName")
+        ):
+            self.addEdge(
+                self.getEntityNodeType(entityType), entityName, "Plugin", pluginName
+            )
+        for entityType, entityName, procName in self.readRows(
+            "ProcInvocation", ("EntityType", "EntityName", "ProcName")
+        ):
+            self.addEdge(
+                self.getEntityNodeType(entityType), entityName, "Procedure", procName
+            )
+        for ruleFileName, pluginName in self.readRows(
+            "ActivePluginDetails", ("RuleFileName", "PluginName")
+        ):
+            self.addEdge("RuleFile", ruleFileName, "Plugin", pluginName)
+
+    def findReachable(self):
+        """
+        Walk the graph from the roots. The adjacency is kept as one flat array of targets sorted by source (CSR), the
+        visited nodes as one byte per node, so a walk over a large tenant stays a tight loop over lists.
+        :return: bytearray, 1 for the reached node ids
+        """
+        nodeCount = len(self.nodeIds)
+        offsets = [0] * (nodeCount + 1)
+        for source, _ in self.edges:
+            offsets[source + 1] += 1
+        for nodeId in range(nodeCount):
+            offsets[nodeId + 1] += offsets[nodeId]
+        targets = [0] * len(self.edges)
+        position = offsets[:-1]
+        for source, target in self.edges:
+            targets[position[source]] = target
+            position[source] += 1
+        reached = bytearray(nodeCount)
+        stack = []
+        for rootId in self.rootIds:
+            if not reached[rootId]:
+                reached[rootId] = 1
+                stack.append(rootId)
+        while stack:
+            nodeId = stack.pop()
+            for target in targets[offsets[nodeId] : offsets[nodeId + 1]]:
+                if not reached[target]:
+                    reached[target] = 1
+                    stack.append(target)
+        return reached
+
+    def writeReport(self, reportPath):
+        """
+        Write the unused entities to a csv file.
+        :param reportPath: report file location
+        :return: null
+        """
+        with open(reportPath, "w", newline="", encoding="utf-8") as reportFile:
+            fileWriter = csv.DictWriter(reportFile, fieldnames=self.reportColumns)
+            fileWriter.writeheader()
+            fileWriter.writerows(self.unusedEntities)
+        print("Unused entities report written to " + reportPath)
+
+    def printReport(self):
+        """
+        Print the unused entities, grouped by entity type.
+        :return: null
+        """
+        for entityType, entities in groupby(
+            self.unusedEntities, key=lambda x: x["EntityType"]
+        ):
+            print(entityType)
+            for entity in entities:
+                line = f"  {entity['EntityName']}"
+                if entity["Location"]:
+                    line += f" ({entity['Location']})"
+                print(line)
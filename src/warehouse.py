@@ -0,0 +1,203 @@
+import logging
+import re
+import sqlite3
+from datetime import datetime
+
+from searchindex import TenantSearchIndex
+from textstore import TextStore, storedTextColumns
+
+
+class TenantWarehouse:
+    snapshotColumn = "SnapshotName"
+    defaultSnapshotName = "current"
+
+    def __init__(self, warehouseDBName):
+        """
+        TenantWarehouse Constructor. One database holding the tables of many tenants and snapshots. Every table gets a
+        SnapshotName column next to TenantName and a (TenantName, SnapshotName) index, loading a tenant replaces only
+        the rows of that tenant and snapshot. The stored texts (see TextStore) are kept once for all the tenants and
+        snapshots.
+        :param warehouseDBName: warehouse database location
+        """
+        self.logger = logging.getLogger("extractor-logger")
+        self.warehouseDBName = warehouseDBName
+
+    def loadTenant(self, tenantDBName, tenantName, snapshotName=None):
+        """
+        Copy the tables of an extracted tenant database into the warehouse. Tables without a TenantName column
+        (reference data) are skipped, tables not extracted in this run keep their earlier rows.
+        :param tenantDBName: extracted tenant database location
+        :param tenantName: tenant name
+        :param snapshotName: snapshot label, e.g. a date, defaults to "current"
+        :return: number of rows loaded
+        """
+        snapshotName = snapshotName or self.defaultSnapshotName
+        # Busy timeout so batch workers loading at the same time wait for each other.
+        warehouseConnection = sqlite3.connect(
+            self.warehouseDBName, timeout=600, isolation_level=None
+        )
+        rowCount = 0
+        try:
+            warehouseConnection.execute("PRAGMA journal_mode=WAL;")
+            warehouseConnection.execute("ATTACH DATABASE ? AS tenant;", (tenantDBName,))
+            warehouseConnection.execute("BEGIN IMMEDIATE;")
+            warehouseConnection.execute(
+                "CREATE TABLE IF NOT EXISTS WarehouseSnapshots (TenantName TEXT, SnapshotName TEXT, LoadedAt TEXT, "
+                "PRIMARY KEY (TenantName, SnapshotName));"
+            )
+            tableNames = [
+                x[0]
+                for x in warehouseConnection.execute(
+                    'SELECT name FROM tenant.sqlite_master WHERE type="table" ORDER BY name;'
+                )
+            ]
+            textStore = TextStore(warehouseConnection)
+            if TextStore.tableName in tableNames:
+                textStore.copyTexts("tenant")
+            replacedDigests = set()
+            for tableName in tableNames:
+                # The search index is rebuilt from the warehouse tables, not copied.
+                if tableName.startswith(TenantSearchIndex.indexTableName):
+                    continue
+                rowCount += self.loadTable(
+                    warehouseConnection,
+                    tableName,
+                    tenantName,
+                    snapshotName,
+                    textStore,
+                    replacedDigests,
+                )
+            # Texts only used by the replaced rows of the tenant and snapshot.
+            textStore.removeTexts(replacedDigests)
+            if TenantSearchIndex.indexTableName in tableNames:
+                TenantSearchIndex(warehouseConnection).buildSearchIndex(
+                    tenantName, snapshotName
+                )
+            warehouseConnection.execute(
+                "INSERT OR REPLACE INTO WarehouseSnapshots (TenantName, SnapshotName, LoadedAt) VALUES (?,?,?);",
+                (
+                    tenantName,
+                    snapshotName,
+                    datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+            warehouseConnection.execute("COMMIT;")
+        except Exception as e:
+            if warehouseConnection.in_transaction:
+                warehouseConnection.execute("ROLLBACK;")
+            self.logger.error(
+                "Unable to load " + tenantName + " into the warehouse: " + str(e)
+            )
+            print("Unable to load " + tenantName + " into the warehouse: " + str(e))
+            raise
+        finally:
+            if not warehouseConnection.in_transaction:
+                warehouseConnection.execute("DETACH DATABASE tenant;")
+            warehouseConnection.close()
+
+        summary = f"Loaded {rowCount} rows of {tenantName} ({snapshotName}) into warehouse {self.warehouseDBName}"
+        self.logger.info(summary)
+        print(summary)
+        return rowCount
+
+    def loadTable(
+        self,
+        warehouseConnection,
+        tableName,
+        tenantName,
+        snapshotName,
+        textStore=None,
+        replacedDigests=None,
+    ):
+        """
+        Replace the rows of the tenant and snapshot in one warehouse table.
+        :param warehouseConnection: warehouse database connection, with the tenant database attached
+        :param tableName: table name
+        :param tenantName: tenant name
+        :param snapshotName: snapshot label
+        :param textStore: TextStore of the warehouse, to collect the stored texts of the replaced rows
+        :param replacedDigests: set the digests of the stored texts of the replaced rows are added to
+        :return: number of rows loaded
+        """
+        tenantColumns = self.getTableColumns(warehouseConnection, "tenant", tableName)
+        if "TenantName" not in tenantColumns:
+            return 0
+        warehouseColumns = self.getTableColumns(warehouseConnection, "main", tableName)
+        if not warehouseColumns:
+            columnDefinitions = [
+                f'"{columnName}" {columnType}'
+                for columnName, columnType in tenantColumns.items()
+            ]
+            columnDefinitions.insert(
+                list(tenantColumns).index("TenantName") + 1,
+                f'"{self.snapshotColumn}" TEXT',
+            )
+            warehouseConnection.execute(
+                f'CREATE TABLE main."{tableName}" ({", ".join(columnDefinitions)});'
+            )
+            warehouseConnection.execute(
+                f'CREATE INDEX IF NOT EXISTS main."idx_{tableName}_Tenant" '
+                f'ON "{tableName}" (TenantName, {self.snapshotColumn});'
+            )
+        else:
+            # Columns added by a newer extractor version.
+            for columnName, columnType in tenantColumns.items():
+                if columnName not in warehouseColumns:
+                    warehouseConnection.execute(
+                        f'ALTER TABLE main."{tableName}" ADD COLUMN "{columnName}" {columnType};'
+                    )
+
+        # Lookup indexes of the tenant table, e.g. MeasureXRef on the measure name.
+        for (indexStatement,) in warehouseConnection.execute(
+            'SELECT sql FROM tenant.sqlite_master WHERE type="index" AND tbl_name=? AND sql IS NOT NULL;',
+            (tableName,),
+        ).fetchall():
+            warehouseConnection.execute(
+                re.sub(
+                    r"^CREATE INDEX (IF NOT EXISTS )?",
+                    "CREATE INDEX IF NOT EXISTS main.",
+                    indexStatement,
+                )
+            )
+
+        # Stored text columns indexed, so removing the texts of replaced rows only looks the digests up.
+        for columnName in storedTextColumns.get(tableName, ()):
+            warehouseConnection.execute(
+                f'CREATE INDEX IF NOT EXISTS main."idx_{tableName}_{columnName}" '
+                f'ON "{tableName}" ("{columnName}");'
+            )
+        if textStore is not None and replacedDigests is not None:
+            replacedDigests.update(
+                textStore.getUsedDigests(
+                    tableName,
+                    f"TenantName=? AND {self.snapshotColumn}=?",
+                    (tenantName, snapshotName),
+                )
+            )
+
+        warehouseConnection.execute(
+            f'DELETE FROM main."{tableName}" WHERE TenantName=? AND {self.snapshotColumn}=?;',
+            (tenantName, snapshotName),
+        )
+        columnList = ", ".join(f'"{x}"' for x in tenantColumns)
+        return warehouseConnection.execute(
+            f'INSERT INTO main."{tableName}" ({columnList}, {self.snapshotColumn}) '
+            f'SELECT {columnList}, ? FROM tenant."{tableName}";',
+            (snapshotName,),
+        ).rowcount
+
+    @staticmethod
+    def getTableColumns(connection, schemaName, tableName):
+        """
+        Get the columns of a table.
+        :param connection: database connection
+        :param schemaName: "main" or "tenant"
+        :param tableName: table name
+        :return: dict of column name to type, empty if the table does not exist
+        """
+        return {
+            x[1]: x[2]
+            for x in connection.execute(
+                f'PRAGMA {schemaName}.table_info("{tableName}");'
+            )
+        }